@@ -1,10 +1,21 @@
 from flask import Flask
+from sqlalchemy import event
 from config import Config
 from app.models import db
 from flask_migrate import Migrate
 
 migrate = Migrate()
 
+def _ustawienia_sqlite(wal, czas_oczekiwania):
+    """Ustawia dziennik i czas oczekiwania na blokadę każdego nowego połączenia SQLite"""
+    def ustaw(polaczenie, rekord):
+        kursor = polaczenie.cursor()
+        kursor.execute(f'PRAGMA busy_timeout = {int(czas_oczekiwania * 1000)}')
+        if wal:
+            kursor.execute('PRAGMA journal_mode = WAL')
+        kursor.close()
+    return ustaw
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
@@ -13,8 +24,15 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
     
+    # Strumieniowany eksport CSV czyta bazę do końca odpowiedzi; w dzienniku WAL
+    # zapisy nie czekają na jego blokadę odczytu (SHARED)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _ustawienia_sqlite(
+                app.config.get('SQLITE_WAL', True), app.config.get('SQLITE_BUSY_TIMEOUT', 30)))
+    
     # Rejestracja blueprintów
-    from app.routes import auth, main, products, warehouse, orders, reports, customers
+    from app.routes import auth, main, products, warehouse, orders, reports, customers, api
     
     app.register_blueprint(auth.bp)
     app.register_blueprint(main.bp)
@@ -23,9 +41,36 @@ def create_app(config_class=Config):
     app.register_blueprint(orders.bp)
     app.register_blueprint(reports.bp)
     app.register_blueprint(customers.bp)
+    app.register_blueprint(api.bp)
+    
+    # Komendy CLI
+    from app import cli
+    cli.init_app(app)
+    
+    # Pamięć podręczna
+    from app import cache
+    cache.init_app(app)
+    
+    # Indeks wyszukiwania produktów
+    from app import search
+    search.init_app(app)
+    
+    # Profile ładowania stron szczegółów
+    from app import loading
+    loading.init_app(app)
+    
+    # Raporty liczone w tle
+    from app.jobs import KolejkaRaportow
+    KolejkaRaportow(app)
+    
+    # Zapis logu zdarzeń w tle
+    from app.audit import DziennikZdarzen
+    DziennikZdarzen(app)
     
     # Tworzenie tabel w bazie danych
     with app.app_context():
         db.create_all()
+        # Dostępność indeksu pełnotekstowego sprawdzana raz, po utworzeniu tabel
+        search.sprawdz_indeks(app)
     
     return app
\ No newline at end of file
@@ -0,0 +1,136 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from app.models import db, Log
+
+
+class DziennikZdarzen:
+    """Zapisuje wpisy logu partiami z wątku w tle"""
+    
+    def __init__(self, app=None):
+        self.app = None
+        self.asynchronicznie = False
+        self._kolejka = queue.Queue()
+        self._zaleglosci = []
+        self._proby = 0
+        self._watek = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Odczytuje konfigurację i rejestruje dziennik w aplikacji"""
+        self.app = app
+        self.asynchronicznie = app.config['AUDIT_LOG_ASYNC']
+        self.interwal = app.config['AUDIT_LOG_FLUSH_INTERVAL']
+        self.rozmiar_partii = app.config['AUDIT_LOG_BATCH_SIZE']
+        self.liczba_prob = app.config['AUDIT_LOG_RETRIES']
+        self.limit_zaleglosci = app.config['AUDIT_LOG_BACKLOG_LIMIT']
+        app.extensions['dziennik_zdarzen'] = self
+        atexit.register(self.zatrzymaj)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._po_forku)
+    
+    def _po_forku(self):
+        """W procesie potomnym (np. worker gunicorna z preload) nie ma wątku zapisu
+        
+        Wpisy skopiowane z kolejki rodzica zapisze rodzic - potomek zaczyna od pustej.
+        """
+        self._watek = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._kolejka = queue.Queue()
+        self._zaleglosci = []
+        self._proby = 0
+    
+    def dodaj(self, wpis):
+        """Dodaje wpis do kolejki i w razie potrzeby uruchamia wątek zapisu"""
+        if self._watek is None:
+            with self._lock:
+                if self._watek is None:
+                    self._watek = threading.Thread(target=self._petla, name='dziennik-zdarzen',
+                                                   daemon=True)
+                    self._watek.start()
+        self._kolejka.put(wpis)
+    
+    def _petla(self):
+        """Pętla wątku w tle - zbiera partie i zapisuje je do bazy"""
+        while not self._stop.is_set():
+            partia = self._pobierz_partie(self.interwal)
+            # Zaległości ponawiane także wtedy, gdy nie przybyło nowych wpisów
+            if partia or self._zaleglosci:
+                self._zapisz(partia)
+    
+    def _pobierz_partie(self, czas_oczekiwania):
+        """Zbiera do rozmiar_partii wpisów, czekając najwyżej czas_oczekiwania"""
+        partia = []
+        termin = time.monotonic() + czas_oczekiwania
+        while len(partia) < self.rozmiar_partii:
+            pozostalo = termin - time.monotonic()
+            try:
+                if pozostalo > 0:
+                    partia.append(self._kolejka.get(timeout=pozostalo))
+                else:
+                    partia.append(self._kolejka.get_nowait())
+            except queue.Empty:
+                break
+        return partia
+    
+    def _zapisz(self, partia):
+        """Zapisuje partię jednym INSERT-em; po błędzie ponawia przy kolejnym zapisie
+        
+        Po liczba_prob nieudanych próbach zapisuje wpisy pojedynczo i odrzuca te,
+        których nadal nie da się zapisać - jeden błędny wpis nie blokuje reszty.
+        """
+        wpisy = self._zaleglosci + partia
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(db.insert(Log), wpisy)
+            self._zaleglosci = []
+            self._proby = 0
+            return
+        except Exception:
+            self.app.logger.exception('Nie udało się zapisać %d wpisów logu', len(wpisy))
+        
+        self._proby += 1
+        if self._proby < self.liczba_prob:
+            nadmiar = len(wpisy) - self.limit_zaleglosci
+            if nadmiar > 0:
+                self.app.logger.error('Odrzucono %d najstarszych zaległych wpisów logu', nadmiar)
+                wpisy = wpisy[nadmiar:]
+            self._zaleglosci = wpisy
+            return
+        
+        self._zaleglosci = []
+        self._proby = 0
+        with self.app.app_context():
+            for wpis in wpisy:
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(db.insert(Log), wpis)
+                except Exception:
+                    self.app.logger.exception('Odrzucono wpis logu: %r', wpis)
+    
+    def oproznij(self):
+        """Zapisuje wszystkie oczekujące wpisy w bieżącym wątku
+        
+        Kończy się także przy niedostępnej bazie - zaległości znikają najpóźniej
+        po liczba_prob próbach.
+        """
+        while True:
+            partia = self._pobierz_partie(0)
+            if not partia and not self._zaleglosci:
+                break
+            self._zapisz(partia)
+    
+    def zatrzymaj(self):
+        """Zatrzymuje wątek zapisu i zapisuje resztę kolejki"""
+        self._stop.set()
+        if self._watek is not None:
+            self._watek.join()
+            self._watek = None
+        self.oproznij()
@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from app import signals
+from app.models import Zamowienie, Faktura, Klient, Produkt
+
+
+class _Liczniki:
+    """Liczniki trafień i chybień wspólne dla buforów"""
+    
+    trafienia = 0
+    chybienia = 0
+    
+    def statystyki(self):
+        """Zwraca liczniki trafień i chybień"""
+        wszystkie = self.trafienia + self.chybienia
+        return {
+            'trafienia': self.trafienia,
+            'chybienia': self.chybienia,
+            'skutecznosc': round(self.trafienia / wszystkie, 3) if wszystkie else None,
+        }
+
+
+class BuforWyniku(_Liczniki):
+    """Pojedynczy wynik obliczenia przechowywany w pamięci procesu"""
+    
+    def __init__(self, nazwa, ttl=60):
+        self.nazwa = nazwa
+        self.ttl = ttl
+        self._klucz = None
+        self._wartosc = None
+        self._wygasa = 0
+        self._pokolenie = 0
+        self._lock = threading.Lock()
+    
+    def pobierz(self, klucz, oblicz):
+        """Zwraca zapamiętany wynik lub oblicza go ponownie"""
+        with self._lock:
+            if self._klucz == klucz and time.monotonic() < self._wygasa:
+                self.trafienia += 1
+                return self._wartosc
+            self.chybienia += 1
+            pokolenie = self._pokolenie
+        
+        wartosc = oblicz()
+        
+        with self._lock:
+            # Unieważnienie w trakcie obliczenia - wynik mógł powstać sprzed zmiany
+            if self._pokolenie == pokolenie:
+                self._klucz = klucz
+                self._wartosc = wartosc
+                self._wygasa = time.monotonic() + self.ttl
+        return wartosc
+    
+    def uniewaznij(self, *args, **kwargs):
+        """Usuwa zapamiętany wynik (może być podłączone do sygnału)"""
+        with self._lock:
+            self._pokolenie += 1
+            self._klucz = None
+            self._wartosc = None
+            self._wygasa = 0
+
+
+# Zwarte dane zalogowanego użytkownika (bez obiektu ORM)
+Tozsamosc = namedtuple('Tozsamosc', 'id login imie nazwisko rola aktywny')
+
+
+class BuforTozsamosci(_Liczniki):
+    """Tożsamości użytkowników z czasem życia każdego wpisu"""
+    
+    def __init__(self, nazwa, ttl=30):
+        self.nazwa = nazwa
+        self.ttl = ttl
+        self._wpisy = {}
+        self._lock = threading.Lock()
+    
+    def pobierz(self, uzytkownik_id, wczytaj):
+        """Zwraca tożsamość z pamięci lub wczytuje ją funkcją wczytaj"""
+        with self._lock:
+            wpis = self._wpisy.get(uzytkownik_id)
+            if wpis is not None and time.monotonic() < wpis[1]:
+                self.trafienia += 1
+                return wpis[0]
+            self.chybienia += 1
+        
+        tozsamosc = wczytaj(uzytkownik_id)
+        
+        if tozsamosc is not None:
+            with self._lock:
+                self._wpisy[uzytkownik_id] = (tozsamosc, time.monotonic() + self.ttl)
+        return tozsamosc
+    
+    def uniewaznij(self, uzytkownik_id=None):
+        """Usuwa tożsamość jednego użytkownika lub wszystkich"""
+        with self._lock:
+            if uzytkownik_id is None:
+                self._wpisy.clear()
+            else:
+                self._wpisy.pop(uzytkownik_id, None)
+
+
+class BuforLRU(_Liczniki):
+    """Wiele wyników pod różnymi kluczami, najdawniej używane usuwane po przekroczeniu rozmiaru"""
+    
+    def __init__(self, nazwa, ttl=60, rozmiar=256, ttl_trwalych=None):
+        self.nazwa = nazwa
+        self.ttl = ttl
+        self.rozmiar = rozmiar
+        self.ttl_trwalych = ttl_trwalych
+        self._wpisy = OrderedDict()
+        self._pokolenie = 0
+        self._lock = threading.Lock()
+    
+    def pobierz(self, klucz, oblicz, trwale=False):
+        """Zwraca wynik zapamiętany pod kluczem lub oblicza go ponownie
+        
+        Wynik zapamiętany z trwale=True żyje ttl_trwalych sekund (None - bez
+        wygasania, znika tylko przy unieważnieniu albo wyparciu przez nowsze wpisy).
+        """
+        with self._lock:
+            wpis = self._wpisy.get(klucz)
+            if wpis is not None and time.monotonic() < wpis[1]:
+                self._wpisy.move_to_end(klucz)
+                self.trafienia += 1
+                return wpis[0]
+            self.chybienia += 1
+            pokolenie = self._pokolenie
+        
+        wartosc = oblicz()
+        
+        with self._lock:
+            # Unieważnienie w trakcie obliczenia - wynik mógł powstać sprzed zmiany
+            if self._pokolenie != pokolenie:
+                return wartosc
+            ttl = self.ttl_trwalych if trwale else self.ttl
+            wygasa = float('inf') if ttl is None else time.monotonic() + ttl
+            self._wpisy[klucz] = (wartosc, wygasa)
+            self._wpisy.move_to_end(klucz)
+            while len(self._wpisy) > self.rozmiar:
+                self._wpisy.popitem(last=False)
+        return wartosc
+    
+    def uniewaznij(self, *args, **kwargs):
+        """Usuwa wszystkie zapamiętane wyniki (może być podłączone do sygnału)"""
+        with self._lock:
+            self._pokolenie += 1
+            self._wpisy.clear()
+    
+    def usun_gdzie(self, warunek):
+        """Usuwa wpisy, których klucz spełnia warunek"""
+        with self._lock:
+            self._pokolenie += 1
+            for klucz in [k for k in self._wpisy if warunek(k)]:
+                del self._wpisy[klucz]
+    
+    def statystyki(self):
+        """Liczniki trafień i chybień oraz liczba wpisów"""
+        return dict(super().statystyki(), wpisy=len(self._wpisy), rozmiar=self.rozmiar)
+
+
+# Statystyki panelu głównego
+statystyki_panelu = BuforWyniku('statystyki_panelu')
+
+# Tożsamości zalogowanych użytkowników
+tozsamosci = BuforTozsamosci('tozsamosci')
+
+# Liczby wierszy list stronicowanych kursorem (klucz: trasa i filtry)
+liczebnosci_list = BuforLRU('liczebnosci_list')
+
+# Wyniki raportów (klucz: raport, pierwszy i ostatni dzień okresu, parametry)
+raporty = BuforLRU('raporty', rozmiar=128)
+
+# Wszystkie bufory procesu (do podglądu statystyk)
+bufory = {b.nazwa: b for b in (statystyki_panelu, tozsamosci, liczebnosci_list, raporty)}
+
+
+def wynik_raportu(raport, od, do, oblicz, *parametry):
+    """Wynik raportu za dni od..do - zakończony okres zapamiętany trwale, bieżący na TTL
+    
+    Daty w bazie są w UTC, więc okres zamyka się z końcem dnia UTC, nie lokalnego.
+    """
+    return raporty.pobierz((raport, od, do) + parametry, oblicz,
+                           trwale=do < datetime.utcnow().date())
+
+
+def uniewaznij_okresy(dni):
+    """Usuwa raporty, których okres obejmuje którykolwiek z dni"""
+    raporty.usun_gdzie(lambda klucz: any(klucz[1] <= dzien <= klucz[2] for dzien in dni))
+
+
+# Kolumny dat, po których raporty wybierają wiersze (SprzedazDzienna zapisywana
+# jest Core - dni zgłaszają jej metody, patrz SprzedazDzienna._zmienione_dni)
+_DATY_RAPORTOW = {
+    Zamowienie: 'data_zamowienia',
+    Faktura: 'data_wystawienia',
+}
+
+# Kolumny słowników pokazywane w raportach niezależnie od okresu
+_SLOWNIKI_RAPORTOW = {
+    Klient: 'nazwa',
+    Produkt: 'kategoria',
+}
+
+
+def _zmiana_okresu(mapper, polaczenie, rekord):
+    """Zapamiętuje dni zmienionego wiersza (także dzień sprzed zmiany daty)"""
+    kolumna = _DATY_RAPORTOW[mapper.class_]
+    historia = inspect(rekord).attrs[kolumna].history
+    dni = object_session(rekord).info.setdefault('okresy_raportow', set())
+    for wartosc in (getattr(rekord, kolumna), *historia.deleted):
+        if wartosc is not None:
+            dni.add(wartosc.date() if isinstance(wartosc, datetime) else wartosc)
+
+
+def _zmiana_slownika(mapper, polaczenie, rekord):
+    """Zmiana nazwy klienta lub kategorii produktu dotyczy raportów z każdego okresu"""
+    if inspect(rekord).attrs[_SLOWNIKI_RAPORTOW[mapper.class_]].history.has_changes():
+        object_session(rekord).info['raporty_wszystkie'] = True
+
+
+def _po_commicie(sesja):
+    dni = sesja.info.pop('okresy_raportow', None)
+    if sesja.info.pop('raporty_wszystkie', False):
+        raporty.uniewaznij()
+    elif dni:
+        uniewaznij_okresy(dni)
+
+
+def _po_wycofaniu(sesja):
+    sesja.info.pop('okresy_raportow', None)
+    sesja.info.pop('raporty_wszystkie', None)
+
+
+def init_app(app):
+    """Konfiguruje bufory i podłącza je do zdarzeń domenowych"""
+    statystyki_panelu.ttl = app.config['DASHBOARD_CACHE_TTL']
+    tozsamosci.ttl = app.config['IDENTITY_CACHE_TTL']
+    liczebnosci_list.ttl = app.config['LIST_COUNT_CACHE_TTL']
+    raporty.ttl = app.config['REPORT_CACHE_TTL']
+    raporty.rozmiar = app.config['REPORT_CACHE_SIZE']
+    raporty.ttl_trwalych = app.config['REPORT_CACHE_CLOSED_TTL']
+    
+    for sygnal in (signals.zamowienie_utworzone,
+                   signals.status_zamowienia_zmieniony,
+                   signals.dokument_zaksiegowany):
+        sygnal.connect(statystyki_panelu.uniewaznij)
+        sygnal.connect(liczebnosci_list.uniewaznij)
+    
+    # Zapis z datą z zamkniętego okresu unieważnia zapamiętane raporty tego okresu
+    if not event.contains(Session, 'after_commit', _po_commicie):
+        for model in _DATY_RAPORTOW:
+            for zdarzenie in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, zdarzenie, _zmiana_okresu)
+        for model in _SLOWNIKI_RAPORTOW:
+            event.listen(model, 'after_update', _zmiana_slownika)
+        event.listen(Session, 'after_commit', _po_commicie)
+        event.listen(Session, 'after_rollback', _po_wycofaniu)
@@ -0,0 +1,204 @@
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from datetime import datetime, timedelta
+from app.models import (db, SprzedazDzienna, StanMagazynowy, RuchMagazynowy, MigawkaStanu,
+                        Uzytkownik, RolaUzytkownika)
+from app import cache, search, forecast, plany
+from app.replenishment import plan_uzupelnienia, utworz_zamowienia
+
+
+def _data(wartosc):
+    """Zamienia tekst YYYY-MM-DD na datę"""
+    return datetime.strptime(wartosc, '%Y-%m-%d').date() if wartosc else None
+
+
+@click.command('przebuduj-sprzedaz')
+@click.option('--od', 'data_od', help='Pierwszy dzień (YYYY-MM-DD), domyślnie cała historia')
+@click.option('--do', 'data_do', help='Ostatni dzień (YYYY-MM-DD), domyślnie cała historia')
+@with_appcontext
+def przebuduj_sprzedaz(data_od, data_do):
+    """Odbudowuje dzienne zestawienie sprzedaży z pozycji zamówień
+    
+    Raporty sprzedaży zapamiętane przez działający serwer (inne procesy) nie są
+    unieważniane - wygasają po REPORT_CACHE_CLOSED_TTL albo po restarcie serwera.
+    """
+    liczba = SprzedazDzienna.przebuduj(_data(data_od), _data(data_do))
+    db.session.commit()
+    cache.raporty.uniewaznij()
+    click.echo(f'Zapisano {liczba} wierszy zestawienia sprzedaży.')
+    if cache.raporty.ttl_trwalych is None:
+        click.echo('Uruchom ponownie serwer, aby odświeżyć zapamiętane raporty sprzedaży.')
+
+
+@click.command('przebuduj-wyszukiwarke')
+@with_appcontext
+def przebuduj_wyszukiwarke():
+    """Tworzy i wypełnia od nowa indeks pełnotekstowy produktów"""
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('Indeks FTS5 jest dostępny tylko dla bazy SQLite.')
+    
+    with db.engine.begin() as polaczenie:
+        search.utworz_indeks(polaczenie)
+        liczba = search.przebuduj_indeks(polaczenie)
+    click.echo(f'Zaindeksowano {liczba} produktów.')
+
+
+@click.command('przebuduj-ksiege')
+@with_appcontext
+def przebuduj_ksiege():
+    """Odbudowuje księgę ruchów z dokumentów PZ/WZ z bilansem otwarcia do bieżących stanów"""
+    liczba_bilansow = RuchMagazynowy.przebuduj()
+    db.session.commit()
+    liczba = db.session.query(db.func.count(RuchMagazynowy.id)).scalar()
+    click.echo(f'Zapisano {liczba} ruchów, w tym {liczba_bilansow} bilansów otwarcia.')
+
+
+@click.command('migawka-stanow')
+@click.option('--dzien', help='Dzień migawki (YYYY-MM-DD), domyślnie wczorajszy')
+@with_appcontext
+def migawka_stanow(dzien):
+    """Zapisuje stany wszystkich produktów na koniec dnia (uruchamiana np. z crona)"""
+    dzien = _data(dzien) or datetime.utcnow().date() - timedelta(days=1)
+    # Ruchy mają daty UTC - migawka bieżącego dnia zdezaktualizowałaby się
+    if dzien >= datetime.utcnow().date():
+        raise click.ClickException('Migawkę można zapisać tylko dla zakończonego dnia.')
+    
+    liczba = MigawkaStanu.utworz(dzien)
+    db.session.commit()
+    click.echo(f'Zapisano migawkę z {dzien}: {liczba} produktów.')
+
+
+@click.command('sprawdz-ksiege')
+@click.option('--migawki', is_flag=True, help='Sprawdza też zapisane migawki z pełną księgą')
+@with_appcontext
+def sprawdz_ksiege(migawki):
+    """Sprawdza, czy księga ruchów sumuje się do StanMagazynowy - przy różnicy kończy się błędem"""
+    sumy = dict(db.session.query(
+        RuchMagazynowy.produkt_id, db.func.sum(RuchMagazynowy.zmiana)
+    ).group_by(RuchMagazynowy.produkt_id))
+    stany = dict(db.session.query(StanMagazynowy.produkt_id, StanMagazynowy.ilosc_dostepna))
+    
+    bledy = 0
+    for produkt_id in sorted(set(sumy) | set(stany)):
+        ksiega, stan = sumy.get(produkt_id, 0), stany.get(produkt_id) or 0
+        if ksiega != stan:
+            bledy += 1
+            click.echo(f'BŁĄD  produkt {produkt_id}: księga {ksiega}, stan {stan}')
+    click.echo(f'Sprawdzono {len(stany)} stanów i {len(sumy)} produktów w księdze.')
+    
+    if migawki:
+        dni = [d for (d,) in db.session.query(MigawkaStanu.dzien).distinct().order_by(
+            MigawkaStanu.dzien)]
+        for dzien in dni:
+            zapisane = dict(db.session.query(MigawkaStanu.produkt_id, MigawkaStanu.ilosc).filter(
+                MigawkaStanu.dzien == dzien))
+            # Pełna suma księgi do końca dnia, bez korzystania z migawek
+            koniec = datetime.combine(dzien + timedelta(days=1), datetime.min.time())
+            policzone = dict(db.session.query(
+                RuchMagazynowy.produkt_id, db.func.sum(RuchMagazynowy.zmiana)
+            ).filter(RuchMagazynowy.data < koniec).group_by(RuchMagazynowy.produkt_id))
+            for produkt_id in sorted(set(zapisane) | set(policzone)):
+                migawka, ksiega = zapisane.get(produkt_id, 0), policzone.get(produkt_id, 0)
+                if migawka != ksiega:
+                    bledy += 1
+                    click.echo(f'BŁĄD  migawka {dzien}, produkt {produkt_id}: '
+                               f'{migawka}, z księgi {ksiega}')
+        click.echo(f'Sprawdzono {len(dni)} migawek.')
+    
+    if bledy:
+        raise click.ClickException(f'Niezgodności księgi: {bledy}.')
+
+
+@click.command('prognozuj-popyt')
+@click.option('--dzien', help='Ostatni dzień historii (YYYY-MM-DD), domyślnie wczorajszy')
+@click.option('--dni', type=int, help='Długość historii w dniach, domyślnie FORECAST_HISTORY_DAYS')
+@with_appcontext
+def prognozuj_popyt(dzien, dni):
+    """Liczy popyt, zapas bezpieczeństwa i punkty zamówienia aktywnych produktów (co noc z crona)"""
+    konfiguracja = current_app.config
+    dzien = _data(dzien) or datetime.utcnow().date() - timedelta(days=1)
+    dni = konfiguracja['FORECAST_HISTORY_DAYS'] if dni is None else dni
+    if dni < 1:
+        raise click.ClickException('Historia musi mieć co najmniej jeden dzień.')
+    
+    start = time.perf_counter()
+    prognoza = forecast.przelicz(dzien, dni, konfiguracja['FORECAST_SERVICE_LEVEL'],
+                                 konfiguracja['FORECAST_LEAD_TIME_DAYS'],
+                                 konfiguracja['FORECAST_MIN_HISTORY_DAYS'])
+    db.session.commit()
+    click.echo(f'Zapisano prognozy {len(prognoza.ids)} produktów z {dni} dni do {dzien} '
+               f'w {time.perf_counter() - start:.1f} s.')
+    click.echo(f'Produkty o niskim stanie: {StanMagazynowy.niskie_stany().count()}.')
+
+
+@click.command('uzupelnij-stany')
+@click.option('--podglad', is_flag=True, help='Tylko wypisuje zamówienia, niczego nie zapisuje')
+@with_appcontext
+def uzupelnij_stany(podglad):
+    """Tworzy zamówienia do dostawców dla wszystkich produktów o niskim stanie"""
+    zamowienia, bez_dostawcy = plan_uzupelnienia(current_app.config['REPLENISHMENT_COVER_DAYS'])
+    for zamowienie in zamowienia:
+        click.echo(f'{zamowienie.nazwa}: {len(zamowienie.pozycje)} pozycji, '
+                   f'{zamowienie.wartosc:.2f} zł')
+    if bez_dostawcy:
+        click.echo(f'Bez dostawcy w historii zakupów: {len(bez_dostawcy)} produktów '
+                   f'({", ".join(p.kod for p in bez_dostawcy[:20])}).')
+    
+    if podglad or not zamowienia:
+        return
+    numery = utworz_zamowienia(zamowienia, 'Uzupełnienie niskich stanów')
+    db.session.commit()
+    click.echo(f'Utworzono {len(numery)} zamówień: {numery[0]} - {numery[-1]}.')
+
+
+@click.command('sprawdz-plany')
+@click.option('--pokaz', is_flag=True, help='Wypisuje pełne plany wszystkich zapytań')
+@with_appcontext
+def sprawdz_plany(pokaz):
+    """Sprawdza EXPLAIN QUERY PLAN zapytań tras - kończy się błędem przy pełnym skanie
+    
+    Strony z app/plany.py pobierane są klientem testowym jako pierwszy aktywny
+    administrator; pełne przejścia tabel spoza DOZWOLONE_SKANY są błędem.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('Sprawdzanie planów obsługuje tylko bazę SQLite.')
+    
+    administrator = Uzytkownik.query.filter_by(
+        rola=RolaUzytkownika.ADMINISTRATOR, aktywny=True
+    ).order_by(Uzytkownik.id).first()
+    if administrator is None:
+        raise click.ClickException('Brak aktywnego administratora do pobrania stron.')
+    klient = current_app.test_client()
+    with klient.session_transaction() as sesja:
+        sesja['user_id'] = administrator.id
+    
+    bledy = 0
+    for trasa, punkt_koncowy, sql, kroki, skany in plany.sprawdz(klient):
+        opis = ' '.join(sql.split())[:100]
+        if skany:
+            bledy += 1
+            click.echo(f'BŁĄD  {trasa} ({punkt_koncowy}): {", ".join(skany)}')
+            click.echo(f'        {opis}')
+        elif pokaz:
+            click.echo(f'OK    {trasa} ({punkt_koncowy}): {opis}')
+        if pokaz or skany:
+            for krok in kroki:
+                click.echo(f'        {krok}')
+    
+    if bledy:
+        raise click.ClickException(f'Pełny skan tabeli w {bledy} zapytaniach.')
+    click.echo('Brak niedozwolonych pełnych skanów.')
+
+
+def init_app(app):
+    """Rejestruje komendy CLI aplikacji"""
+    app.cli.add_command(przebuduj_sprzedaz)
+    app.cli.add_command(sprawdz_plany)
+    app.cli.add_command(przebuduj_wyszukiwarke)
+    app.cli.add_command(przebuduj_ksiege)
+    app.cli.add_command(migawka_stanow)
+    app.cli.add_command(sprawdz_ksiege)
+    app.cli.add_command(prognozuj_popyt)
+    app.cli.add_command(uzupelnij_stany)
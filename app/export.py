@@ -0,0 +1,141 @@
+import csv
+import gzip
+import io
+import os
+import time
+import zlib
+from itertools import islice
+from flask import Response, request, stream_with_context
+from app.models import db
+
+# Liczba wierszy pobieranych z bazy (yield_per) i wysyłanych jedną porcją
+ROZMIAR_PARTII = 1000
+
+# Wartości parametru ?format= -> (typ MIME, rozszerzenie pliku)
+FORMATY = {
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+}
+
+
+def zadany_format():
+    """Format eksportu z parametru ?format= albo None dla strony HTML"""
+    format_ = request.args.get('format')
+    return format_ if format_ in FORMATY else None
+
+
+def _data(wartosc):
+    return wartosc.isoformat(' ', 'seconds')
+
+
+def _enum(wartosc):
+    return wartosc.value
+
+
+def _tak_nie(wartosc):
+    return 'tak' if wartosc else 'nie'
+
+
+def _konwersje(zapytanie):
+    """Zamiany wartości kolumn na tekst CSV: [(indeks kolumny, funkcja)]"""
+    konwersje = []
+    for indeks, kolumna in enumerate(zapytanie.column_descriptions):
+        typ = kolumna['type']
+        if isinstance(typ, db.DateTime):
+            konwersje.append((indeks, _data))
+        elif isinstance(typ, db.Enum) and typ.enum_class is not None:
+            konwersje.append((indeks, _enum))
+        elif isinstance(typ, db.Boolean):
+            konwersje.append((indeks, _tak_nie))
+    return konwersje
+
+
+# Początki komórek, które arkusz kalkulacyjny wykonałby jako formułę
+_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _porcje_csv(naglowek, wiersze, konwersje):
+    """Tekst CSV w porcjach po ROZMIAR_PARTII wierszy
+    
+    Tekst zaczynający się jak formuła (np. nazwa produktu "=HYPERLINK(...)")
+    dostaje przedrostek ', więc Excel pokazuje go zamiast wykonywać.
+    """
+    bufor = io.StringIO()
+    pisarz = csv.writer(bufor, delimiter=';')
+    
+    # BOM dla Excela; nagłówek wychodzi od razu, zanim baza zwróci pierwsze wiersze
+    bufor.write('\ufeff')
+    pisarz.writerow(naglowek)
+    yield bufor.getvalue()
+    
+    def tekst(wiersz):
+        wiersz = list(wiersz)
+        for indeks, funkcja in konwersje:
+            if wiersz[indeks] is not None:
+                wiersz[indeks] = funkcja(wiersz[indeks])
+        return ["'" + w if isinstance(w, str) and w.startswith(_FORMULA) else w
+                for w in wiersz]
+    
+    wiersze = iter(wiersze)
+    while partia := list(islice(wiersze, ROZMIAR_PARTII)):
+        bufor.seek(0)
+        bufor.truncate()
+        pisarz.writerows(map(tekst, partia))
+        yield bufor.getvalue()
+
+
+def _gzip(porcje):
+    """Kompresuje porcje tekstu do strumienia gzip, wysyłając każdą porcję od razu"""
+    kompresor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for porcja in porcje:
+        yield kompresor.compress(porcja.encode('utf-8')) + kompresor.flush(zlib.Z_SYNC_FLUSH)
+    yield kompresor.flush()
+
+
+def eksport(format_, nazwa, naglowek, zapytanie):
+    """Strumieniowa odpowiedź CSV z wierszami zapytania czytanymi partiami
+    
+    Zapytanie wykonuje się dopiero przy wysyłaniu odpowiedzi, a w pamięci
+    jest naraz co najwyżej jedna partia wierszy - niezależnie od zakresu raportu.
+    """
+    porcje = _porcje_csv(naglowek, zapytanie.yield_per(ROZMIAR_PARTII), _konwersje(zapytanie))
+    if format_ == 'csv.gz':
+        porcje = _gzip(porcje)
+    
+    typ, rozszerzenie = FORMATY[format_]
+    return Response(
+        stream_with_context(porcje),
+        mimetype=typ,
+        headers={'Content-Disposition': f'attachment; filename={nazwa}.{rozszerzenie}'}
+    )
+
+
+def zapisz_plik(sciezka, naglowek, zapytanie, termin=None):
+    """Zapisuje wiersze zapytania do pliku CSV skompresowanego gzipem
+    
+    Plik powstaje pod nazwą tymczasową i trafia na miejsce dopiero w całości.
+    Po przekroczeniu terminu (time.monotonic()) zgłasza TimeoutError.
+    Zwraca liczbę zapisanych wierszy.
+    """
+    tymczasowy = sciezka + '.tmp'
+    liczba_wierszy = 0
+    
+    def policzone(wiersze):
+        nonlocal liczba_wierszy
+        for wiersz in wiersze:
+            liczba_wierszy += 1
+            yield wiersz
+    
+    porcje = _porcje_csv(naglowek, policzone(zapytanie.yield_per(ROZMIAR_PARTII)),
+                         _konwersje(zapytanie))
+    try:
+        with gzip.open(tymczasowy, 'wt', encoding='utf-8', newline='') as plik:
+            for porcja in porcje:
+                if termin is not None and time.monotonic() > termin:
+                    raise TimeoutError
+                plik.write(porcja)
+        os.replace(tymczasowy, sciezka)
+    finally:
+        if os.path.exists(tymczasowy):
+            os.remove(tymczasowy)
+    return liczba_wierszy
@@ -0,0 +1,181 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from statistics import NormalDist
+import numpy as np
+from app.models import (db, Produkt, SprzedazDzienna, ZamowienieZakupu, PozycjaZamowieniaZakupu,
+                        StatusZamowieniaZakupu, PrognozaPopytu, StanMagazynowy)
+
+# Wiersze historii sprzedaży czytane z bazy i sumowane jedną porcją
+ROZMIAR_PORCJI = 100_000
+
+# Prognoza aktywnych produktów - tablice NumPy o wspólnej kolejności
+Prognoza = namedtuple('Prognoza', [
+    'ids',                   # id produktów
+    'dni_historii',          # dni okna, w których produkt był w ofercie
+    'popyt_dzienny',         # średnia sprzedaż dzienna (z dniami bez sprzedaży)
+    'odchylenie_popytu',     # odchylenie standardowe sprzedaży dziennej
+    'czas_dostawy',          # średni czas dostawy w dniach
+    'odchylenie_dostawy',    # odchylenie standardowe czasu dostawy
+    'zapas_bezpieczenstwa',  # zapas na wahania popytu i dostaw przy zadanym poziomie obsługi
+    'punkt_zamowienia',      # popyt w czasie dostawy plus zapas bezpieczeństwa
+])
+
+
+def _pozycje(ids, produkty):
+    """Pozycje produktów w posortowanej tablicy ids i maska produktów w niej obecnych"""
+    indeks = np.searchsorted(ids, produkty)
+    znane = indeks < len(ids)
+    znane[znane] = ids[indeks[znane]] == produkty[znane]
+    return indeks, znane
+
+
+def wczytaj_historie(data_od, data_do):
+    """Sumy sprzedaży aktywnych produktów z dziennego zestawienia za okres
+    
+    Zestawienie (SprzedazDzienna) ma jeden wiersz na produkt i dzień sprzedaży,
+    więc suma ilości i suma ich kwadratów wystarczą do średniej i wariancji.
+    Wiersze czytane są porcjami - pamięć nie rośnie z długością historii.
+    """
+    polaczenie = db.session.connection()
+    
+    produkty = polaczenie.execute(
+        db.select(Produkt.id, db.func.date(Produkt.data_utworzenia))
+        .where(Produkt.aktywny == True).order_by(Produkt.id)
+    ).all()
+    ids = np.fromiter((p[0] for p in produkty), dtype=np.int64, count=len(produkty))
+    # Produkt bez daty utworzenia traktujemy jak obecny przez całe okno
+    start = np.maximum(np.array([p[1] or data_od for p in produkty], dtype='datetime64[D]'),
+                       np.datetime64(data_od, 'D'))
+    
+    suma = np.zeros(len(ids))
+    suma_kwadratow = np.zeros(len(ids))
+    wynik = polaczenie.execute(
+        db.select(SprzedazDzienna.produkt_id, SprzedazDzienna.ilosc)
+        .where(SprzedazDzienna.dzien.between(data_od, data_do))
+    )
+    while porcja := wynik.fetchmany(ROZMIAR_PORCJI):
+        wiersze = np.fromiter(map(tuple, porcja), count=len(porcja),
+                              dtype=[('produkt', np.int64), ('ilosc', np.float64)])
+        # Pomija sprzedaż produktów nieaktywnych
+        indeks, znane = _pozycje(ids, wiersze['produkt'])
+        indeks, ilosc = indeks[znane], wiersze['ilosc'][znane]
+        suma += np.bincount(indeks, weights=ilosc, minlength=len(ids))
+        suma_kwadratow += np.bincount(indeks, weights=ilosc ** 2, minlength=len(ids))
+    
+    # Produkt dodany w oknie, ale ze sprzedażą sprzed daty utworzenia (np. import danych),
+    # liczymy od pierwszej sprzedaży - inaczej popyt wyszedłby zawyżony
+    pierwsze = polaczenie.execute(
+        db.select(SprzedazDzienna.produkt_id, db.func.min(SprzedazDzienna.dzien))
+        .join(Produkt, Produkt.id == SprzedazDzienna.produkt_id)
+        .where(SprzedazDzienna.dzien.between(data_od, data_do),
+               Produkt.data_utworzenia >= datetime.combine(data_od, datetime.min.time()))
+        .group_by(SprzedazDzienna.produkt_id)
+    ).all() if (start > np.datetime64(data_od, 'D')).any() else []
+    if pierwsze:
+        produkt = np.fromiter((p[0] for p in pierwsze), dtype=np.int64, count=len(pierwsze))
+        dzien = np.array([p[1] for p in pierwsze], dtype='datetime64[D]')
+        indeks, znane = _pozycje(ids, produkt)
+        start[indeks[znane]] = np.minimum(start[indeks[znane]], dzien[znane])
+    
+    dni = (np.datetime64(data_do, 'D') - start).astype(np.int64) + 1
+    
+    return {
+        'ids': ids,
+        'dni_historii': np.maximum(dni, 0),
+        'suma': suma,
+        'suma_kwadratow': suma_kwadratow,
+    }
+
+
+def czasy_dostaw(ids, data_od):
+    """Średni czas dostawy i jego odchylenie (w dniach) z dostarczonych zamówień zakupu
+    
+    Produkty bez dostaw w okresie dostają NaN.
+    """
+    dostawy = db.session.execute(
+        db.select(PozycjaZamowieniaZakupu.produkt_id, ZamowienieZakupu.data_zamowienia,
+                  ZamowienieZakupu.data_dostawy_rzeczywista)
+        .join(ZamowienieZakupu,
+              ZamowienieZakupu.id == PozycjaZamowieniaZakupu.zamowienie_zakupu_id)
+        .where(ZamowienieZakupu.status == StatusZamowieniaZakupu.DOSTARCZONE,
+               ZamowienieZakupu.data_zamowienia >= datetime.combine(data_od, datetime.min.time()),
+               ZamowienieZakupu.data_dostawy_rzeczywista.isnot(None))
+    ).all()
+    
+    produkt = np.fromiter((d[0] for d in dostawy), dtype=np.int64, count=len(dostawy))
+    czas = np.fromiter(((d[2] - d[1]) / timedelta(days=1) for d in dostawy), dtype=np.float64,
+                       count=len(dostawy))
+    indeks, znane = _pozycje(ids, produkt)
+    indeks, czas = indeks[znane], np.maximum(czas[znane], 0)
+    
+    liczba = np.bincount(indeks, minlength=len(ids))
+    srednia = np.full(len(ids), np.nan)
+    np.divide(np.bincount(indeks, weights=czas, minlength=len(ids)), liczba, out=srednia,
+              where=liczba > 0)
+    wariancja = np.full(len(ids), np.nan)
+    np.divide(np.bincount(indeks, weights=czas ** 2, minlength=len(ids)), liczba,
+              out=wariancja, where=liczba > 0)
+    
+    return srednia, np.sqrt(np.maximum(wariancja - srednia ** 2, 0))
+
+
+def prognozuj(historia, czas_dostawy, odchylenie_dostawy, poziom_obslugi, czas_domyslny,
+              min_dni):
+    """Popyt, zapas bezpieczeństwa i punkt zamówienia wszystkich produktów naraz
+    
+    Zapas bezpieczeństwa = z * sqrt(L * sigma_d^2 + d^2 * sigma_L^2), gdzie d i sigma_d
+    to średnia i odchylenie popytu dziennego, a L i sigma_L - czasu dostawy.
+    Produkty z historią krótszą niż min_dni są pomijane (zostaje stan minimalny).
+    """
+    dni = historia['dni_historii']
+    uwzglednione = dni >= max(min_dni, 1)
+    dni = dni[uwzglednione]
+    
+    popyt = historia['suma'][uwzglednione] / dni
+    odchylenie = np.sqrt(np.maximum(historia['suma_kwadratow'][uwzglednione] / dni
+                                    - popyt ** 2, 0))
+    # Bez dostaw w historii: domyślny czas, bez rozrzutu
+    znany = ~np.isnan(czas_dostawy[uwzglednione])
+    czas = np.where(znany, czas_dostawy[uwzglednione], czas_domyslny)
+    rozrzut = np.where(znany, odchylenie_dostawy[uwzglednione], 0)
+    
+    z = NormalDist().inv_cdf(poziom_obslugi)
+    zapas = np.ceil(z * np.sqrt(czas * odchylenie ** 2 + popyt ** 2 * rozrzut ** 2))
+    punkt = np.ceil(popyt * czas + zapas)
+    
+    return Prognoza(historia['ids'][uwzglednione], dni, popyt, odchylenie, czas, rozrzut,
+                    zapas.astype(np.int64), punkt.astype(np.int64))
+
+
+def zapisz(prognoza):
+    """Zastępuje zapisane prognozy i punkty zamówienia produktów (bez commitu)"""
+    teraz = datetime.utcnow()
+    db.session.execute(db.delete(PrognozaPopytu))
+    if len(prognoza.ids):
+        db.session.execute(db.insert(PrognozaPopytu), [
+            {'produkt_id': produkt_id, 'dni_historii': dni, 'popyt_dzienny': popyt,
+             'odchylenie_popytu': odchylenie, 'czas_dostawy': czas,
+             'odchylenie_dostawy': rozrzut, 'zapas_bezpieczenstwa': zapas,
+             'punkt_zamowienia': punkt, 'data_obliczenia': teraz}
+            for produkt_id, dni, popyt, odchylenie, czas, rozrzut, zapas, punkt
+            in zip(*(kolumna.tolist() for kolumna in prognoza))
+        ])
+    
+    # Produkty bez prognozy wracają do ręcznego stanu minimalnego
+    db.session.execute(
+        db.update(Produkt).values(punkt_zamowienia=db.select(PrognozaPopytu.punkt_zamowienia)
+                                  .where(PrognozaPopytu.produkt_id == Produkt.id)
+                                  .scalar_subquery()),
+        execution_options={'synchronize_session': False}
+    )
+    StanMagazynowy.odswiez_progi()
+
+
+def przelicz(data_do, dni, poziom_obslugi, czas_domyslny, min_dni):
+    """Prognoza z dni historii kończącej się data_do, zapisana w bazie (bez commitu)"""
+    data_od = data_do - timedelta(days=dni - 1)
+    historia = wczytaj_historie(data_od, data_do)
+    prognoza = prognozuj(historia, *czasy_dostaw(historia['ids'], data_od), poziom_obslugi,
+                         czas_domyslny, min_dni)
+    zapisz(prognoza)
+    return prognoza
@@ -0,0 +1,175 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from flask import Flask
+from app.models import db, ZadanieRaportu, StatusZadania
+from app.export import zapisz_plik
+
+# Zapas ponad limit czasu, po którym zadanie w toku uznajemy za porzucone
+# (proces roboczy zginął, zanim zapisał wynik)
+ZAPAS_LIMITU = 60
+
+# Aplikacja, katalog wyników i limit czasu procesu roboczego puli (z _inicjuj)
+_proces_roboczy = None
+
+
+class KolejkaRaportow:
+    """Liczy zlecone raporty w puli procesów, stan zadań trzyma w tabeli zadanie_raportu"""
+    
+    def __init__(self, app=None):
+        self.app = None
+        self._pula = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """Odczytuje konfigurację i rejestruje kolejkę w aplikacji"""
+        self.app = app
+        self.liczba_procesow = app.config['REPORT_JOB_WORKERS']
+        self.limit_czasu = app.config['REPORT_JOB_TIMEOUT']
+        self.katalog = os.path.join(app.instance_path, 'raporty')
+        app.extensions['kolejka_raportow'] = self
+        atexit.register(self.zatrzymaj)
+    
+    def sciezka(self, zadanie):
+        return plik_wyniku(self.katalog, zadanie.id)
+    
+    def zglos(self, raport, parametry, uzytkownik_id, nazwa_pliku):
+        """Zapisuje zadanie w bazie i przekazuje je do puli procesów"""
+        zadanie = ZadanieRaportu(raport=raport, parametry=parametry, uzytkownik_id=uzytkownik_id,
+                                 nazwa_pliku=nazwa_pliku, status=StatusZadania.OCZEKUJE)
+        db.session.add(zadanie)
+        db.session.commit()
+        
+        os.makedirs(self.katalog, exist_ok=True)
+        if self.liczba_procesow:
+            self._przekaz(zadanie.id)
+        else:
+            wykonaj(self.app, zadanie.id, self.katalog, self.limit_czasu)
+            db.session.refresh(zadanie)
+        return zadanie
+    
+    def _przekaz(self, zadanie_id):
+        """Przekazuje zadanie do puli, uruchamiając ją przy pierwszym zleceniu"""
+        with self._lock:
+            if self._pula is None:
+                konfiguracja = {k: v for k, v in self.app.config.items()
+                                if k.startswith('SQLALCHEMY_')}
+                # Procesy uruchamiane od zera - bez kopii wątków i połączeń serwera
+                self._pula = ProcessPoolExecutor(
+                    max_workers=self.liczba_procesow,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_inicjuj,
+                    initargs=(konfiguracja, self.app.instance_path, self.katalog,
+                              self.limit_czasu)
+                )
+                # Nowa pula podejmuje też zadania czekające z poprzedniego uruchomienia
+                identyfikatory = [i for (i,) in db.session.query(ZadanieRaportu.id).filter_by(
+                    status=StatusZadania.OCZEKUJE)]
+            else:
+                identyfikatory = [zadanie_id]
+            
+            for ident in identyfikatory:
+                self._pula.submit(_wykonaj, ident).add_done_callback(self._po_zadaniu)
+    
+    def _po_zadaniu(self, przyszlosc):
+        """Loguje awarię puli; kolejne zlecenie uruchomi nową"""
+        if przyszlosc.cancelled() or przyszlosc.exception() is None:
+            return
+        self.app.logger.error('Awaria puli zadań raportów: %r', przyszlosc.exception())
+        if isinstance(przyszlosc.exception(), BrokenProcessPool):
+            with self._lock:
+                self._pula = None
+    
+    def uporzadkuj(self):
+        """Oznacza jako przerwane zadania w toku dłużej niż limit czasu"""
+        granica = datetime.utcnow() - timedelta(seconds=self.limit_czasu + ZAPAS_LIMITU)
+        porzucone = ZadanieRaportu.query.filter(
+            ZadanieRaportu.status == StatusZadania.W_TOKU,
+            ZadanieRaportu.data_rozpoczecia < granica
+        ).update({
+            'status': StatusZadania.PRZERWANE,
+            'data_zakonczenia': datetime.utcnow(),
+            'blad': 'Proces roboczy nie zakończył zadania w limicie czasu'
+        }, synchronize_session=False)
+        if porzucone:
+            db.session.commit()
+    
+    def zatrzymaj(self):
+        """Zamyka pulę bez czekania na liczone raporty"""
+        if self._pula is not None:
+            self._pula.shutdown(wait=False, cancel_futures=True)
+            self._pula = None
+
+
+def plik_wyniku(katalog, zadanie_id):
+    """Plik wyniku zadania (CSV skompresowany gzipem)"""
+    return os.path.join(katalog, f'{zadanie_id}.csv.gz')
+
+
+def _inicjuj(konfiguracja, instance_path, katalog, limit_czasu):
+    """Przygotowuje proces roboczy: minimalna aplikacja z samym połączeniem do bazy"""
+    global _proces_roboczy
+    app = Flask('app', instance_path=instance_path)
+    app.config.update(konfiguracja)
+    db.init_app(app)
+    _proces_roboczy = (app, katalog, limit_czasu)
+
+
+def _wykonaj(zadanie_id):
+    app, katalog, limit_czasu = _proces_roboczy
+    wykonaj(app, zadanie_id, katalog, limit_czasu)
+
+
+def wykonaj(app, zadanie_id, katalog, limit_czasu):
+    """Liczy raport zadania do pliku i zapisuje w bazie wynik albo błąd"""
+    from app.routes.reports import EKSPORTY
+    
+    with app.app_context():
+        # Zadanie podejmuje tylko proces, któremu uda się zmienić jego stan
+        podjete = ZadanieRaportu.query.filter_by(
+            id=zadanie_id, status=StatusZadania.OCZEKUJE
+        ).update({'status': StatusZadania.W_TOKU, 'data_rozpoczecia': datetime.utcnow()},
+                 synchronize_session=False)
+        db.session.commit()
+        if not podjete:
+            return
+        
+        zadanie = db.session.get(ZadanieRaportu, zadanie_id)
+        termin = time.monotonic() + limit_czasu
+        
+        # Pojedyncze długie zapytanie przerywa czasomierz (sqlite3: interrupt, psycopg2: cancel)
+        polaczenie = db.session.connection().connection.dbapi_connection
+        przerwij = getattr(polaczenie, 'interrupt', None) or getattr(polaczenie, 'cancel', None)
+        czasomierz = threading.Timer(limit_czasu, przerwij) if przerwij else None
+        
+        try:
+            funkcja, _ = EKSPORTY[zadanie.raport]
+            _, naglowek, zapytanie = funkcja(zadanie.parametry)
+            if czasomierz:
+                czasomierz.start()
+            zadanie.liczba_wierszy = zapisz_plik(plik_wyniku(katalog, zadanie_id), naglowek,
+                                                 zapytanie, termin)
+            if czasomierz:
+                czasomierz.cancel()
+            zadanie.status = StatusZadania.GOTOWE
+        except Exception as e:
+            if czasomierz:
+                czasomierz.cancel()
+            db.session.rollback()
+            if time.monotonic() >= termin:
+                zadanie.status = StatusZadania.PRZERWANE
+                zadanie.blad = f'Przekroczono limit czasu ({limit_czasu} s)'
+            else:
+                app.logger.exception('Błąd zadania raportu %s', zadanie_id)
+                zadanie.status = StatusZadania.BLAD
+                zadanie.blad = str(e) or e.__class__.__name__
+        
+        zadanie.data_zakonczenia = datetime.utcnow()
+        db.session.commit()
@@ -0,0 +1,76 @@
+from flask import abort, current_app, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, configure_mappers, joinedload, selectinload
+from app.models import (db, Zamowienie, PozycjaZamowienia, ZamowienieZakupu,
+                        PozycjaZamowieniaZakupu, DokumentMagazynowy, PozycjaDokumentu,
+                        Faktura, Klient)
+
+# Relacje z backref (np. Zamowienie.klient) istnieją dopiero po konfiguracji mapperów
+configure_mappers()
+
+# Relacje czytane przez szablony stron szczegółów, ładowane razem z obiektem:
+# joinedload dla pojedynczych obiektów, selectinload dla list pozycji
+PROFILE = {
+    'zamowienie_klienta': (Zamowienie, (
+        joinedload(Zamowienie.klient),
+        joinedload(Zamowienie.faktura),
+        selectinload(Zamowienie.pozycje).joinedload(PozycjaZamowienia.produkt_rel),
+    )),
+    'zamowienie_zakupu': (ZamowienieZakupu, (
+        joinedload(ZamowienieZakupu.dostawca),
+        selectinload(ZamowienieZakupu.pozycje).joinedload(PozycjaZamowieniaZakupu.produkt_rel),
+    )),
+    'dokument_pz': (DokumentMagazynowy, (
+        joinedload(DokumentMagazynowy.dostawca_rel),
+        selectinload(DokumentMagazynowy.pozycje).joinedload(PozycjaDokumentu.produkt),
+    )),
+    'dokument_wz': (DokumentMagazynowy, (
+        joinedload(DokumentMagazynowy.zamowienie_rel),
+        selectinload(DokumentMagazynowy.pozycje).joinedload(PozycjaDokumentu.produkt),
+    )),
+    'faktura': (Faktura, (
+        joinedload(Faktura.klient),
+        joinedload(Faktura.zamowienie)
+        .selectinload(Zamowienie.pozycje).joinedload(PozycjaZamowienia.produkt_rel),
+    )),
+    'klient': (Klient, ()),
+}
+
+
+class LeniweLadowanie(Exception):
+    """Relacja doczytana pojedynczym zapytaniem mimo profilu ładowania"""
+    
+    def __init__(self, profil, sciezka):
+        super().__init__(f'Profil "{profil}" nie ładuje relacji {sciezka} - dodaj ją do PROFILE')
+        self.profil = profil
+        self.sciezka = sciezka
+
+
+def wczytaj_lub_404(profil, ident):
+    """Wczytuje obiekt z relacjami z profilu albo kończy żądanie błędem 404"""
+    model, opcje = PROFILE[profil]
+    obiekt = db.session.get(model, ident, options=opcje)
+    if obiekt is None:
+        abort(404)
+    
+    g.profil_ladowania = profil
+    return obiekt
+
+
+def _pilnuj_profilu(stan):
+    """Zgłasza wyjątek, gdy w widoku z profilem relacja ładuje się leniwie"""
+    if not stan.is_select or stan.lazy_loaded_from is None or not has_request_context():
+        return
+    # Nasłuch jest globalny dla Session - liczy się ustawienie aplikacji żądania
+    if not current_app.config['RAISE_ON_LAZY_LOAD']:
+        return
+    profil = g.get('profil_ladowania')
+    if profil is not None:
+        raise LeniweLadowanie(profil, stan.loader_strategy_path.natural_path[-1])
+
+
+def init_app(app):
+    """W trybie RAISE_ON_LAZY_LOAD pilnuje, by strony szczegółów nie doczytywały relacji"""
+    if app.config['RAISE_ON_LAZY_LOAD'] and not event.contains(Session, 'do_orm_execute',
+                                                               _pilnuj_profilu):
+        event.listen(Session, 'do_orm_execute', _pilnuj_profilu)
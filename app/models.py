@@ -1,7 +1,12 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Enum
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
 import enum
 
 db = SQLAlchemy()
@@ -30,16 +35,12 @@ class TypDokumentu(enum.Enum):
     PRZYJECIE = "PZ"
     WYDANIE = "WZ"
 
-# Tabela pośrednia dla związku wiele-do-wielu
-pozycje_zamowienia = db.Table('pozycje_zamowienia',
-    db.Column('zamowienie_id', db.Integer, db.ForeignKey('zamowienie.id'), primary_key=True),
-    db.Column('pozycja_id', db.Integer, db.ForeignKey('pozycja_zamowienia.id'), primary_key=True)
-)
-
-pozycje_zamowienia_zakupu = db.Table('pozycje_zamowienia_zakupu',
-    db.Column('zamowienie_zakupu_id', db.Integer, db.ForeignKey('zamowienie_zakupu.id'), primary_key=True),
-    db.Column('pozycja_id', db.Integer, db.ForeignKey('pozycja_zamowienia_zakupu.id'), primary_key=True)
-)
+class StatusZadania(enum.Enum):
+    OCZEKUJE = "Oczekuje"
+    W_TOKU = "W toku"
+    GOTOWE = "Gotowe"
+    BLAD = "Błąd"
+    PRZERWANE = "Przerwane"
 
 # Klasa Uzytkownik
 class Uzytkownik(db.Model):
@@ -75,19 +76,37 @@ class Produkt(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     kod = db.Column(db.String(50), unique=True, nullable=False)
-    nazwa = db.Column(db.String(200), nullable=False)
+    nazwa = db.Column(db.String(200), nullable=False, index=True)
     kategoria = db.Column(db.String(100))
     jednostka = db.Column(db.String(20), default='szt')
     cena_jednostkowa = db.Column(db.Numeric(10, 2), nullable=False)
     stan_minimalny = db.Column(db.Integer, default=10)
+    # Punkt ponownego zamówienia z prognozy popytu (app/forecast.py), None = stan_minimalny
+    punkt_zamowienia = db.Column(db.Integer)
     opis = db.Column(db.Text)
     aktywny = db.Column(db.Boolean, default=True)
     data_utworzenia = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Filtr kategorii i listy aktywnych produktów sortowane po nazwie
+        db.Index('ix_produkt_kategoria_nazwa', 'kategoria', 'nazwa'),
+        db.Index('ix_produkt_aktywny_nazwa', 'aktywny', 'nazwa'),
+    )
+    
     # Relacje
     stan_magazynowy = db.relationship('StanMagazynowy', backref='produkt', uselist=False)
     pozycje_dokumentow = db.relationship('PozycjaDokumentu', backref='produkt', lazy=True)
     
+    @property
+    def prog_niskiego_stanu(self):
+        """Stan, od którego produkt uznajemy za kończący się"""
+        return self.stan_minimalny if self.punkt_zamowienia is None else self.punkt_zamowienia
+    
+    @classmethod
+    def wyrazenie_progu(cls):
+        """Próg niskiego stanu jako wyrażenie SQL"""
+        return db.func.coalesce(cls.punkt_zamowienia, cls.stan_minimalny)
+    
     def __repr__(self):
         return f'<Produkt {self.kod} - {self.nazwa}>'
 
@@ -101,6 +120,14 @@ class StanMagazynowy(db.Model):
     ilosc_zarezerwowana = db.Column(db.Integer, default=0)
     lokalizacja = db.Column(db.String(50))
     ostatnia_aktualizacja = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Kopia Produkt.prog_niskiego_stanu (NULL dla wycofanych produktów) - warunek
+    # niskiego stanu nie wymaga złączenia, więc obsługuje go indeks niedoboru
+    prog_niskiego_stanu = db.Column(db.Integer)
+    
+    __table_args__ = (
+        # Indeks wyrażeniowy niedoboru - niskie stany bez przeglądania całej tabeli
+        db.Index('ix_stan_magazynowy_niedobor', ilosc_dostepna - prog_niskiego_stanu),
+    )
     
     def aktualizuj_stan(self, ilosc, operacja='dodaj'):
         """Aktualizuje stan magazynowy"""
@@ -120,7 +147,40 @@ class StanMagazynowy(db.Model):
     
     def czy_niski_stan(self):
         """Sprawdza czy stan jest niski"""
-        return self.ilosc_dostepna <= self.produkt.stan_minimalny
+        return self.ilosc_dostepna <= self.produkt.prog_niskiego_stanu
+    
+    def odswiez_prog(self):
+        """Przepisuje próg niskiego stanu z produktu po jego edycji"""
+        self.prog_niskiego_stanu = self.produkt.prog_niskiego_stanu if self.produkt.aktywny else None
+    
+    @classmethod
+    def warunek_niskiego_stanu(cls):
+        """Warunek SQL niskiego stanu aktywnego produktu (wyrażenie indeksu niedoboru)"""
+        return cls.ilosc_dostepna - cls.prog_niskiego_stanu <= 0
+    
+    @staticmethod
+    def wyrazenie_progu():
+        """Wartość kolumny prog_niskiego_stanu liczona z wiersza produktu (SQL)"""
+        return db.case((Produkt.aktywny == True, Produkt.wyrazenie_progu()))
+    
+    @classmethod
+    def odswiez_progi(cls):
+        """Przepisuje progi produktów do stanów, w których się zmieniły (bez commitu)"""
+        prog = db.select(
+            cls.wyrazenie_progu()
+        ).where(Produkt.id == cls.produkt_id).scalar_subquery()
+        db.session.execute(
+            db.update(cls).values(prog_niskiego_stanu=prog)
+            .where(cls.prog_niskiego_stanu.is_distinct_from(prog)),
+            execution_options={'synchronize_session': 'fetch'}
+        )
+    
+    @classmethod
+    def niskie_stany(cls):
+        """Zapytanie o stany aktywnych produktów nie większe niż próg niskiego stanu"""
+        return cls.query.join(cls.produkt).options(
+            contains_eager(cls.produkt)
+        ).filter(cls.warunek_niskiego_stanu())
     
     def __repr__(self):
         return f'<StanMagazynowy {self.produkt.kod}: {self.ilosc_dostepna}>'
@@ -130,7 +190,7 @@ class Klient(db.Model):
     __tablename__ = 'klient'
     
     id = db.Column(db.Integer, primary_key=True)
-    nazwa = db.Column(db.String(200), nullable=False)
+    nazwa = db.Column(db.String(200), nullable=False, index=True)
     nip = db.Column(db.String(15), unique=True)
     adres = db.Column(db.String(200))
     kod_pocztowy = db.Column(db.String(10))
@@ -173,25 +233,31 @@ class Zamowienie(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     numer = db.Column(db.String(50), unique=True, nullable=False)
     klient_id = db.Column(db.Integer, db.ForeignKey('klient.id'), nullable=False)
-    data_zamowienia = db.Column(db.DateTime, default=datetime.utcnow)
+    data_zamowienia = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     data_realizacji = db.Column(db.DateTime)
     status = db.Column(Enum(StatusZamowienia), default=StatusZamowienia.NOWE)
     wartosc_netto = db.Column(db.Numeric(10, 2), default=0)
     wartosc_brutto = db.Column(db.Numeric(10, 2), default=0)
     uwagi = db.Column(db.Text)
     
+    __table_args__ = (
+        # Lista zamówień filtrowana po statusie i sortowana od najnowszych
+        db.Index('ix_zamowienie_status_data', 'status', 'data_zamowienia'),
+    )
+    
     # Relacje
-    pozycje = db.relationship('PozycjaZamowienia', secondary=pozycje_zamowienia, 
-                             backref=db.backref('zamowienia', lazy=True))
+    pozycje = db.relationship('PozycjaZamowienia', backref='zamowienie', lazy=True)
     faktura = db.relationship('Faktura', backref='zamowienie', uselist=False)
     
-    def oblicz_wartosc(self):
-        """Oblicza wartość zamówienia na podstawie pozycji"""
-        from decimal import Decimal
-        netto = sum(p.wartosc_netto for p in self.pozycje)
+    def oblicz_wartosc(self, pozycje=None):
+        """Oblicza wartość zamówienia na podstawie pozycji (lub podanej listy pozycji)"""
+        from decimal import Decimal, ROUND_HALF_UP
+        netto = sum(p.wartosc_netto for p in (self.pozycje if pozycje is None else pozycje))
         self.wartosc_netto = netto
-        self.wartosc_brutto = netto * Decimal('1.23')
-        
+        self.wartosc_brutto = (netto * Decimal('1.23')).quantize(
+            Decimal('0.01'), rounding=ROUND_HALF_UP
+        )
+    
     def zmien_status(self, nowy_status):
         """Zmienia status zamówienia"""
         self.status = nowy_status
@@ -206,6 +272,7 @@ class PozycjaZamowienia(db.Model):
     __tablename__ = 'pozycja_zamowienia'
     
     id = db.Column(db.Integer, primary_key=True)
+    zamowienie_id = db.Column(db.Integer, db.ForeignKey('zamowienie.id'), nullable=False, index=True)
     produkt_id = db.Column(db.Integer, db.ForeignKey('produkt.id'), nullable=False)
     ilosc = db.Column(db.Integer, nullable=False)
     cena_jednostkowa = db.Column(db.Numeric(10, 2), nullable=False)
@@ -222,6 +289,93 @@ class PozycjaZamowienia(db.Model):
     def __repr__(self):
         return f'<PozycjaZamowienia {self.id}>'
 
+# Klasa SprzedazDzienna - dzienne zestawienie sprzedaży produktów
+class SprzedazDzienna(db.Model):
+    __tablename__ = 'sprzedaz_dzienna'
+    
+    dzien = db.Column(db.Date, primary_key=True)
+    produkt_id = db.Column(db.Integer, db.ForeignKey('produkt.id'), primary_key=True)
+    ilosc = db.Column(db.Integer, nullable=False, default=0)
+    wartosc_netto = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    
+    @staticmethod
+    def dodaj_sprzedaz(dzien, pozycje):
+        """Dolicza pozycje zamówienia do zestawienia dziennego (bez commitu)"""
+        sumy = {}
+        for pozycja in pozycje:
+            ilosc, wartosc = sumy.get(pozycja.produkt_id, (0, 0))
+            sumy[pozycja.produkt_id] = (ilosc + pozycja.ilosc,
+                                        wartosc + (pozycja.wartosc_netto or 0))
+        
+        if not sumy:
+            return
+        
+        # Jedno INSERT ... ON CONFLICT DO UPDATE - równoległe zamówienia z tego samego
+        # dnia i produktu nie tracą sumy ani nie trafiają na duplikat klucza
+        insert = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}[
+            db.session.get_bind().dialect.name]
+        wstaw = insert(SprzedazDzienna).values([
+            {'dzien': dzien, 'produkt_id': produkt_id, 'ilosc': ilosc, 'wartosc_netto': wartosc}
+            for produkt_id, (ilosc, wartosc) in sumy.items()
+        ])
+        db.session.execute(wstaw.on_conflict_do_update(
+            index_elements=[SprzedazDzienna.dzien, SprzedazDzienna.produkt_id],
+            set_={
+                'ilosc': SprzedazDzienna.ilosc + wstaw.excluded.ilosc,
+                'wartosc_netto': SprzedazDzienna.wartosc_netto + wstaw.excluded.wartosc_netto,
+            }
+        ))
+        SprzedazDzienna._zmienione_dni([dzien])
+    
+    @staticmethod
+    def _zmienione_dni(dni=None):
+        """Zapamiętuje w sesji dni zmienione zapisem Core (None - całe zestawienie)
+        
+        Zdarzenia mapera nie widzą INSERT-ów Core, więc raporty z bufora
+        (app/cache.py) unieważniane są po commicie na podstawie tego wpisu.
+        """
+        if dni is None:
+            db.session.info['raporty_wszystkie'] = True
+        else:
+            db.session.info.setdefault('okresy_raportow', set()).update(dni)
+    
+    @staticmethod
+    def przebuduj(data_od=None, data_do=None):
+        """Odbudowuje zestawienie z pozycji zamówień (bez commitu)"""
+        dzien = db.func.date(Zamowienie.data_zamowienia)
+        
+        usun = db.delete(SprzedazDzienna)
+        zrodlo = db.select(
+            dzien,
+            PozycjaZamowienia.produkt_id,
+            db.func.sum(PozycjaZamowienia.ilosc),
+            db.func.coalesce(db.func.sum(db.func.round(PozycjaZamowienia.wartosc_netto, 2)), 0)
+        ).select_from(Zamowienie).join(
+            PozycjaZamowienia, PozycjaZamowienia.zamowienie_id == Zamowienie.id
+        ).group_by(dzien, PozycjaZamowienia.produkt_id)
+        
+        if data_od:
+            usun = usun.where(SprzedazDzienna.dzien >= data_od)
+            zrodlo = zrodlo.where(Zamowienie.data_zamowienia >= datetime.combine(data_od, time.min))
+        if data_do:
+            usun = usun.where(SprzedazDzienna.dzien <= data_do)
+            zrodlo = zrodlo.where(Zamowienie.data_zamowienia <= datetime.combine(data_do, time.max))
+        
+        db.session.execute(usun)
+        wynik = db.session.execute(
+            db.insert(SprzedazDzienna).from_select(
+                ['dzien', 'produkt_id', 'ilosc', 'wartosc_netto'], zrodlo
+            )
+        )
+        SprzedazDzienna._zmienione_dni(
+            [data_od + timedelta(days=i) for i in range((data_do - data_od).days + 1)]
+            if data_od and data_do else None
+        )
+        return wynik.rowcount
+    
+    def __repr__(self):
+        return f'<SprzedazDzienna {self.dzien} {self.produkt_id}: {self.ilosc}>'
+
 # Klasa ZamowienieZakupu
 class ZamowienieZakupu(db.Model):
     __tablename__ = 'zamowienie_zakupu'
@@ -229,7 +383,7 @@ class ZamowienieZakupu(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     numer = db.Column(db.String(50), unique=True, nullable=False)
     dostawca_id = db.Column(db.Integer, db.ForeignKey('dostawca.id'), nullable=False)
-    data_zamowienia = db.Column(db.DateTime, default=datetime.utcnow)
+    data_zamowienia = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     data_dostawy_planowana = db.Column(db.DateTime)
     data_dostawy_rzeczywista = db.Column(db.DateTime)
     status = db.Column(Enum(StatusZamowieniaZakupu), default=StatusZamowieniaZakupu.NOWE)
@@ -237,12 +391,13 @@ class ZamowienieZakupu(db.Model):
     uwagi = db.Column(db.Text)
     
     # Relacje
-    pozycje = db.relationship('PozycjaZamowieniaZakupu', secondary=pozycje_zamowienia_zakupu,
-                             backref=db.backref('zamowienia_zakupu', lazy=True))
+    pozycje = db.relationship('PozycjaZamowieniaZakupu', backref='zamowienie_zakupu', lazy=True)
     
-    def oblicz_wartosc(self):
-        """Oblicza wartość zamówienia zakupu"""
-        self.wartosc_netto = sum(p.wartosc_netto for p in self.pozycje)
+    def oblicz_wartosc(self, pozycje=None):
+        """Oblicza wartość zamówienia zakupu (z pozycji lub podanej listy pozycji)"""
+        self.wartosc_netto = sum(
+            p.wartosc_netto for p in (self.pozycje if pozycje is None else pozycje)
+        )
     
     def zmien_status(self, nowy_status):
         """Zmienia status zamówienia zakupu"""
@@ -258,6 +413,8 @@ class PozycjaZamowieniaZakupu(db.Model):
     __tablename__ = 'pozycja_zamowienia_zakupu'
     
     id = db.Column(db.Integer, primary_key=True)
+    zamowienie_zakupu_id = db.Column(db.Integer, db.ForeignKey('zamowienie_zakupu.id'),
+                                     nullable=False, index=True)
     produkt_id = db.Column(db.Integer, db.ForeignKey('produkt.id'), nullable=False)
     ilosc = db.Column(db.Integer, nullable=False)
     cena_jednostkowa = db.Column(db.Numeric(10, 2), nullable=False)
@@ -280,11 +437,16 @@ class DokumentMagazynowy(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     numer = db.Column(db.String(50), unique=True, nullable=False)
     typ = db.Column(Enum(TypDokumentu), nullable=False)
-    data_wystawienia = db.Column(db.DateTime, default=datetime.utcnow)
+    data_wystawienia = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     dostawca_id = db.Column(db.Integer, db.ForeignKey('dostawca.id'))
     zamowienie_id = db.Column(db.Integer, db.ForeignKey('zamowienie.id'))
     uwagi = db.Column(db.Text)
     
+    __table_args__ = (
+        # Lista i raport dokumentów filtrowane po typie w zakresie dat
+        db.Index('ix_dokument_magazynowy_typ_data', 'typ', 'data_wystawienia'),
+    )
+    
     # Relacje
     pozycje = db.relationship('PozycjaDokumentu', backref='dokument', lazy=True)
     dostawca_rel = db.relationship('Dostawca', backref='dokumenty')
@@ -298,13 +460,161 @@ class PozycjaDokumentu(db.Model):
     __tablename__ = 'pozycja_dokumentu'
     
     id = db.Column(db.Integer, primary_key=True)
-    dokument_id = db.Column(db.Integer, db.ForeignKey('dokument_magazynowy.id'), nullable=False)
+    dokument_id = db.Column(db.Integer, db.ForeignKey('dokument_magazynowy.id'), nullable=False,
+                            index=True)
     produkt_id = db.Column(db.Integer, db.ForeignKey('produkt.id'), nullable=False)
     ilosc = db.Column(db.Integer, nullable=False)
     
     def __repr__(self):
         return f'<PozycjaDokumentu {self.id}>'
 
+# Klasa RuchMagazynowy - księga ruchów magazynowych, wiersze tylko dopisywane
+class RuchMagazynowy(db.Model):
+    __tablename__ = 'ruch_magazynowy'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    produkt_id = db.Column(db.Integer, db.ForeignKey('produkt.id'), nullable=False)
+    data = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Przyjęcie ze znakiem +, wydanie ze znakiem -
+    zmiana = db.Column(db.Integer, nullable=False)
+    # Brak dokumentu oznacza bilans otwarcia
+    dokument_id = db.Column(db.Integer, db.ForeignKey('dokument_magazynowy.id'))
+    
+    __table_args__ = (
+        # Historia produktu oraz ruchy z okresu między migawkami
+        db.Index('ix_ruch_magazynowy_produkt_data', 'produkt_id', 'data'),
+        db.Index('ix_ruch_magazynowy_data', 'data'),
+    )
+    
+    @staticmethod
+    def przebuduj():
+        """Odbudowuje księgę z pozycji dokumentów i bilansu otwarcia (bez commitu)
+        
+        Bilans otwarcia to różnica między bieżącym stanem a sumą dokumentów,
+        datowana na pierwszy dokument - po przebudowie księga sumuje się
+        do StanMagazynowy. Migawki są usuwane, bo liczono je ze starej księgi.
+        """
+        db.session.execute(db.delete(MigawkaStanu))
+        db.session.execute(db.delete(RuchMagazynowy))
+        
+        zmiana = db.case(
+            (DokumentMagazynowy.typ == TypDokumentu.PRZYJECIE, PozycjaDokumentu.ilosc),
+            else_=-PozycjaDokumentu.ilosc
+        )
+        db.session.execute(
+            db.insert(RuchMagazynowy).from_select(
+                ['produkt_id', 'data', 'zmiana', 'dokument_id'],
+                db.select(
+                    PozycjaDokumentu.produkt_id, DokumentMagazynowy.data_wystawienia,
+                    zmiana, DokumentMagazynowy.id
+                ).join(
+                    DokumentMagazynowy, DokumentMagazynowy.id == PozycjaDokumentu.dokument_id
+                ).order_by(DokumentMagazynowy.data_wystawienia, PozycjaDokumentu.id)
+            )
+        )
+        
+        poczatek = db.session.query(db.func.min(RuchMagazynowy.data)).scalar() or datetime.utcnow()
+        sumy = db.select(
+            RuchMagazynowy.produkt_id, db.func.sum(RuchMagazynowy.zmiana).label('suma')
+        ).group_by(RuchMagazynowy.produkt_id).subquery()
+        bilans = StanMagazynowy.ilosc_dostepna - db.func.coalesce(sumy.c.suma, 0)
+        wynik = db.session.execute(
+            db.insert(RuchMagazynowy).from_select(
+                ['produkt_id', 'data', 'zmiana'],
+                db.select(
+                    StanMagazynowy.produkt_id, db.literal(poczatek, db.DateTime), bilans
+                ).outerjoin(
+                    sumy, sumy.c.produkt_id == StanMagazynowy.produkt_id
+                ).where(bilans != 0)
+            )
+        )
+        return wynik.rowcount
+    
+    def __repr__(self):
+        return f'<RuchMagazynowy {self.produkt_id} {self.data}: {self.zmiana:+d}>'
+
+# Klasa MigawkaStanu - stany produktów na koniec dnia policzone z księgi ruchów
+class MigawkaStanu(db.Model):
+    __tablename__ = 'migawka_stanu'
+    
+    dzien = db.Column(db.Date, primary_key=True)
+    produkt_id = db.Column(db.Integer, db.ForeignKey('produkt.id'), primary_key=True)
+    ilosc = db.Column(db.Integer, nullable=False)
+    
+    @staticmethod
+    def zapytanie_stanow(dzien, produkt_ids=None):
+        """Zapytanie (produkt_id, ilosc) o stany na koniec dnia
+        
+        Czyta najbliższą migawkę z tego dnia lub wcześniejszą i dolicza tylko
+        ruchy zapisane po niej - bez przeglądania całej księgi.
+        """
+        migawka = db.session.query(db.func.max(MigawkaStanu.dzien)).filter(
+            MigawkaStanu.dzien <= dzien
+        ).scalar()
+        
+        ruchy = db.select(RuchMagazynowy.produkt_id, RuchMagazynowy.zmiana.label('ilosc')).where(
+            RuchMagazynowy.data < datetime.combine(dzien + timedelta(days=1), time.min)
+        )
+        stany = db.select(MigawkaStanu.produkt_id, MigawkaStanu.ilosc).where(
+            MigawkaStanu.dzien == migawka
+        )
+        if migawka is not None:
+            ruchy = ruchy.where(
+                RuchMagazynowy.data >= datetime.combine(migawka + timedelta(days=1), time.min)
+            )
+        if produkt_ids is not None:
+            ruchy = ruchy.where(RuchMagazynowy.produkt_id.in_(produkt_ids))
+            stany = stany.where(MigawkaStanu.produkt_id.in_(produkt_ids))
+        
+        skladniki = [ruchy, stany] if migawka is not None else [ruchy]
+        razem = db.union_all(*skladniki).subquery()
+        return db.select(
+            razem.c.produkt_id, db.func.sum(razem.c.ilosc).label('ilosc')
+        ).group_by(razem.c.produkt_id)
+    
+    @staticmethod
+    def stany_na_dzien(dzien, produkt_ids=None):
+        """Zwraca stany produktów na koniec dnia (produkt_id -> ilosc)"""
+        return dict(db.session.execute(MigawkaStanu.zapytanie_stanow(dzien, produkt_ids)).all())
+    
+    @staticmethod
+    def utworz(dzien):
+        """Zapisuje migawkę stanów wszystkich produktów na koniec dnia (bez commitu)"""
+        db.session.execute(db.delete(MigawkaStanu).where(MigawkaStanu.dzien == dzien))
+        stany = MigawkaStanu.zapytanie_stanow(dzien).subquery()
+        wynik = db.session.execute(
+            db.insert(MigawkaStanu).from_select(
+                ['dzien', 'produkt_id', 'ilosc'],
+                db.select(db.literal(dzien, db.Date), stany.c.produkt_id, stany.c.ilosc)
+            )
+        )
+        return wynik.rowcount
+    
+    def __repr__(self):
+        return f'<MigawkaStanu {self.dzien} {self.produkt_id}: {self.ilosc}>'
+
+# Klasa PrognozaPopytu - wynik nocnej prognozy popytu i punktu zamówienia produktu
+class PrognozaPopytu(db.Model):
+    __tablename__ = 'prognoza_popytu'
+    
+    produkt_id = db.Column(db.Integer, db.ForeignKey('produkt.id'), primary_key=True)
+    # Średni dzienny popyt i jego odchylenie standardowe w oknie historii
+    popyt_dzienny = db.Column(db.Float, nullable=False)
+    odchylenie_popytu = db.Column(db.Float, nullable=False)
+    # Czas dostawy w dniach (średnia z dostarczonych zamówień zakupu lub domyślny)
+    czas_dostawy = db.Column(db.Float, nullable=False)
+    odchylenie_dostawy = db.Column(db.Float, nullable=False)
+    zapas_bezpieczenstwa = db.Column(db.Integer, nullable=False)
+    punkt_zamowienia = db.Column(db.Integer, nullable=False)
+    # Liczba dni historii, z której policzono popyt
+    dni_historii = db.Column(db.Integer, nullable=False)
+    data_obliczenia = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    produkt = db.relationship('Produkt', backref=db.backref('prognoza', uselist=False))
+    
+    def __repr__(self):
+        return f'<PrognozaPopytu {self.produkt_id}: {self.punkt_zamowienia}>'
+
 # Klasa Faktura
 class Faktura(db.Model):
     __tablename__ = 'faktura'
@@ -312,8 +622,8 @@ class Faktura(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     numer = db.Column(db.String(50), unique=True, nullable=False)
     klient_id = db.Column(db.Integer, db.ForeignKey('klient.id'), nullable=False)
-    zamowienie_id = db.Column(db.Integer, db.ForeignKey('zamowienie.id'), nullable=False)
-    data_wystawienia = db.Column(db.DateTime, default=datetime.utcnow)
+    zamowienie_id = db.Column(db.Integer, db.ForeignKey('zamowienie.id'), nullable=False, index=True)
+    data_wystawienia = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     data_sprzedazy = db.Column(db.DateTime, default=datetime.utcnow)
     termin_platnosci = db.Column(db.DateTime)
     wartosc_netto = db.Column(db.Numeric(10, 2), nullable=False)
@@ -323,14 +633,7 @@ class Faktura(db.Model):
     
     def generuj_numer(self):
         """Generuje numer faktury w formacie FV/YYYY/MM/NNNN"""
-        rok = datetime.now().year
-        miesiac = datetime.now().month
-        # Zlicz faktury w tym miesiącu
-        liczba = Faktura.query.filter(
-            db.extract('year', Faktura.data_wystawienia) == rok,
-            db.extract('month', Faktura.data_wystawienia) == miesiac
-        ).count() + 1
-        self.numer = f"FV/{rok}/{miesiac:02d}/{liczba:04d}"
+        self.numer = LicznikDokumentow.generuj_numer('FV')
     
     def __repr__(self):
         return f'<Faktura {self.numer}>'
@@ -343,12 +646,30 @@ class Log(db.Model):
     uzytkownik_id = db.Column(db.Integer, db.ForeignKey('uzytkownik.id'))
     akcja = db.Column(db.String(200), nullable=False)
     opis = db.Column(db.Text)
-    data = db.Column(db.DateTime, default=datetime.utcnow)
+    data = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     adres_ip = db.Column(db.String(50))
     
+    __table_args__ = (
+        # Historia działań użytkownika od najnowszych
+        db.Index('ix_log_uzytkownik_data', 'uzytkownik_id', 'data'),
+    )
+    
     @staticmethod
     def dodaj_log(uzytkownik_id, akcja, opis=None, adres_ip=None):
         """Dodaje wpis do logu"""
+        dziennik = current_app.extensions.get('dziennik_zdarzen') if has_app_context() else None
+        
+        # Zapis w tle - bez dodatkowego commitu w żądaniu
+        if dziennik is not None and dziennik.asynchronicznie:
+            dziennik.dodaj({
+                'uzytkownik_id': uzytkownik_id,
+                'akcja': akcja,
+                'opis': opis,
+                'data': datetime.utcnow(),
+                'adres_ip': adres_ip
+            })
+            return
+        
         log = Log(
             uzytkownik_id=uzytkownik_id,
             akcja=akcja,
@@ -359,4 +680,90 @@ class Log(db.Model):
         db.session.commit()
     
     def __repr__(self):
-        return f'<Log {self.akcja} - {self.data}>'
\ No newline at end of file
+        return f'<Log {self.akcja} - {self.data}>'
+
+# Klasa LicznikDokumentow - liczniki numeracji dokumentów
+class LicznikDokumentow(db.Model):
+    __tablename__ = 'licznik_dokumentow'
+    
+    seria = db.Column(db.String(10), primary_key=True)
+    okres = db.Column(db.String(10), primary_key=True)
+    wartosc = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Seria: (format okresu, wzór numeru, model dokumentu)
+    SERIE = {
+        'PZ': ('%Y', 'PZ/{okres}/{numer:05d}', DokumentMagazynowy),
+        'WZ': ('%Y', 'WZ/{okres}/{numer:05d}', DokumentMagazynowy),
+        'ZAM': ('%Y', 'ZAM/{okres}/{numer:05d}', Zamowienie),
+        'ZAK': ('%Y', 'ZAK/{okres}/{numer:05d}', ZamowienieZakupu),
+        'FV': ('%Y/%m', 'FV/{okres}/{numer:04d}', Faktura),
+    }
+    
+    @staticmethod
+    def generuj_numer(seria, data=None):
+        """Zwraca kolejny numer dokumentu w serii (licznik w bieżącej transakcji)"""
+        format_okresu, wzor, model = LicznikDokumentow.SERIE[seria]
+        okres = (data or datetime.now()).strftime(format_okresu)
+        
+        while True:
+            wartosc = db.session.execute(
+                db.update(LicznikDokumentow).where(
+                    LicznikDokumentow.seria == seria,
+                    LicznikDokumentow.okres == okres
+                ).values(
+                    wartosc=LicznikDokumentow.wartosc + 1
+                ).returning(LicznikDokumentow.wartosc),
+                execution_options={'synchronize_session': False}
+            ).scalar()
+            
+            if wartosc is not None:
+                return wzor.format(okres=okres, numer=wartosc)
+            
+            # Pierwszy numer w okresie - licznik zaczyna od najwyższego istniejącego numeru
+            # (porównanie liczbowe: tekstowo 'PZ/2026/99999' > 'PZ/2026/100000')
+            prefiks = wzor.split('{numer')[0].format(okres=okres)
+            poczatek = db.session.query(db.func.max(
+                db.cast(db.func.substr(model.numer, len(prefiks) + 1), db.Integer)
+            )).filter(
+                model.numer.like(prefiks + '%')
+            ).scalar() or 0
+            
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(LicznikDokumentow).values(
+                        seria=seria, okres=okres, wartosc=poczatek
+                    ))
+            except IntegrityError:
+                # Licznik utworzył równolegle inny proces - ponów inkrementację
+                pass
+    
+    def __repr__(self):
+        return f'<LicznikDokumentow {self.seria} {self.okres}: {self.wartosc}>'
+
+# Klasa ZadanieRaportu - raporty liczone w tle (app/jobs.py)
+class ZadanieRaportu(db.Model):
+    __tablename__ = 'zadanie_raportu'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    raport = db.Column(db.String(50), nullable=False)
+    parametry = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(Enum(StatusZadania), nullable=False, default=StatusZadania.OCZEKUJE)
+    uzytkownik_id = db.Column(db.Integer, db.ForeignKey('uzytkownik.id'), nullable=False)
+    data_utworzenia = db.Column(db.DateTime, default=datetime.utcnow)
+    data_rozpoczecia = db.Column(db.DateTime)
+    data_zakonczenia = db.Column(db.DateTime)
+    nazwa_pliku = db.Column(db.String(200))
+    liczba_wierszy = db.Column(db.Integer)
+    blad = db.Column(db.Text)
+    
+    __table_args__ = (
+        # Lista zadań użytkownika od najnowszych
+        db.Index('ix_zadanie_raportu_uzytkownik_data', 'uzytkownik_id', 'data_utworzenia'),
+    )
+    
+    @property
+    def zakonczone(self):
+        return self.status in (StatusZadania.GOTOWE, StatusZadania.BLAD, StatusZadania.PRZERWANE)
+    
+    def __repr__(self):
+        return f'<ZadanieRaportu {self.id} {self.raport}: {self.status.name}>'
@@ -0,0 +1,138 @@
+import base64
+import json
+import math
+from datetime import datetime
+from flask import request, current_app
+from app.cache import liczebnosci_list
+from app.models import db
+
+# Parametry adresu niebędące filtrami listy
+PARAMETRY_STRONY = ('po', 'przed', 'page')
+
+
+class Strona:
+    """Strona wyników listy z parametrami adresów sąsiedniej strony"""
+    
+    def __init__(self, items, page, per_page, total, poprzednia=None, nastepna=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        # Parametry url_for poprzedniej/następnej strony lub None, gdy jej nie ma
+        self.poprzednia = poprzednia
+        self.nastepna = nastepna
+    
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page))
+    
+    @property
+    def has_prev(self):
+        return self.poprzednia is not None
+    
+    @property
+    def has_next(self):
+        return self.nastepna is not None
+
+
+def _zakoduj(page, wartosci):
+    """Kursor: numer strony i wartości kolumn sortowania granicznego wiersza"""
+    dane = [page] + [w.isoformat() if isinstance(w, datetime) else w for w in wartosci]
+    return base64.urlsafe_b64encode(json.dumps(dane).encode()).decode().rstrip('=')
+
+
+def _odkoduj(kursor, kolumny):
+    """Zwraca (numer strony, wartości kolumn) lub None dla niepoprawnego kursora
+    
+    Kursor przychodzi z adresu, więc po odkodowaniu musi być listą: numer strony
+    i dokładnie tyle wartości prostych (tekst, liczba), ile jest kolumn sortowania.
+    """
+    try:
+        dane = json.loads(base64.urlsafe_b64decode(kursor + '=' * (-len(kursor) % 4)))
+        if not isinstance(dane, list) or not dane:
+            return None
+        page, wartosci = dane[0], dane[1:]
+        if type(page) is not int or page < 1 or len(wartosci) != len(kolumny):
+            return None
+        if not all(type(w) in (str, int, float) for w in wartosci):
+            return None
+        return page, tuple(
+            datetime.fromisoformat(w) if isinstance(k.type, db.DateTime) else w
+            for k, w in zip(kolumny, wartosci)
+        )
+    except (ValueError, TypeError, KeyError, IndexError):
+        return None
+
+
+def _liczba_wierszy(query):
+    """Liczba wierszy listy z bufora - klucz to trasa i jej filtry"""
+    klucz = (request.endpoint,) + tuple(sorted(
+        (k, v) for k, v in request.args.items(multi=True) if k not in PARAMETRY_STRONY
+    ))
+    return liczebnosci_list.pobierz(klucz, query.order_by(None).count)
+
+
+def stronicuj(query, kolumny, malejaco=False, per_page=None):
+    """Stronicuje zapytanie kursorem (keyset) po kolumnach sortowania
+    
+    Ostatnia kolumna musi być unikalna (zwykle id). Kolejna strona zaczyna się
+    za granicznym wierszem z parametru "po", poprzednia kończy przed wierszem
+    z parametru "przed" - bez OFFSET, więc głęboka strona kosztuje tyle co pierwsza.
+    """
+    per_page = per_page or current_app.config['ITEMS_PER_PAGE']
+    krotka = db.tuple_(*kolumny)
+    
+    kursor = request.args.get('przed') or request.args.get('po')
+    pozycja = _odkoduj(kursor, kolumny) if kursor else None
+    wstecz = pozycja is not None and 'przed' in request.args
+    
+    # Do poprzedniej strony idziemy od granicy w odwrotnej kolejności
+    rosnaco = wstecz == malejaco
+    
+    baza = query
+    if pozycja is None:
+        page = 1
+    else:
+        page, wartosci = pozycja
+        query = query.filter(krotka > wartosci if rosnaco else krotka < wartosci)
+    
+    kolejnosc = [k.asc() if rosnaco else k.desc() for k in kolumny]
+    wiersze = query.order_by(None).order_by(*kolejnosc).limit(per_page + 1).all()
+    wiecej = len(wiersze) > per_page
+    items = wiersze[:per_page]
+    
+    def granica(obiekt, numer):
+        # Na pierwszą stronę prowadzi adres bez kursora
+        if numer == 1:
+            return {}
+        kursor = _zakoduj(numer, [getattr(obiekt, k.key) for k in kolumny])
+        return {'po': kursor} if numer > page else {'przed': kursor}
+    
+    if wstecz:
+        items.reverse()
+        page = max(page, 2) if wiecej else 1
+        poprzednia = granica(items[0], page - 1) if wiecej else None
+        nastepna = granica(items[-1], page + 1) if items else None
+    else:
+        # Za końcem listy (np. po usunięciu wierszy) wracamy na początek
+        poprzednia = None if page == 1 else (granica(items[0], page - 1) if items else {})
+        nastepna = granica(items[-1], page + 1) if wiecej else None
+    
+    return Strona(items, page, per_page, _liczba_wierszy(baza), poprzednia, nastepna)
+
+
+def stronicuj_numerami(query, per_page=None, zapytanie_liczby=None):
+    """Stronicuje numerami stron zapytanie o ograniczonej liczbie wyników (np. wyszukiwanie)
+    
+    zapytanie_liczby - tańsze zapytanie o liczbę wszystkich wyników (domyślnie COUNT z query).
+    """
+    per_page = per_page or current_app.config['ITEMS_PER_PAGE']
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    wiersze = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    poprzednia = None if page == 1 else ({} if page == 2 else {'page': page - 1})
+    nastepna = {'page': page + 1} if len(wiersze) > per_page else None
+    
+    return Strona(wiersze[:per_page], page, per_page,
+                  _liczba_wierszy(query if zapytanie_liczby is None else zapytanie_liczby),
+                  poprzednia, nastepna)
@@ -0,0 +1,185 @@
+"""Plany zapytań wykonywanych przez trasy aplikacji (SQLite)
+
+Strony są pobierane klientem testowym Flaska, a każde wykonane zapytanie
+SELECT trafia do EXPLAIN QUERY PLAN z tymi samymi parametrami - sprawdzane
+są więc dokładnie zapytania tras, a nie ich kopie. Korzystają z tego komenda
+"flask sprawdz-plany" i test tests/test_plany.py.
+"""
+import re
+from sqlalchemy import event
+from flask import has_request_context, request
+from app.cache import bufory
+from app.models import (db, Produkt, Klient, DokumentMagazynowy, TypDokumentu, Zamowienie,
+                        Faktura, ZamowienieZakupu)
+
+# Strony sprawdzane przez sprawdz-plany; {nazwa} - id najnowszego wiersza z IDENTYFIKATORY
+TRASY = [
+    '/dashboard',
+    '/products/',
+    '/products/?kategoria=Obuwie',
+    '/products/?szukaj=rekawice',
+    '/products/{produkt}',
+    '/warehouse/',
+    '/warehouse/documents',
+    '/warehouse/documents?typ=PRZYJECIE',
+    '/warehouse/pz/{pz}',
+    '/warehouse/suppliers',
+    '/orders/customer',
+    '/orders/customer?status=NOWE',
+    '/orders/customer/{zamowienie}',
+    '/orders/customer/add',
+    '/orders/invoices',
+    '/orders/invoices/{faktura}',
+    '/orders/supplier',
+    '/orders/supplier/{zamowienie_zakupu}',
+    '/orders/supplier/replenish',
+    '/customers/',
+    '/customers/{klient}',
+    '/reports/sales',
+    '/reports/sales?format=csv',
+    '/reports/inventory',
+    '/reports/inventory?kategoria=Obuwie&tylko_niskie=on',
+    '/reports/inventory?format=csv',
+    '/reports/product-rotation',
+    '/reports/product-rotation?format=csv',
+    '/reports/valuation',
+    '/reports/documents',
+    '/reports/documents?typ=WYDANIE&format=csv',
+    '/reports/invoices',
+    '/reports/invoices?format=csv',
+    '/reports/jobs',
+    '/users',
+    '/api/podpowiedzi/produkty?q=re',
+]
+
+# Zapytania o id wierszy podstawianych w TRASY
+IDENTYFIKATORY = {
+    'produkt': db.select(db.func.max(Produkt.id)),
+    'pz': db.select(db.func.max(DokumentMagazynowy.id)).where(
+        DokumentMagazynowy.typ == TypDokumentu.PRZYJECIE),
+    'zamowienie': db.select(db.func.max(Zamowienie.id)),
+    'faktura': db.select(db.func.max(Faktura.id)),
+    'zamowienie_zakupu': db.select(db.func.max(ZamowienieZakupu.id)),
+    'klient': db.select(db.func.max(Klient.id)),
+}
+
+# Krok planu czytający tabelę w całości - także po indeksie (SCAN t USING [COVERING] INDEX i);
+# alias tabeli ma przyrostek _N (produkt_1)
+SKAN = re.compile(r'^SCAN (\w+?)(?:_\d+)?(?: |$)')
+
+# Świadomie dopuszczone pełne przejścia: (punkt końcowy, krok planu) -> powód
+DOZWOLONE_SKANY = {
+    # Pierwsza strona list stronicowanych kursorem - przejście indeksem sortowania
+    # zatrzymane przez LIMIT; liczba wierszy listy zapamiętywana w liczebnosci_list
+    ('products.list', 'SCAN produkt USING INDEX ix_produkt_nazwa'): 'stronicowanie',
+    ('products.list', 'SCAN produkt USING COVERING INDEX sqlite_autoindex_produkt_1'):
+        'liczba wierszy listy',
+    ('warehouse.documents_list',
+     'SCAN dokument_magazynowy USING INDEX ix_dokument_magazynowy_data_wystawienia'):
+        'stronicowanie',
+    ('warehouse.documents_list',
+     'SCAN dokument_magazynowy USING COVERING INDEX ix_dokument_magazynowy_data_wystawienia'):
+        'liczba wierszy listy',
+    ('orders.customer_orders_list',
+     'SCAN zamowienie USING INDEX ix_zamowienie_data_zamowienia'): 'stronicowanie',
+    ('orders.customer_orders_list',
+     'SCAN zamowienie USING COVERING INDEX ix_zamowienie_data_zamowienia'):
+        'liczba wierszy listy',
+    ('orders.invoices_list', 'SCAN faktura USING INDEX ix_faktura_data_wystawienia'):
+        'stronicowanie',
+    ('orders.invoices_list', 'SCAN faktura USING COVERING INDEX ix_faktura_data_wystawienia'):
+        'liczba wierszy listy',
+    ('orders.invoices_list', 'SCAN faktura USING COVERING INDEX ix_faktura_zamowienie_id'):
+        'liczba wierszy listy',
+    ('orders.supplier_orders_list',
+     'SCAN zamowienie_zakupu USING INDEX ix_zamowienie_zakupu_data_zamowienia'):
+        'stronicowanie',
+    ('orders.supplier_orders_list',
+     'SCAN zamowienie_zakupu USING COVERING INDEX ix_zamowienie_zakupu_data_zamowienia'):
+        'liczba wierszy listy',
+    ('customers.list', 'SCAN klient USING INDEX ix_klient_nazwa'): 'stronicowanie',
+    ('customers.list', 'SCAN klient USING COVERING INDEX sqlite_autoindex_klient_1'):
+        'liczba wierszy listy',
+    # Lista kategorii filtra - przejście po grupach indeksu, nie po produktach
+    ('products.list', 'SCAN produkt USING COVERING INDEX ix_produkt_kategoria_nazwa'):
+        'lista kategorii',
+    ('reports.inventory_report', 'SCAN produkt USING COVERING INDEX ix_produkt_kategoria_nazwa'):
+        'lista kategorii',
+    # Małe słowniki wyświetlane w całości
+    ('warehouse.suppliers_list', 'SCAN dostawca'): 'słownik dostawców',
+    ('main.users_list', 'SCAN uzytkownik'): 'słownik użytkowników',
+    # Raporty obejmujące z definicji cały asortyment
+    ('reports.inventory_report', 'SCAN produkt USING INDEX sqlite_autoindex_produkt_1'):
+        'raport wszystkich stanów',
+    ('reports.inventory_report', 'SCAN stan_magazynowy'): 'wartość całego magazynu',
+    ('reports.product_rotation', 'SCAN produkt USING INDEX ix_produkt_aktywny_nazwa'):
+        'rotacja wszystkich aktywnych produktów',
+    ('reports.valuation_report', 'SCAN produkt'): 'wycena wszystkich produktów',
+    # Plan uzupełnienia czyta historię zakupów raz dla wszystkich niskich stanów
+    # (po ANALYZE SQLite zaczyna od nagłówków zamówień zamiast pozycji)
+    ('orders.supplier_order_replenish', 'SCAN pozycja_zamowienia_zakupu'):
+        'ostatni dostawca i ilości w drodze',
+    ('orders.supplier_order_replenish', 'SCAN zamowienie_zakupu'):
+        'ostatni dostawca i ilości w drodze',
+}
+
+
+def pobierz_zapytania(klient, trasy):
+    """Pobiera strony i zwraca wykonane zapytania [(trasa, punkt końcowy, sql, parametry)]"""
+    zapytania = []
+    trasa = None
+    
+    def zbierz(polaczenie, kursor, polecenie, parametry, kontekst, wiele):
+        if not wiele and has_request_context() and \
+                polecenie.lstrip().upper().startswith(('SELECT', 'WITH')):
+            zapytania.append((trasa, request.endpoint, polecenie, parametry))
+    
+    event.listen(db.engine, 'before_cursor_execute', zbierz)
+    try:
+        for trasa in trasy:
+            # Wynik z bufora pominąłby zapytania trasy
+            for bufor in bufory.values():
+                bufor.uniewaznij()
+            odpowiedz = klient.get(trasa)
+            odpowiedz.get_data()
+            odpowiedz.close()
+            if odpowiedz.status_code != 200:
+                raise RuntimeError(f'{trasa}: odpowiedź {odpowiedz.status_code}')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', zbierz)
+    return zapytania
+
+
+def trasy_z_identyfikatorami():
+    """TRASY z podstawionymi id - bez tras, dla których brak wierszy"""
+    identyfikatory = {nazwa: db.session.scalar(zapytanie)
+                      for nazwa, zapytanie in IDENTYFIKATORY.items()}
+    trasy = []
+    for trasa in TRASY:
+        nazwy = re.findall(r'\{(\w+)\}', trasa)
+        if all(identyfikatory[n] is not None for n in nazwy):
+            trasy.append(trasa.format(**identyfikatory))
+    return trasy
+
+
+def plan(sql, parametry):
+    """Kroki EXPLAIN QUERY PLAN zapytania"""
+    with db.engine.connect() as polaczenie:
+        return [w[3] for w in polaczenie.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, parametry)]
+
+
+def pelne_skany(punkt_koncowy, kroki):
+    """Kroki planu czytające całą tabelę, których nie ma w DOZWOLONE_SKANY"""
+    return [krok for krok in kroki
+            if (skan := SKAN.match(krok)) and skan.group(1) in db.metadata.tables
+            and (punkt_koncowy, krok) not in DOZWOLONE_SKANY]
+
+
+def sprawdz(klient):
+    """Zwraca [(trasa, punkt końcowy, sql, kroki planu, niedozwolone skany)]"""
+    wyniki = []
+    for trasa, punkt_koncowy, sql, parametry in pobierz_zapytania(klient,
+                                                                 trasy_z_identyfikatorami()):
+        kroki = plan(sql, parametry)
+        wyniki.append((trasa, punkt_koncowy, sql, kroki, pelne_skany(punkt_koncowy, kroki)))
+    return wyniki
@@ -0,0 +1,142 @@
+import hashlib
+import math
+from collections import namedtuple
+from datetime import datetime
+from app.models import (db, Produkt, StanMagazynowy, Dostawca, ZamowienieZakupu,
+                        PozycjaZamowieniaZakupu, StatusZamowieniaZakupu, PrognozaPopytu,
+                        LicznikDokumentow)
+
+# Zamówienia zakupu, których towar jeszcze nie dotarł
+STATUSY_W_DRODZE = (StatusZamowieniaZakupu.NOWE, StatusZamowieniaZakupu.WYSLANE)
+
+Propozycja = namedtuple('Propozycja', [
+    'produkt_id', 'kod', 'nazwa', 'prog', 'stan', 'w_drodze', 'ilosc', 'cena', 'wartosc'
+])
+ZamowienieDostawcy = namedtuple('ZamowienieDostawcy', [
+    'dostawca_id', 'nazwa', 'pozycje', 'wartosc'
+])
+
+
+def _zapytanie_niskich_stanow():
+    """Produkty aktywne, których stan razem z zamówionym towarem nie przekracza progu,
+    z ostatnim dostawcą i ceną zakupu"""
+    w_drodze = db.select(
+        PozycjaZamowieniaZakupu.produkt_id,
+        db.func.sum(PozycjaZamowieniaZakupu.ilosc).label('ilosc')
+    ).join(
+        ZamowienieZakupu, ZamowienieZakupu.id == PozycjaZamowieniaZakupu.zamowienie_zakupu_id
+    ).where(
+        ZamowienieZakupu.status.in_(STATUSY_W_DRODZE)
+    ).group_by(PozycjaZamowieniaZakupu.produkt_id).subquery()
+    
+    # Najnowsza nieanulowana pozycja zakupu produktu wyznacza dostawcę i cenę
+    zakupy = db.select(
+        PozycjaZamowieniaZakupu.produkt_id,
+        ZamowienieZakupu.dostawca_id,
+        PozycjaZamowieniaZakupu.cena_jednostkowa,
+        db.func.row_number().over(
+            partition_by=PozycjaZamowieniaZakupu.produkt_id,
+            order_by=(ZamowienieZakupu.data_zamowienia.desc(), ZamowienieZakupu.id.desc())
+        ).label('kolejnosc')
+    ).join(
+        ZamowienieZakupu, ZamowienieZakupu.id == PozycjaZamowieniaZakupu.zamowienie_zakupu_id
+    ).where(
+        ZamowienieZakupu.status != StatusZamowieniaZakupu.ANULOWANE
+    ).subquery()
+    
+    zamowione = db.func.coalesce(w_drodze.c.ilosc, 0)
+    prog = Produkt.wyrazenie_progu()
+    return db.select(
+        Produkt.id, Produkt.kod, Produkt.nazwa, prog, Produkt.stan_minimalny,
+        StanMagazynowy.ilosc_dostepna, zamowione, PrognozaPopytu.popyt_dzienny,
+        Dostawca.id, Dostawca.nazwa, zakupy.c.cena_jednostkowa
+    ).join(
+        StanMagazynowy, StanMagazynowy.produkt_id == Produkt.id
+    ).outerjoin(
+        w_drodze, w_drodze.c.produkt_id == Produkt.id
+    ).outerjoin(
+        PrognozaPopytu, PrognozaPopytu.produkt_id == Produkt.id
+    ).outerjoin(
+        zakupy, db.and_(zakupy.c.produkt_id == Produkt.id, zakupy.c.kolejnosc == 1)
+    ).outerjoin(
+        Dostawca, db.and_(Dostawca.id == zakupy.c.dostawca_id, Dostawca.aktywny == True)
+    ).where(
+        Produkt.aktywny == True,
+        StanMagazynowy.ilosc_dostepna + zamowione <= prog
+    ).order_by(Dostawca.nazwa, Produkt.kod)
+
+
+def plan_uzupelnienia(dni_zapasu):
+    """Zamówienia do dostawców uzupełniające wszystkie niskie stany (bez zapisu)
+    
+    Produkt zamawiamy do progu niskiego stanu powiększonego o prognozowany popyt
+    na dni_zapasu dni (bez prognozy - o stan minimalny), licząc towar w drodze.
+    Zwraca listę ZamowienieDostawcy i propozycje produktów bez aktywnego dostawcy.
+    """
+    pozycje, dostawcy, bez_dostawcy = {}, {}, []
+    for (produkt_id, kod, nazwa, prog, stan_minimalny, stan, w_drodze, popyt,
+         dostawca_id, dostawca, cena) in db.session.execute(_zapytanie_niskich_stanow()):
+        zapas = math.ceil(popyt * dni_zapasu) if popyt is not None else stan_minimalny
+        ilosc = max(prog + zapas - stan - w_drodze, 1)
+        propozycja = Propozycja(produkt_id, kod, nazwa, prog, stan, w_drodze, ilosc, cena,
+                                ilosc * cena if cena is not None else None)
+        
+        if dostawca_id is None:
+            bez_dostawcy.append(propozycja)
+        else:
+            dostawcy[dostawca_id] = dostawca
+            pozycje.setdefault(dostawca_id, []).append(propozycja)
+    
+    zamowienia = [
+        ZamowienieDostawcy(dostawca_id, dostawcy[dostawca_id], lista,
+                           sum(p.wartosc for p in lista))
+        for dostawca_id, lista in pozycje.items()
+    ]
+    return zamowienia, bez_dostawcy
+
+
+def skrot_planu(zamowienia):
+    """Skrót planu uzupełnienia - formularz podglądu odsyła go przy zatwierdzeniu"""
+    tresc = repr([(z.dostawca_id, [(p.produkt_id, p.ilosc, str(p.cena)) for p in z.pozycje])
+                  for z in zamowienia])
+    return hashlib.sha256(tresc.encode('utf-8')).hexdigest()
+
+
+def zablokuj_uzupelnianie():
+    """Otwiera transakcję, w której plan tworzy naraz tylko jedno żądanie
+    
+    Wywoływane przed ponownym wyliczeniem planu - drugie równoległe zatwierdzenie
+    czeka na commit pierwszego i widzi już jego zamówienia w drodze.
+    SQLite: BEGIN IMMEDIATE (blokada zapisu bazy), PostgreSQL: blokada
+    doradcza do końca transakcji.
+    """
+    dialekt = db.session.get_bind().dialect.name
+    if dialekt == 'sqlite':
+        db.session.execute(db.text('BEGIN IMMEDIATE'))
+    elif dialekt == 'postgresql':
+        db.session.execute(db.text("SELECT pg_advisory_xact_lock(hashtext('uzupelnienie'))"))
+
+
+def utworz_zamowienia(zamowienia, uwagi=None):
+    """Zapisuje zamówienia zakupu w statusie NOWE wsadowymi INSERT-ami (bez commitu)
+    
+    Zwraca numery utworzonych zamówień w kolejności listy.
+    """
+    if not zamowienia:
+        return []
+    
+    teraz = datetime.utcnow()
+    numery = [LicznikDokumentow.generuj_numer('ZAK') for _ in zamowienia]
+    identyfikatory = dict(db.session.execute(
+        db.insert(ZamowienieZakupu).returning(ZamowienieZakupu.numer, ZamowienieZakupu.id),
+        [{'numer': numer, 'dostawca_id': z.dostawca_id, 'data_zamowienia': teraz,
+          'status': StatusZamowieniaZakupu.NOWE, 'wartosc_netto': z.wartosc, 'uwagi': uwagi}
+         for numer, z in zip(numery, zamowienia)]
+    ).all())
+    
+    db.session.execute(db.insert(PozycjaZamowieniaZakupu), [
+        {'zamowienie_zakupu_id': identyfikatory[numer], 'produkt_id': p.produkt_id,
+         'ilosc': p.ilosc, 'cena_jednostkowa': p.cena, 'wartosc_netto': p.wartosc}
+        for numer, z in zip(numery, zamowienia) for p in z.pozycje
+    ])
+    return numery
@@ -0,0 +1,26 @@
+from flask import Blueprint, request, jsonify, abort
+from app.routes.auth import login_required
+from app.search import indeksy_podpowiedzi
+
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+MAKS_PODPOWIEDZI = 50
+
+@bp.route('/podpowiedzi/<rodzaj>')
+@login_required
+def podpowiedz(rodzaj):
+    """Podpowiedzi do pól wyboru produktu, klienta i dostawcy"""
+    indeks = indeksy_podpowiedzi().get(rodzaj)
+    if indeks is None:
+        abort(404)
+    
+    fraza = request.args.get('q', '')
+    limit = min(request.args.get('limit', 10, type=int), MAKS_PODPOWIEDZI)
+    
+    wyniki = []
+    for rekord_id, wpis in indeks.szukaj(fraza, limit):
+        wynik = {'id': rekord_id, 'tekst': wpis[0]}
+        wynik.update(zip(indeks.dane, wpis[2:]))
+        wyniki.append(wynik)
+    
+    return jsonify(wyniki)
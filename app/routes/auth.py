@@ -1,5 +1,6 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, g
 from app.models import db, Uzytkownik, Log
+from app.cache import tozsamosci, Tozsamosc
 from functools import wraps
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -23,8 +24,8 @@ def role_required(*roles):
                 flash('Musisz być zalogowany.', 'warning')
                 return redirect(url_for('auth.login'))
             
-            user = Uzytkownik.query.get(session['user_id'])
-            if user.rola.value not in roles:
+            # Tożsamość wczytana przez load_logged_in_user
+            if g.user.rola.value not in roles:
                 flash('Nie masz uprawnień do tej funkcji.', 'danger')
                 return redirect(url_for('main.dashboard'))
             return f(*args, **kwargs)
@@ -69,14 +70,26 @@ def logout():
     flash('Zostałeś wylogowany.', 'info')
     return redirect(url_for('auth.login'))
 
+def _wczytaj_tozsamosc(user_id):
+    """Wczytuje zwarte dane użytkownika z bazy"""
+    wiersz = db.session.query(
+        Uzytkownik.id, Uzytkownik.login, Uzytkownik.imie,
+        Uzytkownik.nazwisko, Uzytkownik.rola, Uzytkownik.aktywny
+    ).filter(Uzytkownik.id == user_id).first()
+    return Tozsamosc(*wiersz) if wiersz else None
+
 @bp.before_app_request
 def load_logged_in_user():
-    """Ładuje dane zalogowanego użytkownika"""
+    """Ładuje dane zalogowanego użytkownika (z pamięci podręcznej procesu)"""
     user_id = session.get('user_id')
     
     if user_id is None:
-        from flask import g
         g.user = None
-    else:
-        from flask import g
-        g.user = Uzytkownik.query.get(user_id)
\ No newline at end of file
+        return
+    
+    g.user = tozsamosci.pobierz(user_id, _wczytaj_tozsamosc)
+    
+    # Konto usunięte lub dezaktywowane - sesja traci ważność
+    if g.user is None or not g.user.aktywny:
+        g.user = None
+        session.clear()
\ No newline at end of file
@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, g
 from app.models import db, Klient, Log
 from app.routes.auth import login_required, role_required
+from app.pagination import stronicuj
+from app.loading import wczytaj_lub_404
 
 bp = Blueprint('customers', __name__, url_prefix='/customers')
 
@@ -9,7 +11,6 @@ bp = Blueprint('customers', __name__, url_prefix='/customers')
 @login_required
 def list():
     """Lista klientów"""
-    page = request.args.get('page', 1, type=int)
     szukaj = request.args.get('szukaj', '')
     
     query = Klient.query
@@ -23,9 +24,7 @@ def list():
             )
         )
     
-    klienci = query.order_by(Klient.nazwa).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    klienci = stronicuj(query, (Klient.nazwa, Klient.id))
     
     return render_template('customers/list.html', klienci=klienci, szukaj=szukaj)
 
@@ -67,7 +66,7 @@ def add():
 @login_required
 def detail(klient_id):
     """Szczegóły klienta"""
-    klient = Klient.query.get_or_404(klient_id)
+    klient = wczytaj_lub_404('klient', klient_id)
     return render_template('customers/detail.html', klient=klient)
 
 @bp.route('/<int:klient_id>/edit', methods=['GET', 'POST'])
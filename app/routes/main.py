@@ -1,6 +1,7 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, g, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, g, session, jsonify
 from app.models import db, Uzytkownik, RolaUzytkownika, Log, StanMagazynowy, Zamowienie
 from app.routes.auth import login_required, role_required
+from app.cache import statystyki_panelu, tozsamosci, bufory
 from datetime import datetime, timedelta
 
 bp = Blueprint('main', __name__)
@@ -11,40 +12,51 @@ def index():
         return redirect(url_for('main.dashboard'))
     return redirect(url_for('auth.login'))
 
+def _oblicz_statystyki(poczatek_miesiaca):
+    """Liczy statystyki panelu dla administratora i kierownika"""
+    stats = {}
+    
+    stats['zamowienia_nowe'] = Zamowienie.query.filter_by(
+        status='NOWE'
+    ).count()
+    
+    stats['zamowienia_w_realizacji'] = Zamowienie.query.filter(
+        Zamowienie.status.in_(['W_REALIZACJI', 'GOTOWE'])
+    ).count()
+    
+    stats['produkty_niski_stan'] = StanMagazynowy.niskie_stany().count()
+    
+    # Sprzedaż w tym miesiącu
+    stats['sprzedaz_miesiac'] = db.session.query(
+        db.func.sum(Zamowienie.wartosc_brutto)
+    ).filter(
+        Zamowienie.data_zamowienia >= poczatek_miesiaca
+    ).scalar() or 0
+    
+    return stats
+
 @bp.route('/dashboard')
 @login_required
 def dashboard():
     """Panel główny - dostosowany do roli użytkownika"""
-    from flask import session
-    
     stats = {}
     
     if g.user.rola.value in ['Administrator', 'Kierownik']:
-        # Statystyki dla administratora i kierownika
-        stats['zamowienia_nowe'] = Zamowienie.query.filter_by(
-            status='NOWE'
-        ).count()
-        
-        stats['zamowienia_w_realizacji'] = Zamowienie.query.filter(
-            Zamowienie.status.in_(['W_REALIZACJI', 'GOTOWE'])
-        ).count()
-        
-        stats['produkty_niski_stan'] = StanMagazynowy.query.join(
-            StanMagazynowy.produkt
-        ).filter(
-            StanMagazynowy.ilosc_dostepna <= db.bindparam('stan_min', 10)
-        ).count()
-        
-        # Sprzedaż w tym miesiącu
-        poczatek_miesiaca = datetime.now().replace(day=1, hour=0, minute=0, second=0)
-        stats['sprzedaz_miesiac'] = db.session.query(
-            db.func.sum(Zamowienie.wartosc_brutto)
-        ).filter(
-            Zamowienie.data_zamowienia >= poczatek_miesiaca
-        ).scalar() or 0
+        # Statystyki z pamięci podręcznej, unieważniane przez zdarzenia domenowe
+        poczatek_miesiaca = datetime.now().replace(day=1, hour=0, minute=0, second=0,
+                                                   microsecond=0)
+        stats = statystyki_panelu.pobierz(
+            poczatek_miesiaca, lambda: _oblicz_statystyki(poczatek_miesiaca)
+        )
     
     return render_template('main/dashboard.html', stats=stats)
 
+@bp.route('/cache')
+@role_required('Administrator')
+def cache_stats():
+    """Statystyki pamięci podręcznej procesu"""
+    return jsonify({nazwa: bufor.statystyki() for nazwa, bufor in bufory.items()})
+
 # UC2: Zarządzanie użytkownikami
 @bp.route('/users')
 @role_required('Administrator')
@@ -110,6 +122,7 @@ def user_edit(user_id):
             user.ustaw_haslo(nowe_haslo)
         
         db.session.commit()
+        tozsamosci.uniewaznij(user.id)
         
         Log.dodaj_log(g.user.id, 'Edycja użytkownika', 
                      f'Edytowano użytkownika: {user.login}')
@@ -130,6 +143,7 @@ def user_toggle(user_id):
     else:
         user.aktywny = not user.aktywny
         db.session.commit()
+        tozsamosci.uniewaznij(user.id)
         
         status = 'aktywowano' if user.aktywny else 'dezaktywowano'
         Log.dodaj_log(g.user.id, f'Zmiana statusu użytkownika', 
@@ -143,28 +157,31 @@ def user_toggle(user_id):
 @login_required
 def profile():
     """Profil użytkownika"""
-    return render_template('main/profile.html')
+    uzytkownik = Uzytkownik.query.get_or_404(g.user.id)
+    return render_template('main/profile.html', uzytkownik=uzytkownik)
 
 @bp.route('/profile/edit', methods=['POST'])
 @login_required
 def profile_edit():
     """Edycja własnego profilu"""
-    g.user.imie = request.form.get('imie')
-    g.user.nazwisko = request.form.get('nazwisko')
-    g.user.email = request.form.get('email')
+    uzytkownik = Uzytkownik.query.get_or_404(g.user.id)
+    uzytkownik.imie = request.form.get('imie')
+    uzytkownik.nazwisko = request.form.get('nazwisko')
+    uzytkownik.email = request.form.get('email')
     
     # Zmiana hasła
     stare_haslo = request.form.get('stare_haslo')
     nowe_haslo = request.form.get('nowe_haslo')
     
     if stare_haslo and nowe_haslo:
-        if g.user.sprawdz_haslo(stare_haslo):
-            g.user.ustaw_haslo(nowe_haslo)
+        if uzytkownik.sprawdz_haslo(stare_haslo):
+            uzytkownik.ustaw_haslo(nowe_haslo)
             flash('Hasło zostało zmienione.', 'success')
         else:
             flash('Nieprawidłowe stare hasło.', 'danger')
             return redirect(url_for('main.profile'))
     
     db.session.commit()
+    tozsamosci.uniewaznij(uzytkownik.id)
     flash('Profil został zaktualizowany.', 'success')
     return redirect(url_for('main.profile'))
\ No newline at end of file
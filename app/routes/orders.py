@@ -1,64 +1,95 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, g
+from flask import Blueprint, render_template, redirect, url_for, flash, request, g, current_app
 from app.models import (db, Zamowienie, PozycjaZamowienia, ZamowienieZakupu, 
-                        PozycjaZamowieniaZakupu, Klient, Dostawca, Produkt, 
-                        Faktura, StatusZamowienia, StatusZamowieniaZakupu, Log)
+                        PozycjaZamowieniaZakupu, Produkt, 
+                        Faktura, StatusZamowienia, StatusZamowieniaZakupu, Log,
+                        SprzedazDzienna, LicznikDokumentow)
 from app.routes.auth import login_required, role_required
+from app.signals import zamowienie_utworzone, status_zamowienia_zmieniony
+from app.stock import pozycje_z_formularza, identyfikator_z_formularza
+from app.pagination import stronicuj
+from app.loading import wczytaj_lub_404
+from app.replenishment import (plan_uzupelnienia, utworz_zamowienia, skrot_planu,
+                               zablokuj_uzupelnianie)
 from datetime import datetime, timedelta
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 
 bp = Blueprint('orders', __name__, url_prefix='/orders')
 
+def _wstaw_pozycje(model, kolumna_zamowienia, zamowienie_id, pozycje):
+    """Wstawia pozycje zamówienia jednym zapytaniem wsadowym"""
+    db.session.execute(
+        db.insert(model),
+        [{
+            kolumna_zamowienia: zamowienie_id,
+            'produkt_id': p.produkt_id,
+            'ilosc': p.ilosc,
+            'cena_jednostkowa': p.cena_jednostkowa,
+            'wartosc_netto': p.wartosc_netto
+        } for p in pozycje]
+    )
+
+def _ceny_produktow(produkt_ids):
+    """Ceny produktów (produkt_id -> cena) jednym zapytaniem; None, gdy któregoś nie ma"""
+    produkt_ids = set(produkt_ids)
+    ceny = dict(db.session.query(Produkt.id, Produkt.cena_jednostkowa).filter(
+        Produkt.id.in_(produkt_ids)
+    ))
+    return ceny if len(ceny) == len(produkt_ids) else None
+
 # UC6: Rejestrowanie zamówienia klienta
 @bp.route('/customer/add', methods=['GET', 'POST'])
 @role_required('Sprzedawca', 'Administrator')
 def customer_order_add():
     """Dodawanie zamówienia klienta"""
     if request.method == 'POST':
-        klient_id = request.form.get('klient_id')
         pozycje_data = request.form.getlist('produkt_id[]')
         
         if not pozycje_data:
             flash('Dodaj co najmniej jedną pozycję do zamówienia.', 'warning')
-            return render_template('orders/customer_order_form.html',
-                                 klienci=Klient.query.filter_by(aktywny=True).all(),
-                                 produkty=Produkt.query.filter_by(aktywny=True).all())
+            return render_template('orders/customer_order_form.html')
         
-        # Generowanie numeru zamówienia
-        rok = datetime.now().year
-        liczba = Zamowienie.query.filter(
-            db.extract('year', Zamowienie.data_zamowienia) == rok
-        ).count() + 1
-        numer = f"ZAM/{rok}/{liczba:05d}"
+        # Ukryte pola zostają puste, gdy nie wybrano pozycji z podpowiedzi
+        try:
+            klient_id = identyfikator_z_formularza(request.form, 'klient_id', 'klienta')
+            pozycje_formularza = pozycje_z_formularza(request.form)
+        except ValueError as e:
+            flash(str(e), 'warning')
+            return render_template('orders/customer_order_form.html')
+        
+        # Ceny wszystkich produktów jednym zapytaniem
+        ceny = _ceny_produktow(produkt_id for produkt_id, _ in pozycje_formularza)
+        if ceny is None:
+            flash('Wybierz produkty z listy podpowiedzi i podaj ich ilości.', 'warning')
+            return render_template('orders/customer_order_form.html')
         
+        # Generowanie numeru zamówienia
         zamowienie = Zamowienie(
-            numer=numer,
+            numer=LicznikDokumentow.generuj_numer('ZAM'),
             klient_id=klient_id,
             status=StatusZamowienia.NOWE,
             uwagi=request.form.get('uwagi')
         )
         
-        db.session.add(zamowienie)
-        db.session.flush()
-        
-        # Dodawanie pozycji
-        for i, produkt_id in enumerate(pozycje_data):
-            produkt = Produkt.query.get(int(produkt_id))
-            ilosc = int(request.form.getlist('ilosc[]')[i])
-            
+        # Pozycje liczone w pamięci i wstawiane wsadowo
+        pozycje = []
+        for produkt_id, ilosc in pozycje_formularza:
             pozycja = PozycjaZamowienia(
-                produkt_id=int(produkt_id),
+                produkt_id=produkt_id,
                 ilosc=ilosc,
-                cena_jednostkowa=produkt.cena_jednostkowa
+                cena_jednostkowa=ceny[produkt_id]
             )
             pozycja.oblicz_wartosc()
-            
-            db.session.add(pozycja)
-            db.session.flush()
-            
-            zamowienie.pozycje.append(pozycja)
+            pozycje.append(pozycja)
+        
+        zamowienie.oblicz_wartosc(pozycje)
         
-        zamowienie.oblicz_wartosc()
+        db.session.add(zamowienie)
+        db.session.flush()
+        
+        _wstaw_pozycje(PozycjaZamowienia, 'zamowienie_id', zamowienie.id, pozycje)
+        SprzedazDzienna.dodaj_sprzedaz(zamowienie.data_zamowienia.date(), pozycje)
         db.session.commit()
+        zamowienie_utworzone.send(zamowienie)
         
         Log.dodaj_log(g.user.id, 'Nowe zamówienie', 
                      f'Utworzono zamówienie: {zamowienie.numer}')
@@ -66,28 +97,21 @@ def customer_order_add():
         flash(f'Zamówienie {zamowienie.numer} zostało utworzone.', 'success')
         return redirect(url_for('orders.customer_order_detail', zamowienie_id=zamowienie.id))
     
-    klienci = Klient.query.filter_by(aktywny=True).order_by(Klient.nazwa).all()
-    produkty = Produkt.query.filter_by(aktywny=True).order_by(Produkt.nazwa).all()
-    
-    return render_template('orders/customer_order_form.html', 
-                         klienci=klienci,
-                         produkty=produkty)
+    # Klienci i produkty podpowiadani są z /api/podpowiedzi
+    return render_template('orders/customer_order_form.html')
 
 @bp.route('/customer')
 @login_required
 def customer_orders_list():
     """Lista zamówień klientów"""
     status = request.args.get('status', '')
-    page = request.args.get('page', 1, type=int)
     
     query = Zamowienie.query
     
     if status:
         query = query.filter_by(status=StatusZamowienia[status])
     
-    zamowienia = query.order_by(Zamowienie.data_zamowienia.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    zamowienia = stronicuj(query, (Zamowienie.data_zamowienia, Zamowienie.id), malejaco=True)
     
     return render_template('orders/customer_orders_list.html', 
                          zamowienia=zamowienia,
@@ -98,7 +122,7 @@ def customer_orders_list():
 @login_required
 def customer_order_detail(zamowienie_id):
     """Szczegóły zamówienia klienta"""
-    zamowienie = Zamowienie.query.get_or_404(zamowienie_id)
+    zamowienie = wczytaj_lub_404('zamowienie_klienta', zamowienie_id)
     return render_template('orders/customer_order_detail.html', zamowienie=zamowienie)
 
 # UC7: Realizacja zamówienia klienta
@@ -111,6 +135,7 @@ def customer_order_realize(zamowienie_id):
     if zamowienie.status == StatusZamowienia.NOWE:
         zamowienie.zmien_status(StatusZamowienia.W_REALIZACJI)
         db.session.commit()
+        status_zamowienia_zmieniony.send(zamowienie)
         
         flash(f'Zamówienie {zamowienie.numer} jest w realizacji.', 'success')
     
@@ -128,6 +153,7 @@ def customer_order_complete(zamowienie_id):
     if wszystkie_skompletowane:
         zamowienie.zmien_status(StatusZamowienia.GOTOWE)
         db.session.commit()
+        status_zamowienia_zmieniony.send(zamowienie)
         
         Log.dodaj_log(g.user.id, 'Kompletacja zamówienia', 
                      f'Zamówienie {zamowienie.numer} gotowe do wydania')
@@ -186,11 +212,7 @@ def create_invoice(zamowienie_id):
 @login_required
 def invoices_list():
     """Lista faktur"""
-    page = request.args.get('page', 1, type=int)
-    
-    faktury = Faktura.query.order_by(Faktura.data_wystawienia.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    faktury = stronicuj(Faktura.query, (Faktura.data_wystawienia, Faktura.id), malejaco=True)
     
     return render_template('orders/invoices_list.html', faktury=faktury)
 
@@ -198,33 +220,49 @@ def invoices_list():
 @login_required
 def invoice_detail(faktura_id):
     """Szczegóły faktury"""
-    faktura = Faktura.query.get_or_404(faktura_id)
+    faktura = wczytaj_lub_404('faktura', faktura_id)
     return render_template('orders/invoice_detail.html', faktura=faktura)
 
+def _pozycje_zakupu(form):
+    """Trójki (produkt_id, ilosc, cena) z pól produkt_id[], ilosc[] i cena[]"""
+    try:
+        return [
+            (int(produkt_id), int(ilosc), Decimal(cena))
+            for produkt_id, ilosc, cena in zip(form.getlist('produkt_id[]'),
+                                               form.getlist('ilosc[]'),
+                                               form.getlist('cena[]'))
+        ]
+    except (ValueError, InvalidOperation):
+        raise ValueError('Wybierz produkty z listy podpowiedzi i podaj ich ilości i ceny.') from None
+
 # UC9: Składanie zamówienia do dostawcy
 @bp.route('/supplier/add', methods=['GET', 'POST'])
 @role_required('Kierownik', 'Administrator')
 def supplier_order_add():
     """Dodawanie zamówienia do dostawcy"""
     if request.method == 'POST':
-        dostawca_id = request.form.get('dostawca_id')
         pozycje_data = request.form.getlist('produkt_id[]')
         
         if not pozycje_data:
             flash('Dodaj co najmniej jedną pozycję do zamówienia.', 'warning')
-            return render_template('orders/supplier_order_form.html',
-                                 dostawcy=Dostawca.query.filter_by(aktywny=True).all(),
-                                 produkty=Produkt.query.filter_by(aktywny=True).all())
+            return render_template('orders/supplier_order_form.html')
         
-        # Generowanie numeru zamówienia
-        rok = datetime.now().year
-        liczba = ZamowienieZakupu.query.filter(
-            db.extract('year', ZamowienieZakupu.data_zamowienia) == rok
-        ).count() + 1
-        numer = f"ZAK/{rok}/{liczba:05d}"
+        # Ukryte pola zostają puste, gdy nie wybrano pozycji z podpowiedzi
+        try:
+            dostawca_id = identyfikator_z_formularza(request.form, 'dostawca_id', 'dostawcę')
+            pozycje_formularza = _pozycje_zakupu(request.form)
+        except ValueError as e:
+            flash(str(e), 'warning')
+            return render_template('orders/supplier_order_form.html')
+        
+        # Istnienie wszystkich produktów sprawdzane jednym zapytaniem
+        if _ceny_produktow(produkt_id for produkt_id, _, _ in pozycje_formularza) is None:
+            flash('Wybierz produkty z listy podpowiedzi i podaj ich ilości i ceny.', 'warning')
+            return render_template('orders/supplier_order_form.html')
         
+        # Generowanie numeru zamówienia
         zamowienie = ZamowienieZakupu(
-            numer=numer,
+            numer=LicznikDokumentow.generuj_numer('ZAK'),
             dostawca_id=dostawca_id,
             data_dostawy_planowana=datetime.strptime(
                 request.form.get('data_dostawy'), '%Y-%m-%d'
@@ -233,27 +271,23 @@ def supplier_order_add():
             uwagi=request.form.get('uwagi')
         )
         
-        db.session.add(zamowienie)
-        db.session.flush()
-        
-        # Dodawanie pozycji
-        for i, produkt_id in enumerate(pozycje_data):
-            ilosc = int(request.form.getlist('ilosc[]')[i])
-            cena = Decimal(request.form.getlist('cena[]')[i])
-            
+        # Pozycje liczone w pamięci i wstawiane wsadowo
+        pozycje = []
+        for produkt_id, ilosc, cena in pozycje_formularza:
             pozycja = PozycjaZamowieniaZakupu(
-                produkt_id=int(produkt_id),
+                produkt_id=produkt_id,
                 ilosc=ilosc,
                 cena_jednostkowa=cena
             )
             pozycja.oblicz_wartosc()
-            
-            db.session.add(pozycja)
-            db.session.flush()
-            
-            zamowienie.pozycje.append(pozycja)
+            pozycje.append(pozycja)
+        
+        zamowienie.oblicz_wartosc(pozycje)
+        
+        db.session.add(zamowienie)
+        db.session.flush()
         
-        zamowienie.oblicz_wartosc()
+        _wstaw_pozycje(PozycjaZamowieniaZakupu, 'zamowienie_zakupu_id', zamowienie.id, pozycje)
         db.session.commit()
         
         Log.dodaj_log(g.user.id, 'Zamówienie do dostawcy', 
@@ -262,20 +296,53 @@ def supplier_order_add():
         flash(f'Zamówienie {zamowienie.numer} zostało utworzone.', 'success')
         return redirect(url_for('orders.supplier_order_detail', zamowienie_id=zamowienie.id))
     
-    dostawcy = Dostawca.query.filter_by(aktywny=True).order_by(Dostawca.nazwa).all()
-    produkty = Produkt.query.filter_by(aktywny=True).order_by(Produkt.nazwa).all()
+    # Dostawcy i produkty podpowiadani są z /api/podpowiedzi
+    return render_template('orders/supplier_order_form.html')
+
+# Pozycje pokazywane w podglądzie uzupełnienia stanów
+LIMIT_POZYCJI_PODGLADU = 500
+
+@bp.route('/supplier/replenish', methods=['GET', 'POST'])
+@role_required('Kierownik', 'Administrator')
+def supplier_order_replenish():
+    """Podgląd i utworzenie zamówień do dostawców dla wszystkich niskich stanów"""
+    if request.method == 'POST':
+        # Plan liczony ponownie w transakcji zapisu musi być tym z podglądu
+        zablokuj_uzupelnianie()
+        zamowienia, _ = plan_uzupelnienia(current_app.config['REPLENISHMENT_COVER_DAYS'])
+        if not zamowienia:
+            db.session.rollback()
+            flash('Brak produktów do zamówienia u znanych dostawców.', 'info')
+            return redirect(url_for('orders.supplier_order_replenish'))
+        if request.form.get('plan') != skrot_planu(zamowienia):
+            db.session.rollback()
+            flash('Stany lub zamówienia zmieniły się od podglądu - sprawdź plan '
+                  'i zatwierdź go ponownie.', 'warning')
+            return redirect(url_for('orders.supplier_order_replenish'))
+        
+        numery = utworz_zamowienia(zamowienia, 'Uzupełnienie niskich stanów')
+        db.session.commit()
+        
+        liczba_pozycji = sum(len(z.pozycje) for z in zamowienia)
+        Log.dodaj_log(g.user.id, 'Uzupełnienie stanów',
+                      f'Utworzono {len(numery)} zamówień ({liczba_pozycji} pozycji): '
+                      f'{numery[0]} - {numery[-1]}')
+        flash(f'Utworzono {len(numery)} zamówień do dostawców ({liczba_pozycji} pozycji).',
+              'success')
+        return redirect(url_for('orders.supplier_orders_list'))
     
-    return render_template('orders/supplier_order_form.html', 
-                         dostawcy=dostawcy,
-                         produkty=produkty)
+    zamowienia, bez_dostawcy = plan_uzupelnienia(current_app.config['REPLENISHMENT_COVER_DAYS'])
+    return render_template('orders/supplier_order_replenish.html',
+                           zamowienia=zamowienia, bez_dostawcy=bez_dostawcy,
+                           plan=skrot_planu(zamowienia), limit=LIMIT_POZYCJI_PODGLADU)
 
 @bp.route('/supplier')
 @login_required
 def supplier_orders_list():
     """Lista zamówień do dostawców"""
-    zamowienia = ZamowienieZakupu.query.order_by(
-        ZamowienieZakupu.data_zamowienia.desc()
-    ).all()
+    zamowienia = stronicuj(ZamowienieZakupu.query,
+                           (ZamowienieZakupu.data_zamowienia, ZamowienieZakupu.id),
+                           malejaco=True)
     
     return render_template('orders/supplier_orders_list.html', zamowienia=zamowienia)
 
@@ -283,7 +350,7 @@ def supplier_orders_list():
 @login_required
 def supplier_order_detail(zamowienie_id):
     """Szczegóły zamówienia do dostawcy"""
-    zamowienie = ZamowienieZakupu.query.get_or_404(zamowienie_id)
+    zamowienie = wczytaj_lub_404('zamowienie_zakupu', zamowienie_id)
     return render_template('orders/supplier_order_detail.html', zamowienie=zamowienie)
 
 @bp.route('/supplier/<int:zamowienie_id>/status', methods=['POST'])
@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, g
 from app.models import db, Produkt, StanMagazynowy, Log
 from app.routes.auth import login_required, role_required
+from app import search
+from app.pagination import stronicuj, stronicuj_numerami
 from decimal import Decimal
 
 bp = Blueprint('products', __name__, url_prefix='/products')
@@ -10,7 +12,6 @@ bp = Blueprint('products', __name__, url_prefix='/products')
 @login_required
 def list():
     """Lista produktów"""
-    page = request.args.get('page', 1, type=int)
     kategoria = request.args.get('kategoria', '')
     szukaj = request.args.get('szukaj', '')
     
@@ -19,17 +20,13 @@ def list():
     if kategoria:
         query = query.filter_by(kategoria=kategoria)
     
+    # Wyniki wyszukiwania są ograniczone do SEARCH_MAX_HITS, więc wystarczą numery stron;
+    # liczba wszystkich trafień - osobnym COUNT bez oceny trafności
     if szukaj:
-        query = query.filter(
-            db.or_(
-                Produkt.kod.contains(szukaj),
-                Produkt.nazwa.contains(szukaj)
-            )
-        )
-    
-    produkty = query.order_by(Produkt.nazwa).paginate(
-        page=page, per_page=20, error_out=False
-    )
+        produkty = stronicuj_numerami(search.filtruj(query, szukaj),
+                                      zapytanie_liczby=search.zapytanie_liczby(query, szukaj))
+    else:
+        produkty = stronicuj(query, (Produkt.nazwa, Produkt.id))
     
     kategorie = db.session.query(Produkt.kategoria).distinct().all()
     kategorie = [k[0] for k in kategorie if k[0]]
@@ -71,7 +68,8 @@ def add():
             produkt_id=produkt.id,
             ilosc_dostepna=0,
             ilosc_zarezerwowana=0,
-            lokalizacja=request.form.get('lokalizacja', '')
+            lokalizacja=request.form.get('lokalizacja', ''),
+            prog_niskiego_stanu=produkt.prog_niskiego_stanu
         )
         
         db.session.add(stan)
@@ -109,6 +107,7 @@ def edit(produkt_id):
         
         if produkt.stan_magazynowy:
             produkt.stan_magazynowy.lokalizacja = request.form.get('lokalizacja')
+            produkt.stan_magazynowy.odswiez_prog()
         
         db.session.commit()
         
@@ -126,6 +125,8 @@ def toggle(produkt_id):
     """Aktywacja/deaktywacja produktu"""
     produkt = Produkt.query.get_or_404(produkt_id)
     produkt.aktywny = not produkt.aktywny
+    if produkt.stan_magazynowy:
+        produkt.stan_magazynowy.odswiez_prog()
     db.session.commit()
     
     status = 'aktywowano' if produkt.aktywny else 'dezaktywowano'
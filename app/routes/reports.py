@@ -1,12 +1,150 @@
-from flask import Blueprint, render_template, request, g
-from app.models import (db, Zamowienie, StanMagazynowy, Produkt, Faktura, 
-                        DokumentMagazynowy, TypDokumentu, PozycjaZamowienia)
+import os
+from flask import (Blueprint, render_template, request, g, jsonify, redirect, url_for, flash,
+                   abort, send_file, current_app)
+from app.models import (db, Zamowienie, StanMagazynowy, Produkt, Faktura, Klient,
+                        Dostawca, DokumentMagazynowy, TypDokumentu, SprzedazDzienna,
+                        ZadanieRaportu, StatusZadania, MigawkaStanu)
 from app.routes.auth import login_required, role_required
+from app.export import zadany_format, eksport
+from app.cache import wynik_raportu
+from app.valuation import wycena_okresu, wiersze
 from datetime import datetime, timedelta
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload, contains_eager
 
 bp = Blueprint('reports', __name__, url_prefix='/reports')
 
+# Liczba produktów o największej wartości stanu w wycenie magazynu
+LIMIT_PRODUKTOW_WYCENY = 100
+
+def _okres(parametry, dni):
+    """Daty od/do raportu z parametrów - domyślnie ostatnie `dni` dni, zawsze od <= do"""
+    teraz = datetime.now()
+    data_od = parametry.get('data_od') or (teraz - timedelta(days=dni)).strftime('%Y-%m-%d')
+    data_do = parametry.get('data_do') or teraz.strftime('%Y-%m-%d')
+    dt_od, dt_do = datetime.strptime(data_od, '%Y-%m-%d'), datetime.strptime(data_do, '%Y-%m-%d')
+    # Odwrócony zakres (od po do) traktowany jak ten sam okres podany we właściwej kolejności
+    if dt_od > dt_do:
+        data_od, data_do, dt_od, dt_do = data_do, data_od, dt_do, dt_od
+    return data_od, data_do, dt_od, dt_do
+
+def _okres_sprzedazy(parametry):
+    data_od, data_do, dt_od, dt_do = _okres(parametry, 30)
+    return data_od, data_do, dt_od, dt_do.replace(hour=23, minute=59, second=59)
+
+def _stany(parametry):
+    """Zapytanie o stany z filtrami raportu oraz zapytanie o niskie stany"""
+    kategoria = parametry.get('kategoria', '')
+    
+    query = StanMagazynowy.query.join(StanMagazynowy.produkt).options(
+        contains_eager(StanMagazynowy.produkt)
+    )
+    niskie = StanMagazynowy.niskie_stany()
+    
+    if kategoria:
+        query = query.filter(Produkt.kategoria == kategoria)
+        niskie = niskie.filter(Produkt.kategoria == kategoria)
+    
+    if parametry.get('tylko_niskie', '') == 'on':
+        query = niskie
+    
+    return query, niskie
+
+def _rotacja(dt_od, dt_do):
+    """Zapytanie (produkt, sprzedana ilość) od najczęściej sprzedawanych"""
+    # Sprzedaż produktów w okresie z dziennego zestawienia
+    sprzedaz = db.session.query(
+        SprzedazDzienna.produkt_id,
+        func.sum(SprzedazDzienna.ilosc).label('ilosc')
+    ).filter(
+        SprzedazDzienna.dzien.between(dt_od.date(), dt_do.date())
+    ).group_by(SprzedazDzienna.produkt_id).subquery()
+    
+    # Sprzedane produkty oraz aktywne produkty bez sprzedaży
+    ilosc = func.coalesce(sprzedaz.c.ilosc, 0)
+    wyniki = db.session.query(Produkt, ilosc).outerjoin(
+        sprzedaz, sprzedaz.c.produkt_id == Produkt.id
+    ).filter(
+        db.or_(Produkt.aktywny == True, sprzedaz.c.ilosc > 0)
+    ).order_by(ilosc.desc(), Produkt.nazwa)
+    return wyniki, ilosc
+
+def _dokumenty(parametry):
+    data_od, data_do, dt_od, dt_do = _okres(parametry, 30)
+    query = DokumentMagazynowy.query.filter(
+        DokumentMagazynowy.data_wystawienia.between(dt_od, dt_do)
+    )
+    
+    typ = parametry.get('typ', '')
+    if typ:
+        query = query.filter_by(typ=TypDokumentu[typ])
+    return query
+
+# Eksport CSV raportów: (nazwa pliku, nagłówek, zapytanie o kolumny) z parametrów raportu.
+# Z tych samych funkcji korzystają odnośniki CSV i zadania w tle (app/jobs.py)
+def eksport_sprzedazy(parametry):
+    data_od, data_do, dt_od, dt_do = _okres_sprzedazy(parametry)
+    return (f'sprzedaz_{data_od}_{data_do}',
+            ['Numer', 'Data', 'Klient', 'Netto', 'Brutto', 'Status'],
+            db.session.query(
+                Zamowienie.numer, Zamowienie.data_zamowienia, Klient.nazwa,
+                Zamowienie.wartosc_netto, Zamowienie.wartosc_brutto, Zamowienie.status
+            ).join(Zamowienie.klient).filter(
+                Zamowienie.data_zamowienia.between(dt_od, dt_do)
+            ).order_by(Zamowienie.data_zamowienia.desc()))
+
+def eksport_stanow(parametry):
+    query, _ = _stany(parametry)
+    return ('stany_magazynowe',
+            ['Kod', 'Nazwa', 'Kategoria', 'Dostępne', 'Zarezerwowane',
+             'Lokalizacja', 'Cena jednostkowa'],
+            query.with_entities(
+                Produkt.kod, Produkt.nazwa, Produkt.kategoria,
+                StanMagazynowy.ilosc_dostepna, StanMagazynowy.ilosc_zarezerwowana,
+                StanMagazynowy.lokalizacja, Produkt.cena_jednostkowa
+            ).order_by(Produkt.kod))
+
+def eksport_rotacji(parametry):
+    data_od, data_do, dt_od, dt_do = _okres(parametry, 90)
+    wyniki, ilosc = _rotacja(dt_od, dt_do)
+    return (f'rotacja_{data_od}_{data_do}',
+            ['Kod', 'Nazwa', 'Kategoria', 'Sprzedano'],
+            wyniki.with_entities(Produkt.kod, Produkt.nazwa, Produkt.kategoria, ilosc))
+
+def eksport_dokumentow(parametry):
+    data_od, data_do, _, _ = _okres(parametry, 30)
+    return (f'dokumenty_{data_od}_{data_do}',
+            ['Numer', 'Typ', 'Data', 'Dostawca', 'Zamówienie', 'Uwagi'],
+            _dokumenty(parametry).outerjoin(DokumentMagazynowy.dostawca_rel).outerjoin(
+                DokumentMagazynowy.zamowienie_rel
+            ).with_entities(
+                DokumentMagazynowy.numer, DokumentMagazynowy.typ,
+                DokumentMagazynowy.data_wystawienia, Dostawca.nazwa,
+                Zamowienie.numer, DokumentMagazynowy.uwagi
+            ).order_by(DokumentMagazynowy.data_wystawienia.desc()))
+
+def eksport_faktur(parametry):
+    data_od, data_do, dt_od, dt_do = _okres(parametry, 30)
+    return (f'faktury_{data_od}_{data_do}',
+            ['Numer', 'Data wystawienia', 'Klient', 'NIP', 'Netto', 'VAT', 'Brutto',
+             'Termin płatności', 'Opłacona'],
+            Faktura.query.filter(
+                Faktura.data_wystawienia.between(dt_od, dt_do)
+            ).join(Faktura.klient).with_entities(
+                Faktura.numer, Faktura.data_wystawienia, Klient.nazwa, Klient.nip,
+                Faktura.wartosc_netto, Faktura.wartosc_vat, Faktura.wartosc_brutto,
+                Faktura.termin_platnosci, Faktura.oplacona
+            ).order_by(Faktura.data_wystawienia))
+
+# Raporty do zlecenia w tle: nazwa -> (funkcja eksportu, parametry raportu)
+EKSPORTY = {
+    'sprzedaz': (eksport_sprzedazy, ('data_od', 'data_do')),
+    'stany': (eksport_stanow, ('kategoria', 'tylko_niskie')),
+    'rotacja': (eksport_rotacji, ('data_od', 'data_do')),
+    'dokumenty': (eksport_dokumentow, ('data_od', 'data_do', 'typ')),
+    'faktury': (eksport_faktur, ('data_od', 'data_do')),
+}
+
 # UC10: Generowanie raportów
 @bp.route('/')
 @role_required('Kierownik', 'Administrator')
@@ -18,49 +156,52 @@ def index():
 @role_required('Kierownik', 'Administrator')
 def sales_report():
     """Raport sprzedaży"""
-    # Pobieranie parametrów
-    data_od = request.args.get('data_od', '')
-    data_do = request.args.get('data_do', '')
+    format_ = zadany_format()
+    if format_:
+        return eksport(format_, *eksport_sprzedazy(request.args))
     
     # Domyślnie: ostatni miesiąc
-    if not data_od:
-        data_od = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not data_do:
-        data_do = datetime.now().strftime('%Y-%m-%d')
-    
-    # Konwersja na datetime
-    dt_od = datetime.strptime(data_od, '%Y-%m-%d')
-    dt_do = datetime.strptime(data_do, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-    
-    # Zapytanie o zamówienia
-    zamowienia = Zamowienie.query.filter(
-        Zamowienie.data_zamowienia.between(dt_od, dt_do)
-    ).all()
-    
-    # Obliczenia
-    suma_netto = sum(z.wartosc_netto or 0 for z in zamowienia)
-    suma_brutto = sum(z.wartosc_brutto or 0 for z in zamowienia)
-    liczba_zamowien = len(zamowienia)
-    
-    # Sprzedaż według kategorii - uproszczone
-    sprzedaz_kategorie = []
-    try:
-        # Pobierz wszystkie pozycje zamówień z danego okresu
-        for zamowienie in zamowienia:
-            for pozycja in zamowienie.pozycje:
-                kategoria = pozycja.produkt_rel.kategoria if pozycja.produkt_rel else 'Brak'
-                # Znajdź lub dodaj kategorię
-                found = False
-                for item in sprzedaz_kategorie:
-                    if item[0] == kategoria:
-                        item[1] += float(pozycja.wartosc_netto or 0)
-                        found = True
-                        break
-                if not found:
-                    sprzedaz_kategorie.append([kategoria, float(pozycja.wartosc_netto or 0)])
-    except Exception as e:
-        print(f"Błąd przy kategorii: {e}")
-        sprzedaz_kategorie = []
+    data_od, data_do, dt_od, dt_do = _okres_sprzedazy(request.args)
+    page = request.args.get('page', 1, type=int)
+    
+    okres = Zamowienie.data_zamowienia.between(dt_od, dt_do)
+    
+    def podsumowanie():
+        # Sumy i liczba zamówień liczone w bazie jednym zapytaniem
+        # (zaokrąglenie każdej wartości jak przy odczycie kolumny Numeric(10, 2))
+        sumy = db.session.query(
+            func.coalesce(func.sum(func.round(Zamowienie.wartosc_netto, 2)), 0),
+            func.coalesce(func.sum(func.round(Zamowienie.wartosc_brutto, 2)), 0),
+            func.count(Zamowienie.id)
+        ).filter(okres).one()
+        
+        # Sprzedaż według kategorii - z dziennego zestawienia sprzedaży;
+        # sprzedaż usuniętych produktów trafia do kategorii 'Brak'
+        kategoria = func.coalesce(Produkt.kategoria, 'Brak')
+        wyniki_kategorie = db.session.query(
+            kategoria,
+            func.sum(SprzedazDzienna.wartosc_netto)
+        ).select_from(SprzedazDzienna).outerjoin(
+            Produkt, Produkt.id == SprzedazDzienna.produkt_id
+        ).filter(
+            SprzedazDzienna.dzien.between(dt_od.date(), dt_do.date())
+        ).group_by(kategoria).all()
+        
+        return tuple(sumy) + ([
+            [nazwa, float(wartosc or 0)] for nazwa, wartosc in wyniki_kategorie
+        ],)
+    
+    # Podsumowanie okresu z pamięci podręcznej raportów
+    suma_netto, suma_brutto, liczba_zamowien, sprzedaz_kategorie = wynik_raportu(
+        'sprzedaz', dt_od.date(), dt_do.date(), podsumowanie
+    )
+    
+    # Lista zamówień ładowana osobno, stronicowana
+    zamowienia = Zamowienie.query.options(
+        joinedload(Zamowienie.klient)
+    ).filter(okres).order_by(Zamowienie.data_zamowienia.desc()).paginate(
+        page=page, per_page=20, error_out=False
+    )
     
     return render_template('reports/sales_report.html',
                          zamowienia=zamowienia,
@@ -76,117 +217,90 @@ def sales_report():
 @role_required('Kierownik', 'Magazynier', 'Administrator')
 def inventory_report():
     """Raport stanów magazynowych"""
-    kategoria = request.args.get('kategoria', '')
-    tylko_niskie = request.args.get('tylko_niskie', '') == 'on'
+    format_ = zadany_format()
+    if format_:
+        return eksport(format_, *eksport_stanow(request.args))
     
-    query = StanMagazynowy.query.join(Produkt)
-    
-    if kategoria:
-        query = query.filter(Produkt.kategoria == kategoria)
-    
-    stany = query.all()
+    kategoria = request.args.get('kategoria', '')
+    query, niskie = _stany(request.args)
     
-    if tylko_niskie:
-        stany = [s for s in stany if s.czy_niski_stan()]
+    stany = query.order_by(Produkt.kod).all()
     
-    # Wartość magazynu
-    wartosc_magazynu = sum(
-        float(s.ilosc_dostepna) * float(s.produkt.cena_jednostkowa) 
-        for s in stany
-    )
+    # Wartość magazynu liczona w bazie
+    wartosc_magazynu = query.with_entities(
+        func.sum(StanMagazynowy.ilosc_dostepna * Produkt.cena_jednostkowa)
+    ).scalar() or 0
     
     # Produkty o niskim stanie
-    niskie_stany = [s for s in stany if s.czy_niski_stan()]
+    liczba_niskich = niskie.count()
     
     kategorie = db.session.query(Produkt.kategoria).distinct().all()
     kategorie = [k[0] for k in kategorie if k[0]]
     
+    # Stany z przeszłości z księgi ruchów (najbliższa migawka i ruchy po niej)
+    na_dzien = request.args.get('na_dzien', '')
+    stany_na_dzien = MigawkaStanu.stany_na_dzien(
+        datetime.strptime(na_dzien, '%Y-%m-%d').date()
+    ) if na_dzien else None
+    
     return render_template('reports/inventory_report.html',
                          stany=stany,
-                         niskie_stany=niskie_stany,
+                         liczba_niskich=liczba_niskich,
                          wartosc_magazynu=wartosc_magazynu,
                          kategorie=kategorie,
-                         aktywna_kategoria=kategoria)
+                         aktywna_kategoria=kategoria,
+                         na_dzien=na_dzien,
+                         stany_na_dzien=stany_na_dzien)
 
 @bp.route('/product-rotation')
 @role_required('Kierownik', 'Administrator')
 def product_rotation():
     """Raport rotacji produktów"""
-    data_od = request.args.get('data_od', '')
-    data_do = request.args.get('data_do', '')
-    
-    if not data_od:
-        data_od = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-    if not data_do:
-        data_do = datetime.now().strftime('%Y-%m-%d')
-    
-    dt_od = datetime.strptime(data_od, '%Y-%m-%d')
-    dt_do = datetime.strptime(data_do, '%Y-%m-%d')
-    
-    # Uproszczone zapytanie - zbieramy dane ręcznie
-    produkty_rotacja = []
-    
-    # Pobierz wszystkie zamówienia z okresu
-    zamowienia = Zamowienie.query.filter(
-        Zamowienie.data_zamowienia.between(dt_od, dt_do)
-    ).all()
-    
-    # Zlicz sprzedaż dla każdego produktu
-    sprzedaz_dict = {}
-    for zamowienie in zamowienia:
-        for pozycja in zamowienie.pozycje:
-            produkt_id = pozycja.produkt_id
-            if produkt_id not in sprzedaz_dict:
-                sprzedaz_dict[produkt_id] = {
-                    'produkt': pozycja.produkt_rel,
-                    'ilosc': 0
-                }
-            sprzedaz_dict[produkt_id]['ilosc'] += pozycja.ilosc
-    
-    # Konwertuj do listy i sortuj
-    produkty_rotacja = [
-        (data['produkt'], data['ilosc']) 
-        for data in sprzedaz_dict.values()
-    ]
-    produkty_rotacja.sort(key=lambda x: x[1], reverse=True)
-    
-    # Dodaj produkty które nie były sprzedawane
-    wszystkie_produkty = Produkt.query.filter_by(aktywny=True).all()
-    sprzedane_ids = set(sprzedaz_dict.keys())
-    
-    for produkt in wszystkie_produkty:
-        if produkt.id not in sprzedane_ids:
-            produkty_rotacja.append((produkt, 0))
+    format_ = zadany_format()
+    if format_:
+        return eksport(format_, *eksport_rotacji(request.args))
+    
+    data_od, data_do, dt_od, dt_do = _okres(request.args, 90)
+    wyniki, _ = _rotacja(dt_od, dt_do)
+    produkty_rotacja = [(produkt, int(ilosc)) for produkt, ilosc in wyniki]
     
     return render_template('reports/product_rotation.html',
                          produkty_rotacja=produkty_rotacja,
                          data_od=data_od,
                          data_do=data_do)
 
+@bp.route('/valuation')
+@role_required('Kierownik', 'Administrator')
+def valuation_report():
+    """Wycena magazynu z rotacją i dniami zapasu za okres"""
+    data_od, data_do, dt_od, dt_do = _okres(request.args, 90)
+    produkty, kategorie, razem = wycena_okresu(dt_od.date(), dt_do.date())
+    
+    # Kody i nazwy tylko dla wyświetlanych produktów
+    pozycje = wiersze(produkty, LIMIT_PRODUKTOW_WYCENY)
+    opisy = {p.id: p for p in db.session.query(Produkt.id, Produkt.kod, Produkt.nazwa).filter(
+        Produkt.id.in_([w['etykiety'] for w in pozycje]))}
+    
+    return render_template('reports/valuation_report.html',
+                         pozycje=pozycje,
+                         opisy=opisy,
+                         kategorie=wiersze(kategorie),
+                         razem=wiersze(razem)[0],
+                         data_od=data_od,
+                         data_do=data_do)
+
 @bp.route('/documents')
 @role_required('Kierownik', 'Administrator')
 def documents_report():
     """Raport dokumentów magazynowych"""
-    typ = request.args.get('typ', '')
-    data_od = request.args.get('data_od', '')
-    data_do = request.args.get('data_do', '')
-    
-    if not data_od:
-        data_od = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not data_do:
-        data_do = datetime.now().strftime('%Y-%m-%d')
-    
-    dt_od = datetime.strptime(data_od, '%Y-%m-%d')
-    dt_do = datetime.strptime(data_do, '%Y-%m-%d')
+    format_ = zadany_format()
+    if format_:
+        return eksport(format_, *eksport_dokumentow(request.args))
     
-    query = DokumentMagazynowy.query.filter(
-        DokumentMagazynowy.data_wystawienia.between(dt_od, dt_do)
-    )
-    
-    if typ:
-        query = query.filter_by(typ=TypDokumentu[typ])
+    typ = request.args.get('typ', '')
+    data_od, data_do, _, _ = _okres(request.args, 30)
     
-    dokumenty = query.order_by(DokumentMagazynowy.data_wystawienia.desc()).all()
+    dokumenty = _dokumenty(request.args).order_by(DokumentMagazynowy.data_wystawienia.desc()).all()
     
     return render_template('reports/documents_report.html',
                          dokumenty=dokumenty,
@@ -198,25 +312,30 @@ def documents_report():
 @role_required('Kierownik', 'Administrator')
 def invoices_report():
     """Raport faktur"""
-    data_od = request.args.get('data_od', '')
-    data_do = request.args.get('data_do', '')
-    
-    if not data_od:
-        data_od = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    if not data_do:
-        data_do = datetime.now().strftime('%Y-%m-%d')
-    
-    dt_od = datetime.strptime(data_od, '%Y-%m-%d')
-    dt_do = datetime.strptime(data_do, '%Y-%m-%d')
-    
-    faktury = Faktura.query.filter(
-        Faktura.data_wystawienia.between(dt_od, dt_do)
-    ).all()
-    
-    suma_netto = sum(f.wartosc_netto for f in faktury)
-    suma_brutto = sum(f.wartosc_brutto for f in faktury)
-    liczba_faktur = len(faktury)
-    faktury_oplacone = sum(1 for f in faktury if f.oplacona)
+    format_ = zadany_format()
+    if format_:
+        return eksport(format_, *eksport_faktur(request.args))
+    
+    data_od, data_do, dt_od, dt_do = _okres(request.args, 30)
+    query = Faktura.query.filter(Faktura.data_wystawienia.between(dt_od, dt_do))
+    
+    def zestawienie():
+        # Sumy liczone w bazie, lista jako wiersze kolumn (bez obiektów ORM)
+        sumy = query.with_entities(
+            func.coalesce(func.sum(func.round(Faktura.wartosc_netto, 2)), 0),
+            func.coalesce(func.sum(func.round(Faktura.wartosc_brutto, 2)), 0),
+            func.count(Faktura.id),
+            func.count(db.case((Faktura.oplacona == True, 1)))
+        ).one()
+        faktury = query.join(Faktura.klient).with_entities(
+            Faktura.numer, Klient.nazwa.label('klient'), Faktura.wartosc_brutto
+        ).order_by(Faktura.data_wystawienia).all()
+        return tuple(sumy) + (faktury,)
+    
+    # Zestawienie okresu z pamięci podręcznej raportów
+    suma_netto, suma_brutto, liczba_faktur, faktury_oplacone, faktury = wynik_raportu(
+        'faktury', dt_od.date(), dt_do.date(), zestawienie
+    )
     
     return render_template('reports/invoices_report.html',
                          faktury=faktury,
@@ -225,4 +344,92 @@ def invoices_report():
                          liczba_faktur=liczba_faktur,
                          faktury_oplacone=faktury_oplacone,
                          data_od=data_od,
-                         data_do=data_do)
\ No newline at end of file
+                         data_do=data_do)
+
+# Raporty liczone w tle (app/jobs.py)
+def _zadanie_lub_404(zadanie_id):
+    """Zadanie widoczne dla zlecającego i administratora"""
+    zadanie = db.session.get(ZadanieRaportu, zadanie_id)
+    if zadanie is None or (zadanie.uzytkownik_id != g.user.id
+                           and g.user.rola.value != 'Administrator'):
+        abort(404)
+    return zadanie
+
+def _stan_zadania(zadanie):
+    return {
+        'id': zadanie.id,
+        'raport': zadanie.raport,
+        'parametry': zadanie.parametry,
+        'status': zadanie.status.name,
+        'opis_statusu': zadanie.status.value,
+        'data_utworzenia': zadanie.data_utworzenia.isoformat(),
+        'data_zakonczenia': zadanie.data_zakonczenia.isoformat() if zadanie.data_zakonczenia else None,
+        'liczba_wierszy': zadanie.liczba_wierszy,
+        'blad': zadanie.blad,
+        'plik': (url_for('reports.download_job', zadanie_id=zadanie.id)
+                 if zadanie.status == StatusZadania.GOTOWE else None),
+    }
+
+@bp.route('/jobs', methods=['POST'])
+@role_required('Kierownik', 'Administrator')
+def submit_job():
+    """Zlecenie raportu do policzenia w tle (formularz lub JSON)"""
+    dane = request.get_json(silent=True) if request.is_json else request.form
+    
+    try:
+        # JSON musi być obiektem z tekstowymi parametrami, jak pola formularza
+        if not isinstance(dane, dict):
+            raise TypeError
+        raport = dane.get('raport')
+        funkcja, nazwy_parametrow = EKSPORTY[raport]
+        parametry = {n: dane[n] for n in nazwy_parametrow if dane.get(n)}
+        if not all(isinstance(wartosc, str) for wartosc in parametry.values()):
+            raise TypeError
+        # Budowa zapytania sprawdza parametry, zanim zadanie trafi do kolejki
+        nazwa, _, _ = funkcja(parametry)
+    except (KeyError, ValueError, TypeError):
+        if request.is_json:
+            return jsonify({'blad': 'Nieznany raport lub niepoprawne parametry'}), 400
+        flash('Nieznany raport lub niepoprawne parametry.', 'danger')
+        return redirect(url_for('reports.index'))
+    
+    zadanie = current_app.extensions['kolejka_raportow'].zglos(
+        raport, parametry, g.user.id, f'{nazwa}.csv.gz'
+    )
+    
+    if request.is_json:
+        return jsonify(_stan_zadania(zadanie)), 202
+    flash(f'Raport zlecony do przygotowania w tle (zadanie #{zadanie.id}).', 'info')
+    return redirect(url_for('reports.jobs'))
+
+@bp.route('/jobs')
+@role_required('Kierownik', 'Administrator')
+def jobs():
+    """Lista raportów zleconych w tle"""
+    current_app.extensions['kolejka_raportow'].uporzadkuj()
+    zadania = ZadanieRaportu.query.filter_by(uzytkownik_id=g.user.id).order_by(
+        ZadanieRaportu.data_utworzenia.desc(), ZadanieRaportu.id.desc()
+    ).limit(50).all()
+    
+    return render_template('reports/jobs.html',
+                         zadania=zadania,
+                         oczekujace=[z.id for z in zadania if not z.zakonczone])
+
+@bp.route('/jobs/<int:zadanie_id>')
+@role_required('Kierownik', 'Administrator')
+def job_status(zadanie_id):
+    """Stan zadania raportu (JSON) - do odpytywania"""
+    current_app.extensions['kolejka_raportow'].uporzadkuj()
+    return jsonify(_stan_zadania(_zadanie_lub_404(zadanie_id)))
+
+@bp.route('/jobs/<int:zadanie_id>/download')
+@role_required('Kierownik', 'Administrator')
+def download_job(zadanie_id):
+    """Pobranie gotowego wyniku zadania"""
+    zadanie = _zadanie_lub_404(zadanie_id)
+    sciezka = current_app.extensions['kolejka_raportow'].sciezka(zadanie)
+    if zadanie.status != StatusZadania.GOTOWE or not os.path.exists(sciezka):
+        abort(404)
+    
+    return send_file(sciezka, mimetype='application/gzip', as_attachment=True,
+                     download_name=zadanie.nazwa_pliku)
@@ -1,7 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, g
+from flask import Blueprint, render_template, redirect, url_for, flash, request, g, jsonify
 from app.models import (db, DokumentMagazynowy, PozycjaDokumentu, Produkt, 
-                        StanMagazynowy, Dostawca, TypDokumentu, Log, Zamowienie)
+                        StanMagazynowy, Dostawca, TypDokumentu, Log, Zamowienie,
+                        LicznikDokumentow)
 from app.routes.auth import login_required, role_required
+from app.signals import dokument_zaksiegowany, status_zamowienia_zmieniony
+from app.stock import (pozycje_z_formularza, identyfikator_z_formularza,
+                       zaksieguj_dokument, wczytaj_pozycje_importu, BrakTowaru)
+from app.pagination import stronicuj
+from app.loading import wczytaj_lub_404
 from datetime import datetime
 
 bp = Blueprint('warehouse', __name__, url_prefix='/warehouse')
@@ -10,14 +16,11 @@ bp = Blueprint('warehouse', __name__, url_prefix='/warehouse')
 @login_required
 def index():
     """Strona główna magazynu"""
-    stany = StanMagazynowy.query.join(Produkt).filter(
-        Produkt.aktywny == True
-    ).all()
-    
-    niskie_stany = [s for s in stany if s.czy_niski_stan()]
+    # Sortowanie w Pythonie - ORDER BY nazwa skłaniał SQLite do przejścia wszystkich
+    # produktów indeksem nazw zamiast indeksu niedoboru (niskich stanów jest niewiele)
+    niskie_stany = sorted(StanMagazynowy.niskie_stany(), key=lambda s: s.produkt.nazwa)
     
     return render_template('warehouse/index.html', 
-                         stany=stany, 
                          niskie_stany=niskie_stany)
 
 # UC4: Rejestrowanie przyjęcia towaru (PZ)
@@ -26,22 +29,23 @@ def index():
 def pz_add():
     """Dodawanie dokumentu przyjęcia (PZ)"""
     if request.method == 'POST':
-        dostawca_id = request.form.get('dostawca_id')
         pozycje_data = request.form.getlist('produkt_id[]')
         
         if not pozycje_data:
             flash('Dodaj co najmniej jedną pozycję do dokumentu.', 'warning')
-            return render_template('warehouse/pz_form.html', 
-                                 dostawcy=Dostawca.query.filter_by(aktywny=True).all(),
-                                 produkty=Produkt.query.filter_by(aktywny=True).all())
+            return render_template('warehouse/pz_form.html')
         
-        # Generowanie numeru dokumentu
-        rok = datetime.now().year
-        liczba = DokumentMagazynowy.query.filter_by(typ=TypDokumentu.PRZYJECIE).count() + 1
-        numer = f"PZ/{rok}/{liczba:05d}"
+        # Ukryte pola zostają puste, gdy nie wybrano pozycji z podpowiedzi
+        try:
+            dostawca_id = identyfikator_z_formularza(request.form, 'dostawca_id', 'dostawcę')
+            pozycje = pozycje_z_formularza(request.form)
+        except ValueError as e:
+            flash(str(e), 'warning')
+            return render_template('warehouse/pz_form.html')
         
+        # Generowanie numeru dokumentu
         dokument = DokumentMagazynowy(
-            numer=numer,
+            numer=LicznikDokumentow.generuj_numer('PZ'),
             typ=TypDokumentu.PRZYJECIE,
             dostawca_id=dostawca_id,
             uwagi=request.form.get('uwagi')
@@ -50,23 +54,11 @@ def pz_add():
         db.session.add(dokument)
         db.session.flush()
         
-        # Dodawanie pozycji
-        for i, produkt_id in enumerate(pozycje_data):
-            ilosc = int(request.form.getlist('ilosc[]')[i])
-            
-            pozycja = PozycjaDokumentu(
-                dokument_id=dokument.id,
-                produkt_id=int(produkt_id),
-                ilosc=ilosc
-            )
-            db.session.add(pozycja)
-            
-            # Aktualizacja stanu magazynowego
-            stan = StanMagazynowy.query.filter_by(produkt_id=int(produkt_id)).first()
-            if stan:
-                stan.aktualizuj_stan(ilosc, 'dodaj')
+        # Dodawanie pozycji i aktualizacja stanów magazynowych
+        zaksieguj_dokument(dokument, pozycje)
         
         db.session.commit()
+        dokument_zaksiegowany.send(dokument)
         
         Log.dodaj_log(g.user.id, 'Przyjęcie towaru', 
                      f'Utworzono dokument PZ: {dokument.numer}')
@@ -74,12 +66,41 @@ def pz_add():
         flash(f'Dokument {dokument.numer} został utworzony.', 'success')
         return redirect(url_for('warehouse.pz_detail', dokument_id=dokument.id))
     
-    dostawcy = Dostawca.query.filter_by(aktywny=True).all()
-    produkty = Produkt.query.filter_by(aktywny=True).order_by(Produkt.nazwa).all()
+    # Dostawcy i produkty podpowiadani są z /api/podpowiedzi
+    return render_template('warehouse/pz_form.html')
+
+@bp.route('/pz/import', methods=['POST'])
+@role_required('Magazynier', 'Administrator')
+def pz_import():
+    """Przyjęcie całej dostawy z JSON-a lub pliku CSV (np. ze skanera)"""
+    try:
+        parametry, pozycje = wczytaj_pozycje_importu(request)
+    except ValueError as e:
+        return jsonify({'blad': str(e)}), 400
+    
+    dokument = DokumentMagazynowy(
+        numer=LicznikDokumentow.generuj_numer('PZ'),
+        typ=TypDokumentu.PRZYJECIE,
+        dostawca_id=parametry['dostawca_id'],
+        uwagi=parametry['uwagi']
+    )
+    
+    db.session.add(dokument)
+    db.session.flush()
     
-    return render_template('warehouse/pz_form.html', 
-                         dostawcy=dostawcy, 
-                         produkty=produkty)
+    zaksieguj_dokument(dokument, pozycje)
+    
+    db.session.commit()
+    dokument_zaksiegowany.send(dokument)
+    
+    Log.dodaj_log(g.user.id, 'Przyjęcie towaru', 
+                 f'Zaimportowano dokument PZ: {dokument.numer} ({len(pozycje)} pozycji)')
+    
+    return jsonify({
+        'id': dokument.id,
+        'numer': dokument.numer,
+        'liczba_pozycji': len(pozycje)
+    }), 201
 
 # UC5: Rejestrowanie wydania towaru (WZ)
 @bp.route('/wz/add', methods=['GET', 'POST'])
@@ -93,16 +114,19 @@ def wz_add():
         if not pozycje_data:
             flash('Dodaj co najmniej jedną pozycję do dokumentu.', 'warning')
             return render_template('warehouse/wz_form.html',
-                                 zamowienia=Zamowienie.query.filter_by(status='GOTOWE').all(),
-                                 produkty=Produkt.query.filter_by(aktywny=True).all())
+                                 zamowienia=Zamowienie.query.filter_by(status='GOTOWE').all())
         
-        # Generowanie numeru dokumentu
-        rok = datetime.now().year
-        liczba = DokumentMagazynowy.query.filter_by(typ=TypDokumentu.WYDANIE).count() + 1
-        numer = f"WZ/{rok}/{liczba:05d}"
+        # Ukryte pola produktów zostają puste, gdy nie wybrano ich z podpowiedzi
+        try:
+            pozycje = pozycje_z_formularza(request.form)
+        except ValueError as e:
+            flash(str(e), 'warning')
+            return render_template('warehouse/wz_form.html',
+                                 zamowienia=Zamowienie.query.filter_by(status='GOTOWE').all())
         
+        # Generowanie numeru dokumentu
         dokument = DokumentMagazynowy(
-            numer=numer,
+            numer=LicznikDokumentow.generuj_numer('WZ'),
             typ=TypDokumentu.WYDANIE,
             zamowienie_id=zamowienie_id,
             uwagi=request.form.get('uwagi')
@@ -111,27 +135,14 @@ def wz_add():
         db.session.add(dokument)
         db.session.flush()
         
-        # Sprawdzenie dostępności i dodawanie pozycji
-        for i, produkt_id in enumerate(pozycje_data):
-            ilosc = int(request.form.getlist('ilosc[]')[i])
-            
-            stan = StanMagazynowy.query.filter_by(produkt_id=int(produkt_id)).first()
-            
-            if not stan or stan.ilosc_dostepna < ilosc:
-                db.session.rollback()
-                produkt = Produkt.query.get(int(produkt_id))
-                flash(f'Brak wystarczającej ilości produktu: {produkt.nazwa}', 'danger')
-                return redirect(url_for('warehouse.wz_add'))
-            
-            pozycja = PozycjaDokumentu(
-                dokument_id=dokument.id,
-                produkt_id=int(produkt_id),
-                ilosc=ilosc
-            )
-            db.session.add(pozycja)
-            
-            # Aktualizacja stanu magazynowego
-            stan.aktualizuj_stan(ilosc, 'odejmij')
+        # Wydanie pozycji - cały dokument jest wycofywany, jeśli brakuje towaru
+        try:
+            zaksieguj_dokument(dokument, pozycje)
+        except BrakTowaru as e:
+            db.session.rollback()
+            produkt = Produkt.query.get(e.produkt_id)
+            flash(f'Brak wystarczającej ilości produktu: {produkt.nazwa}', 'danger')
+            return redirect(url_for('warehouse.wz_add'))
         
         # Aktualizacja statusu zamówienia
         if zamowienie_id:
@@ -139,6 +150,9 @@ def wz_add():
             zamowienie.zmien_status('WYSLANE')
         
         db.session.commit()
+        dokument_zaksiegowany.send(dokument)
+        if zamowienie_id:
+            status_zamowienia_zmieniony.send(zamowienie)
         
         Log.dodaj_log(g.user.id, 'Wydanie towaru', 
                      f'Utworzono dokument WZ: {dokument.numer}')
@@ -149,27 +163,24 @@ def wz_add():
     zamowienia = Zamowienie.query.filter(
         Zamowienie.status.in_(['GOTOWE', 'W_REALIZACJI'])
     ).all()
-    produkty = Produkt.query.filter_by(aktywny=True).order_by(Produkt.nazwa).all()
     
+    # Produkty podpowiadane są z /api/podpowiedzi
     return render_template('warehouse/wz_form.html', 
-                         zamowienia=zamowienia,
-                         produkty=produkty)
+                         zamowienia=zamowienia)
 
 @bp.route('/documents')
 @login_required
 def documents_list():
     """Lista dokumentów magazynowych"""
     typ = request.args.get('typ', '')
-    page = request.args.get('page', 1, type=int)
     
     query = DokumentMagazynowy.query
     
     if typ:
         query = query.filter_by(typ=TypDokumentu[typ])
     
-    dokumenty = query.order_by(DokumentMagazynowy.data_wystawienia.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    dokumenty = stronicuj(query, (DokumentMagazynowy.data_wystawienia, DokumentMagazynowy.id),
+                          malejaco=True)
     
     return render_template('warehouse/documents_list.html', 
                          dokumenty=dokumenty,
@@ -179,14 +190,14 @@ def documents_list():
 @login_required
 def pz_detail(dokument_id):
     """Szczegóły dokumentu PZ"""
-    dokument = DokumentMagazynowy.query.get_or_404(dokument_id)
+    dokument = wczytaj_lub_404('dokument_pz', dokument_id)
     return render_template('warehouse/pz_detail.html', dokument=dokument)
 
 @bp.route('/wz/<int:dokument_id>')
 @login_required
 def wz_detail(dokument_id):
     """Szczegóły dokumentu WZ"""
-    dokument = DokumentMagazynowy.query.get_or_404(dokument_id)
+    dokument = wczytaj_lub_404('dokument_wz', dokument_id)
     return render_template('warehouse/wz_detail.html', dokument=dokument)
 
 @bp.route('/suppliers')
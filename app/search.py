@@ -0,0 +1,395 @@
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from flask import current_app, has_app_context
+from sqlalchemy import event, DDL
+from sqlalchemy.orm import Session, object_session
+from app.models import db, Produkt, Klient, Dostawca
+
+
+TABELA = 'produkt_fts'
+
+# Wagi kolumn w ocenie trafności; kod zaczynający się od frazy ma premię
+WAGI = {'kod': 10, 'nazwa': 5, 'kategoria': 2, 'opis': 1}
+PREMIA_KODU = 20
+
+# Litery, których NFKD nie rozkłada na literę bazową i znak diakrytyczny
+_LITERY = str.maketrans({'ł': 'l', 'Ł': 'L', 'đ': 'd', 'Đ': 'D', 'ø': 'o', 'Ø': 'O'})
+
+_SLOWO = re.compile(r'[^\W_]+')
+
+_UTWORZ = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5("
+    f"kod, nazwa, kategoria, opis, tokenize='unicode61 remove_diacritics 0', prefix='1 2 3')",
+]
+
+
+def normalizuj(tekst):
+    """Sprowadza tekst do małych liter bez polskich znaków (Łódź -> lodz)"""
+    if not tekst or tekst.isascii():
+        return (tekst or '').casefold()
+    tekst = unicodedata.normalize('NFKD', (tekst or '').translate(_LITERY))
+    return ''.join(z for z in tekst if not unicodedata.combining(z)).casefold()
+
+
+def _wiersz(produkt):
+    return {
+        'id': produkt.id,
+        'kod': normalizuj(produkt.kod),
+        'nazwa': normalizuj(produkt.nazwa),
+        'kategoria': normalizuj(produkt.kategoria),
+        'opis': normalizuj(produkt.opis),
+    }
+
+
+def _istnieje(polaczenie):
+    return polaczenie.dialect.name == 'sqlite' and polaczenie.execute(
+        db.text("SELECT 1 FROM sqlite_master WHERE name = :nazwa"), {'nazwa': TABELA}
+    ).first() is not None
+
+
+def sprawdz_indeks(app):
+    """Zapamiętuje w aplikacji, czy baza ma tabelę indeksu (raz, po db.create_all)"""
+    with db.engine.connect() as polaczenie:
+        app.extensions['wyszukiwarka_fts'] = _istnieje(polaczenie)
+
+
+def _dostepny():
+    return has_app_context() and current_app.extensions.get('wyszukiwarka_fts', False)
+
+
+def utworz_indeks(polaczenie):
+    """Tworzy tabelę FTS5, jeśli jej jeszcze nie ma
+    
+    Działające już procesy aplikacji zaczną z niej korzystać po ponownym uruchomieniu.
+    """
+    if not _istnieje(polaczenie):
+        for polecenie in _UTWORZ:
+            polaczenie.execute(db.text(polecenie))
+    current_app.extensions['wyszukiwarka_fts'] = True
+
+
+def przebuduj_indeks(polaczenie):
+    """Wypełnia indeks od nowa na podstawie tabeli produktów"""
+    polaczenie.execute(db.text(f"DELETE FROM {TABELA}"))
+    wynik = polaczenie.execute(db.select(
+        Produkt.id, Produkt.kod, Produkt.nazwa, Produkt.kategoria, Produkt.opis
+    ))
+    liczba = 0
+    while True:
+        partia = wynik.fetchmany(5000)
+        if not partia:
+            break
+        polaczenie.execute(
+            db.text(f"INSERT INTO {TABELA}(rowid, kod, nazwa, kategoria, opis) "
+                    f"VALUES (:id, :kod, :nazwa, :kategoria, :opis)"),
+            [_wiersz(p) for p in partia]
+        )
+        liczba += len(partia)
+    return liczba
+
+
+def slowa_frazy(fraza):
+    """Dzieli wpisaną frazę na znormalizowane słowa"""
+    return _SLOWO.findall(normalizuj(fraza))
+
+
+def _ocena(fts, slowa):
+    """Suma wag kolumn, w których występuje każde ze słów frazy"""
+    ocena = db.case((fts.c.kod.like(f'{slowa[0]}%'), PREMIA_KODU), else_=0)
+    for kolumna, waga in WAGI.items():
+        for slowo in slowa:
+            ocena = ocena + db.case((db.func.instr(fts.c[kolumna], slowo) > 0, waga), else_=0)
+    return ocena
+
+
+def _fts():
+    return db.table(TABELA, *(db.column(k) for k in ('rowid', *WAGI)))
+
+
+def _dopasowanie(slowa):
+    """Warunek MATCH - każde słowo jako prefiks"""
+    return db.literal_column(TABELA).op('MATCH')(' '.join(f'"{s}"*' for s in slowa))
+
+
+def _bez_indeksu(query, fraza):
+    """Baza bez FTS5 - dotychczasowe wyszukiwanie po fragmencie kodu i nazwy"""
+    return query.filter(
+        db.or_(
+            Produkt.kod.contains(fraza),
+            Produkt.nazwa.contains(fraza)
+        )
+    )
+
+
+def filtruj(query, fraza):
+    """Zawęża zapytanie o produkty do pasujących do frazy, od najtrafniejszych"""
+    slowa = slowa_frazy(fraza)
+    
+    if not slowa or not _dostepny():
+        return _bez_indeksu(query, fraza).order_by(Produkt.nazwa)
+    
+    # Ocenione są wszystkie trafienia, a dopiero potem obcinane do SEARCH_MAX_HITS
+    # najtrafniejszych; remisy rozstrzyga bm25 z wagami kolumn (mniejszy - lepszy)
+    fts = _fts()
+    ocena = _ocena(fts, slowa)
+    bm25 = db.func.bm25(db.literal_column(TABELA), *WAGI.values())
+    trafienia = db.select(
+        fts.c.rowid.label('produkt_id'), ocena.label('ocena'), bm25.label('bm25')
+    ).where(_dopasowanie(slowa)).order_by(ocena.desc(), bm25).limit(
+        current_app.config.get('SEARCH_MAX_HITS', 500)
+    ).subquery()
+    
+    return query.join(trafienia, trafienia.c.produkt_id == Produkt.id).order_by(
+        trafienia.c.ocena.desc(), trafienia.c.bm25, Produkt.nazwa
+    )
+
+
+def zapytanie_liczby(query, fraza):
+    """Zapytanie o wszystkie produkty pasujące do frazy - do COUNT, bez oceny i limitu"""
+    slowa = slowa_frazy(fraza)
+    
+    if not slowa or not _dostepny():
+        return _bez_indeksu(query, fraza)
+    
+    fts = _fts()
+    return query.filter(Produkt.id.in_(db.select(fts.c.rowid).where(_dopasowanie(slowa))))
+
+
+def _zapisz(mapper, polaczenie, produkt):
+    if _dostepny():
+        polaczenie.execute(db.text(f"DELETE FROM {TABELA} WHERE rowid = :id"), {'id': produkt.id})
+        polaczenie.execute(
+            db.text(f"INSERT INTO {TABELA}(rowid, kod, nazwa, kategoria, opis) "
+                    f"VALUES (:id, :kod, :nazwa, :kategoria, :opis)"),
+            _wiersz(produkt)
+        )
+
+
+def _usun(mapper, polaczenie, produkt):
+    if _dostepny():
+        polaczenie.execute(db.text(f"DELETE FROM {TABELA} WHERE rowid = :id"), {'id': produkt.id})
+
+
+class IndeksPodpowiedzi:
+    """Posortowane słowa kodu, nazwy i NIP-u aktywnych rekordów w pamięci procesu
+    
+    Słowa i identyfikatory trzymane są w dwóch równoległych tablicach, więc
+    podpowiedź to wyszukiwanie binarne zakresu prefiksu zamiast zapytania.
+    """
+    
+    # Maksymalna liczba przejrzanych słów przy jednym wyszukiwaniu
+    LIMIT_PRZEGLADANIA = 5000
+    
+    def __init__(self, nazwa, model, pola, dane=(), ttl=600):
+        self.nazwa = nazwa
+        self.model = model
+        self.pola = pola
+        self.dane = dane
+        self.ttl = ttl
+        self._slowa = []
+        self._ids = array('q')
+        self._wpisy = {}
+        self._wygasa = None
+        self._odswiezanie = False
+        self._lock = threading.Lock()
+        # Jedna przebudowa naraz; zmiany z jej czasu trafiają do _zmiany i są
+        # nanoszone na nowy indeks przy podmianie (_wersja liczy zmiany)
+        self._przebudowa = threading.RLock()
+        self._wersja = 0
+        self._zmiany = None
+    
+    def _wpis(self, rekord):
+        """Tekst podpowiedzi, słowa do wyszukiwania i dodatkowe dane rekordu"""
+        wartosci = [str(getattr(rekord, p)) for p in self.pola if getattr(rekord, p)]
+        klucze = set()
+        for wartosc in wartosci:
+            slowa = slowa_frazy(wartosc)
+            klucze.update(slowa)
+            # Kod lub NIP wpisywany bez separatorów, np. 7251002030
+            if len(slowa) > 1 and not any(z.isspace() for z in wartosc):
+                klucze.add(''.join(slowa))
+        return (' - '.join(wartosci), tuple(sys.intern(k) for k in klucze),
+                *(str(getattr(rekord, d)) for d in self.dane))
+    
+    def przebuduj(self):
+        """Wczytuje wszystkie aktywne rekordy i podmienia indeks"""
+        with self._przebudowa:
+            with self._lock:
+                wersja = self._wersja
+                self._zmiany = []
+            try:
+                kolumny = [getattr(self.model, k) for k in ('id', *self.pola, *self.dane)]
+                wpisy = {
+                    rekord.id: self._wpis(rekord)
+                    for rekord in db.session.query(*kolumny).filter(self.model.aktywny == True)
+                }
+                pary = sorted((s, i) for i, wpis in wpisy.items() for s in wpis[1])
+                
+                with self._lock:
+                    self._slowa = [s for s, _ in pary]
+                    self._ids = array('q', (i for _, i in pary))
+                    self._wpisy = wpisy
+                    # Zmiany zatwierdzone w trakcie odczytu mogły go ominąć - ponowne
+                    # naniesienie zmiany, którą odczyt już widział, niczego nie psuje
+                    if self._wersja != wersja:
+                        for rekord_id, wpis in self._zmiany:
+                            self._zastap(rekord_id, wpis)
+                    self._wygasa = time.monotonic() + self.ttl
+            finally:
+                with self._lock:
+                    self._zmiany = None
+    
+    def zbuduj(self):
+        """Buduje indeks, jeśli nie został jeszcze zbudowany (np. przez rozgrzewkę)"""
+        with self._przebudowa:
+            if self._wygasa is None:
+                self.przebuduj()
+    
+    def _odswiez_w_tle(self, app):
+        try:
+            with app.app_context():
+                self.przebuduj()
+        finally:
+            self._odswiezanie = False
+    
+    def aktualizuj(self, rekord_id, wpis):
+        """Zastępuje słowa jednego rekordu; wpis None usuwa go z indeksu"""
+        with self._lock:
+            self._wersja += 1
+            if self._zmiany is not None:
+                self._zmiany.append((rekord_id, wpis))
+            self._zastap(rekord_id, wpis)
+    
+    def _zastap(self, rekord_id, wpis):
+        """Podmienia słowa rekordu w tablicach (wywoływane pod blokadą)"""
+        stary = self._wpisy.pop(rekord_id, None)
+        if stary is not None:
+            for slowo in stary[1]:
+                i = bisect_left(self._slowa, slowo)
+                while i < len(self._slowa) and self._slowa[i] == slowo:
+                    if self._ids[i] == rekord_id:
+                        del self._slowa[i]
+                        del self._ids[i]
+                        break
+                    i += 1
+        if wpis is not None:
+            self._wpisy[rekord_id] = wpis
+            for slowo in wpis[1]:
+                i = bisect_right(self._slowa, slowo)
+                self._slowa.insert(i, slowo)
+                self._ids.insert(i, rekord_id)
+    
+    def szukaj(self, fraza, limit=10):
+        """Zwraca do `limit` rekordów, których słowa zaczynają się od słów frazy"""
+        slowa = slowa_frazy(fraza)
+        if not slowa:
+            return []
+        if self._wygasa is None:
+            self.zbuduj()
+        elif time.monotonic() >= self._wygasa and not self._odswiezanie:
+            # Po wygaśnięciu podpowiedzi korzystają ze starego indeksu do końca przebudowy
+            self._odswiezanie = True
+            threading.Thread(target=self._odswiez_w_tle, args=(current_app._get_current_object(),),
+                             name=f'podpowiedzi-{self.nazwa}', daemon=True).start()
+        
+        wyniki, widziane = [], set()
+        with self._lock:
+            # Przeglądany jest najwęższy zakres, pozostałe słowa sprawdzane są na kandydatach
+            zakresy = [(bisect_left(self._slowa, s), bisect_left(self._slowa, s + '\uffff'))
+                       for s in slowa]
+            i, koniec = min(zakresy, key=lambda z: z[1] - z[0])
+            koniec = min(koniec, i + self.LIMIT_PRZEGLADANIA)
+            while i < koniec and len(wyniki) < limit:
+                rekord_id = self._ids[i]
+                i += 1
+                if rekord_id in widziane:
+                    continue
+                widziane.add(rekord_id)
+                wpis = self._wpisy[rekord_id]
+                if all(any(k.startswith(s) for k in wpis[1]) for s in slowa):
+                    wyniki.append((rekord_id, wpis))
+        return wyniki
+
+
+# Rodzaje podpowiedzi: model, pola przeszukiwane i dodatkowe dane zwracane z wynikiem
+RODZAJE_PODPOWIEDZI = {
+    'produkty': (Produkt, ('kod', 'nazwa'), ('cena_jednostkowa',)),
+    'klienci': (Klient, ('nazwa', 'nip'), ()),
+    'dostawcy': (Dostawca, ('nazwa', 'nip'), ()),
+}
+
+
+def indeksy_podpowiedzi():
+    """Indeksy podpowiedzi bieżącej aplikacji (rodzaj -> IndeksPodpowiedzi)"""
+    return current_app.extensions['podpowiedzi']
+
+
+def _zmiana_podpowiedzi(rodzaj, usuniety=False):
+    """Zapamiętuje zmianę rekordu - indeks aktualizowany jest dopiero po commicie"""
+    def zapamietaj(mapper, polaczenie, rekord):
+        if not has_app_context():
+            return
+        indeks = indeksy_podpowiedzi()[rodzaj]
+        wpis = None if usuniety or not rekord.aktywny else indeks._wpis(rekord)
+        object_session(rekord).info.setdefault('podpowiedzi', []).append((indeks, rekord.id, wpis))
+    return zapamietaj
+
+
+def _po_commicie(sesja):
+    for indeks, rekord_id, wpis in sesja.info.pop('podpowiedzi', []):
+        indeks.aktualizuj(rekord_id, wpis)
+
+
+def _po_wycofaniu(sesja):
+    sesja.info.pop('podpowiedzi', None)
+
+
+def _rozgrzej(app):
+    """Buduje indeksy podpowiedzi, zanim ktoś zacznie pisać w polu wyboru"""
+    try:
+        with app.app_context():
+            for indeks in app.extensions['podpowiedzi'].values():
+                indeks.zbuduj()
+    except Exception:
+        # Podpowiedzi zbudują indeks same przy pierwszym wyszukiwaniu
+        app.logger.exception('Nie udało się zbudować indeksów podpowiedzi')
+
+
+def init_app(app):
+    """Tworzy indeksy podpowiedzi aplikacji i podpina ich aktualizację pod zapis rekordów"""
+    ttl = app.config.get('TYPEAHEAD_INDEX_TTL', 600)
+    app.extensions['podpowiedzi'] = {
+        rodzaj: IndeksPodpowiedzi(rodzaj, model, pola, dane, ttl=ttl)
+        for rodzaj, (model, pola, dane) in RODZAJE_PODPOWIEDZI.items()
+    }
+    
+    if app.config.get('TYPEAHEAD_WARMUP', True):
+        # Budowa w tle od pierwszego żądania - komendy CLI nie wczytują indeksów
+        start = threading.Lock()
+        
+        @app.before_request
+        def rozgrzej_podpowiedzi():
+            if start.acquire(blocking=False):
+                threading.Thread(target=_rozgrzej, args=(app,), name='podpowiedzi-rozgrzewka',
+                                 daemon=True).start()
+    
+    if not event.contains(Produkt, 'after_insert', _zapisz):
+        event.listen(Produkt, 'after_insert', _zapisz)
+        event.listen(Produkt, 'after_update', _zapisz)
+        event.listen(Produkt, 'after_delete', _usun)
+        # Nowa baza SQLite dostaje indeks razem z tabelą produktów
+        for polecenie in _UTWORZ:
+            event.listen(Produkt.__table__, 'after_create',
+                         DDL(polecenie).execute_if(dialect='sqlite'))
+        
+        for rodzaj, (model, _, _) in RODZAJE_PODPOWIEDZI.items():
+            event.listen(model, 'after_insert', _zmiana_podpowiedzi(rodzaj))
+            event.listen(model, 'after_update', _zmiana_podpowiedzi(rodzaj))
+            event.listen(model, 'after_delete', _zmiana_podpowiedzi(rodzaj, usuniety=True))
+        event.listen(Session, 'after_commit', _po_commicie)
+        event.listen(Session, 'after_rollback', _po_wycofaniu)
@@ -0,0 +1,8 @@
+from blinker import Namespace
+
+# Zdarzenia domenowe wysyłane po zatwierdzeniu zmian w bazie
+sygnaly = Namespace()
+
+zamowienie_utworzone = sygnaly.signal('zamowienie-utworzone')
+status_zamowienia_zmieniony = sygnaly.signal('status-zamowienia-zmieniony')
+dokument_zaksiegowany = sygnaly.signal('dokument-zaksiegowany')
@@ -0,0 +1,187 @@
+import csv
+import io
+from datetime import datetime
+from app.models import (db, StanMagazynowy, PozycjaDokumentu, Produkt, TypDokumentu, RuchMagazynowy,
+                        Dostawca)
+
+
+def pozycje_z_formularza(form):
+    """Zwraca listę par (produkt_id, ilosc) z pól produkt_id[] i ilosc[]
+    
+    ValueError, gdy produkt nie został wybrany z podpowiedzi (puste ukryte pole)
+    albo ilość nie jest liczbą.
+    """
+    try:
+        return [
+            (int(produkt_id), int(ilosc))
+            for produkt_id, ilosc in zip(form.getlist('produkt_id[]'), form.getlist('ilosc[]'))
+        ]
+    except ValueError:
+        raise ValueError('Wybierz produkty z listy podpowiedzi i podaj ich ilości.') from None
+
+
+def identyfikator_z_formularza(form, pole, opis):
+    """Id rekordu wybranego w polu z podpowiedziami; ValueError, gdy pole jest puste"""
+    wartosc = form.get(pole, '')
+    if not wartosc.isdigit():
+        raise ValueError(f'Wybierz {opis} z listy podpowiedzi.')
+    return int(wartosc)
+
+
+def sumuj_pozycje(pozycje):
+    """Sumuje ilości pozycji dla każdego produktu"""
+    sumy = {}
+    for produkt_id, ilosc in pozycje:
+        sumy[produkt_id] = sumy.get(produkt_id, 0) + ilosc
+    return sumy
+
+
+def wczytaj_stany(produkt_ids):
+    """Zwraca dostępne ilości produktów (produkt_id -> ilosc) jednym zapytaniem"""
+    return dict(db.session.query(
+        StanMagazynowy.produkt_id, StanMagazynowy.ilosc_dostepna
+    ).filter(StanMagazynowy.produkt_id.in_(produkt_ids)))
+
+
+class BrakTowaru(Exception):
+    """Niewystarczający stan produktu przy wydaniu"""
+    
+    def __init__(self, produkt_id):
+        super().__init__(f'Brak wystarczającej ilości produktu {produkt_id}')
+        self.produkt_id = produkt_id
+
+
+def zaksieguj_dokument(dokument, pozycje):
+    """Wstawia pozycje dokumentu, zmienia stany i dopisuje ruchy do księgi (bez commitu)
+    
+    Dokument musi mieć już nadane id. PZ zwiększa stany jednym wsadowym
+    UPDATE-em, WZ zmniejsza je warunkowo i zgłasza BrakTowaru, jeśli
+    którejkolwiek pozycji nie da się wydać - wywołujący wycofuje wtedy
+    całą transakcję.
+    """
+    zmiany = sumuj_pozycje(pozycje)
+    teraz = datetime.utcnow()
+    stan = StanMagazynowy.__table__
+    
+    if dokument.typ == TypDokumentu.PRZYJECIE:
+        # Brakujące wiersze stanów
+        # (z progiem niskiego stanu produktu - bez niego indeks niedoboru pomija stan)
+        brakujace = set(zmiany) - set(wczytaj_stany(zmiany.keys()))
+        if brakujace:
+            db.session.execute(db.insert(StanMagazynowy).from_select(
+                ['produkt_id', 'ilosc_dostepna', 'ilosc_zarezerwowana', 'ostatnia_aktualizacja',
+                 'prog_niskiego_stanu'],
+                db.select(Produkt.id, db.literal(0), db.literal(0), db.literal(teraz),
+                          StanMagazynowy.wyrazenie_progu()).where(Produkt.id.in_(brakujace))
+            ))
+        
+        # Jedno zapytanie UPDATE wykonane wsadowo dla wszystkich produktów
+        db.session.execute(
+            stan.update().where(
+                stan.c.produkt_id == db.bindparam('b_produkt_id')
+            ).values(
+                ilosc_dostepna=stan.c.ilosc_dostepna + db.bindparam('b_zmiana'),
+                ostatnia_aktualizacja=teraz
+            ),
+            [{'b_produkt_id': produkt_id, 'b_zmiana': ilosc}
+             for produkt_id, ilosc in zmiany.items()]
+        )
+    else:
+        # Atomowe zmniejszenie stanu tylko wtedy, gdy wystarcza towaru
+        # (kolejność według id produktu ogranicza zakleszczenia)
+        for produkt_id in sorted(zmiany):
+            wynik = db.session.execute(
+                stan.update().where(
+                    stan.c.produkt_id == produkt_id,
+                    stan.c.ilosc_dostepna >= zmiany[produkt_id]
+                ).values(
+                    ilosc_dostepna=stan.c.ilosc_dostepna - zmiany[produkt_id],
+                    ostatnia_aktualizacja=teraz
+                )
+            )
+            if wynik.rowcount != 1:
+                raise BrakTowaru(produkt_id)
+    
+    db.session.execute(db.insert(PozycjaDokumentu), [
+        {'dokument_id': dokument.id, 'produkt_id': produkt_id, 'ilosc': ilosc}
+        for produkt_id, ilosc in pozycje
+    ])
+    
+    # Księga ruchów: ruch ze znakiem dla każdej pozycji, z datą dokumentu
+    znak = 1 if dokument.typ == TypDokumentu.PRZYJECIE else -1
+    db.session.execute(db.insert(RuchMagazynowy), [
+        {'produkt_id': produkt_id, 'data': dokument.data_wystawienia, 'zmiana': znak * ilosc,
+         'dokument_id': dokument.id}
+        for produkt_id, ilosc in pozycje
+    ])
+
+
+def wczytaj_pozycje_importu(request):
+    """Odczytuje pozycje przesłanego dokumentu z JSON-a lub pliku CSV
+    
+    Zwraca (parametry dokumentu, lista słowników z kluczem 'kod' lub 'produkt_id'
+    oraz 'ilosc'). Zgłasza ValueError przy niepoprawnych danych.
+    """
+    if request.is_json:
+        dane = request.get_json(silent=True)
+        if not isinstance(dane, dict):
+            raise ValueError('Oczekiwano obiektu JSON z polami dokumentu.')
+        parametry = {k: dane.get(k) for k in ('dostawca_id', 'uwagi')}
+        wiersze = dane.get('pozycje') or []
+        if not isinstance(wiersze, list) or not all(isinstance(w, dict) for w in wiersze):
+            raise ValueError('Pole "pozycje" musi być listą obiektów.')
+    elif 'plik' in request.files:
+        parametry = {k: request.form.get(k) for k in ('dostawca_id', 'uwagi')}
+        tekst = request.files['plik'].read().decode('utf-8-sig')
+        naglowek = tekst.split('\n', 1)[0]
+        wiersze = list(csv.DictReader(io.StringIO(tekst),
+                                      delimiter=';' if ';' in naglowek else ','))
+    else:
+        raise ValueError('Oczekiwano danych JSON lub pliku CSV w polu "plik".')
+    
+    if not wiersze:
+        raise ValueError('Dokument nie zawiera pozycji.')
+    
+    if parametry['uwagi'] is not None and not isinstance(parametry['uwagi'], str):
+        raise ValueError('Pole "uwagi" musi być tekstem.')
+    if parametry['dostawca_id'] in (None, ''):
+        parametry['dostawca_id'] = None
+    else:
+        try:
+            dostawca = db.session.get(Dostawca, int(parametry['dostawca_id']))
+        except (TypeError, ValueError):
+            dostawca = None
+        if dostawca is None or not dostawca.aktywny:
+            raise ValueError(f'Nieznany lub nieaktywny dostawca: {parametry["dostawca_id"]}')
+        parametry['dostawca_id'] = dostawca.id
+    
+    # Rozwiązanie kodów produktów jednym zapytaniem
+    kody = {str(w['kod']).strip() for w in wiersze if w.get('kod')}
+    id_po_kodzie = dict(db.session.query(Produkt.kod, Produkt.id).filter(
+        Produkt.kod.in_(kody)
+    )) if kody else {}
+    
+    nieznane = sorted(kody - set(id_po_kodzie))
+    if nieznane:
+        raise ValueError(f'Nieznane kody produktów: {", ".join(nieznane)}')
+    
+    pozycje = []
+    for nr, wiersz in enumerate(wiersze, start=1):
+        try:
+            if wiersz.get('kod'):
+                produkt_id = id_po_kodzie[str(wiersz['kod']).strip()]
+            else:
+                produkt_id = int(wiersz['produkt_id'])
+            ilosc = int(wiersz['ilosc'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'Niepoprawna pozycja nr {nr}.')
+        if ilosc <= 0:
+            raise ValueError(f'Ilość w pozycji nr {nr} musi być dodatnia.')
+        pozycje.append((produkt_id, ilosc))
+    
+    ids = {produkt_id for produkt_id, _ in pozycje}
+    istniejace = {i for (i,) in db.session.query(Produkt.id).filter(Produkt.id.in_(ids))}
+    if ids - istniejace:
+        raise ValueError(f'Nieznane produkty: {", ".join(map(str, sorted(ids - istniejace)))}')
+    
+    return parametry, pozycje
@@ -0,0 +1,130 @@
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+import numpy as np
+from app.models import db, Produkt, RuchMagazynowy, MigawkaStanu
+
+# Wskaźniki produktów lub kategorii za okres - tablice NumPy o wspólnej kolejności
+Wycena = namedtuple('Wycena', [
+    'etykiety',         # id produktów albo nazwy kategorii
+    'stan_koncowy',     # ilość na koniec okresu
+    'sredni_stan',      # średnia dziennych stanów końcowych
+    'wydano',           # ilość wydana dokumentami WZ
+    'wartosc',          # wartość stanu na koniec okresu
+    'srednia_wartosc',  # wartość średniego stanu
+    'wartosc_wydan',    # wartość wydanych ilości
+    'rotacja',          # wartość wydań / wartość średniego stanu (NaN bez zapasu)
+    'dni_zapasu',       # na ile dni wystarczy stan przy średnich wydaniach (NaN bez wydań)
+])
+
+
+def wczytaj_dane(data_od, data_do):
+    """Tablice produktów, stanów na początek okresu i ruchów z księgi w okresie
+    
+    Stan początkowy pochodzi z najbliższej migawki i ruchów po niej,
+    ruchy okresu czytane są zakresem indeksu po dacie.
+    """
+    polaczenie = db.session.connection()
+    
+    # Zapytania rdzenia bez obiektów ORM i Decimal - przy 100 tys. produktów
+    # i setkach tysięcy ruchów to one, a nie obliczenia, decydują o czasie
+    produkty = polaczenie.execute(db.select(
+        Produkt.id, db.cast(Produkt.cena_jednostkowa, db.Float), Produkt.kategoria
+    ).order_by(Produkt.id)).all()
+    ids = np.fromiter((p[0] for p in produkty), dtype=np.int64, count=len(produkty))
+    ceny = np.fromiter((p[1] or 0 for p in produkty), dtype=np.float64, count=len(produkty))
+    kategorie = np.array([p[2] or '' for p in produkty], dtype=object)
+    
+    poczatek = np.fromiter(
+        map(tuple, polaczenie.execute(MigawkaStanu.zapytanie_stanow(data_od - timedelta(days=1)))),
+        dtype=[('produkt', np.int64), ('ilosc', np.int64)]
+    )
+    poczatek = poczatek[np.isin(poczatek['produkt'], ids)]
+    stan_poczatkowy = np.zeros(len(ids), dtype=np.int64)
+    stan_poczatkowy[np.searchsorted(ids, poczatek['produkt'])] = poczatek['ilosc']
+    
+    ruchy = np.fromiter(map(tuple, polaczenie.execute(db.select(
+        RuchMagazynowy.produkt_id, db.func.date(RuchMagazynowy.data), RuchMagazynowy.zmiana,
+        RuchMagazynowy.dokument_id.isnot(None)
+    ).where(
+        RuchMagazynowy.data >= datetime.combine(data_od, time.min),
+        RuchMagazynowy.data < datetime.combine(data_do + timedelta(days=1), time.min)
+    ))), dtype=[('produkt', np.int64), ('dzien', 'datetime64[D]'), ('zmiana', np.int64),
+                ('z_dokumentu', bool)])
+    # Ruchy usuniętych produktów pomijane - searchsorted przypisałby je sąsiadowi
+    ruchy = ruchy[np.isin(ruchy['produkt'], ids)]
+    
+    return {
+        'ids': ids,
+        'ceny': ceny,
+        'kategorie': kategorie,
+        'stan_poczatkowy': stan_poczatkowy,
+        'produkt_ruchu': np.searchsorted(ids, ruchy['produkt']),
+        'dzien_ruchu': (ruchy['dzien'] - np.datetime64(data_od, 'D')).astype(np.int64),
+        'zmiana': ruchy['zmiana'],
+        'z_dokumentu': ruchy['z_dokumentu'],
+    }
+
+
+def _wskazniki(etykiety, stan_koncowy, sredni_stan, wydano, wartosc, srednia_wartosc,
+               wartosc_wydan, dni):
+    """Rotacja i dni zapasu liczone z wartości, by dało się je sumować między produktami"""
+    rotacja = np.full(len(etykiety), np.nan)
+    np.divide(wartosc_wydan, srednia_wartosc, out=rotacja, where=srednia_wartosc > 0)
+    dni_zapasu = np.full(len(etykiety), np.nan)
+    np.divide(wartosc * dni, wartosc_wydan, out=dni_zapasu, where=wartosc_wydan > 0)
+    
+    return Wycena(etykiety, stan_koncowy, sredni_stan, wydano, wartosc, srednia_wartosc,
+                  wartosc_wydan, rotacja, dni_zapasu)
+
+
+def wycen(dane, dni):
+    """Wskaźniki wszystkich produktów i kategorii za okres jednym przebiegiem na tablicach
+    
+    Ruch z dnia k (liczonego od zera) wpływa na stany końcowe dni k..dni-1,
+    więc średni stan to stan początkowy plus suma zmian ważonych (dni - k) / dni
+    - bez budowania macierzy produkty x dni.
+    """
+    liczba = len(dane['ids'])
+    produkt, zmiana, ceny = dane['produkt_ruchu'], dane['zmiana'], dane['ceny']
+    
+    stan_koncowy = dane['stan_poczatkowy'] + np.bincount(
+        produkt, weights=zmiana, minlength=liczba
+    ).astype(np.int64)
+    sredni_stan = dane['stan_poczatkowy'] + np.bincount(
+        produkt, weights=zmiana * (dni - dane['dzien_ruchu']), minlength=liczba
+    ) / dni
+    # Wydania to ujemne ruchy dokumentów (bez ujemnych bilansów otwarcia)
+    wydano = np.bincount(
+        produkt, weights=np.where((zmiana < 0) & dane['z_dokumentu'], -zmiana, 0),
+        minlength=liczba
+    ).astype(np.int64)
+    
+    produkty = _wskazniki(dane['ids'], stan_koncowy, sredni_stan, wydano, stan_koncowy * ceny,
+                          sredni_stan * ceny, wydano * ceny, dni)
+    
+    # Kategorie: sumy ilości i wartości produktów
+    nazwy, kategoria = np.unique(dane['kategorie'], return_inverse=True)
+    sumy = [np.bincount(kategoria, weights=kolumna, minlength=len(nazwy))
+            for kolumna in produkty[1:7]]
+    kategorie = _wskazniki(nazwy, *sumy, dni)
+    razem = _wskazniki(np.array(['Razem'], dtype=object),
+                       *[suma.sum(keepdims=True) for suma in sumy], dni)
+    
+    return produkty, kategorie, razem
+
+
+def wycena_okresu(data_od, data_do):
+    """Wycena magazynu za okres: wskaźniki produktów, kategorii i całego magazynu"""
+    if data_od > data_do:
+        data_od, data_do = data_do, data_od
+    return wycen(wczytaj_dane(data_od, data_do), (data_do - data_od).days + 1)
+
+
+def wiersze(wycena, limit=None):
+    """Wiersze wskaźników (słowniki, NaN jako None) od największej wartości stanu"""
+    kolejnosc = np.argsort(-wycena.wartosc, kind='stable')[:limit]
+    return [
+        {pole: None if wartosc != wartosc else wartosc
+         for pole, wartosc in zip(Wycena._fields, wiersz)}
+        for wiersz in zip(*(kolumna[kolejnosc].tolist() for kolumna in wycena))
+    ]
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Pomiar wydajności wszystkich tras aplikacji na danych syntetycznych
+    
+    python benchmark.py --skala 0.01                        - pomiar, wyniki w benchmark.json
+    python benchmark.py --wynik bazowy.json                 - zapis wyników do porównań
+    python benchmark.py --bazowy bazowy.json --prog 0.2     - porównanie z wynikami bazowymi,
+                                                              kod wyjścia 1 przy regresji
+
+Baza (domyślnie instance/benchmark.db) jest tworzona od nowa generatorem z init_db.py.
+Każda trasa blueprintów ma scenariusz wysyłany klientem testowym Flaska; dla trasy
+zapisywane są czasy (p50/p95/p99), liczba zapytań SQL na żądanie i szczyt pamięci
+żądania (tracemalloc). Bufory wyników są wyłączone, chyba że podano --bufory.
+Liczba zapytań jest powtarzalna, czasy - tylko na nieobciążonej maszynie; na
+współdzielonej warto zwiększyć --powtorzenia i --prog.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app, url_for
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app import create_app, db
+from app.models import (Uzytkownik, Produkt, StanMagazynowy, Klient, Dostawca, Zamowienie,
+                        PozycjaZamowienia, StatusZamowienia, Faktura, ZamowienieZakupu,
+                        DokumentMagazynowy, TypDokumentu)
+from config import Config
+from init_db import init_database
+
+# Czasy życia buforów zerowane przy pomiarze - mierzymy obliczenia, a nie trafienia
+BUFORY = ('DASHBOARD_CACHE_TTL', 'IDENTITY_CACHE_TTL', 'LIST_COUNT_CACHE_TTL',
+          'REPORT_CACHE_TTL', 'REPORT_CACHE_CLOSED_TTL')
+# Pozycje dokumentów i zamówień tworzonych przez scenariusze
+POZYCJE_DOKUMENTU = 10
+# Percentyle porównywane z wynikami bazowymi - p99 z kilkudziesięciu powtórzeń
+# to praktycznie maksimum, więc tylko go zapisujemy
+MIARY_CZASU = ('p50_ms', 'p95_ms')
+# Zapas na szum pomiaru pamięci przy porównaniu (KiB)
+ZAPAS_PAMIECI_KB = 64
+# Parametry pomiaru, które muszą się zgadzać, by wyniki były porównywalne
+PARAMETRY_POROWNANIA = ('skala', 'ziarno', 'lata', 'bufory', 'baza')
+
+# Żądanie do trasy: parametry(k, i) zwraca argumenty url_for ('url') oraz dane formularza
+# ('data') lub JSON ('json') i-tego żądania; po(klient) jest wołane po każdym żądaniu
+Scenariusz = namedtuple('Scenariusz', ['endpoint', 'metoda', 'parametry', 'po'],
+                        defaults=(None, None))
+
+
+class BladScenariusza(Exception):
+    """Trasa odpowiedziała błędem albo brakuje danych dla scenariusza"""
+
+
+class LicznikZapytan:
+    """Liczy polecenia SQL wysłane przez silnik bazy"""
+    
+    def __init__(self, silnik):
+        self.liczba = 0
+        event.listen(silnik, 'before_cursor_execute', self._zapytanie)
+    
+    def _zapytanie(self, *args):
+        self.liczba += 1
+
+
+def konfiguracja_pomiaru(baza, bufory=False):
+    """Konfiguracja aplikacji do pomiaru: osobna baza, log i raporty w tle synchronicznie"""
+    class KonfiguracjaPomiaru(Config):
+        SQLALCHEMY_DATABASE_URI = baza
+        AUDIT_LOG_ASYNC = False
+        REPORT_JOB_WORKERS = 0
+    
+    if not bufory:
+        for nazwa in BUFORY:
+            setattr(KonfiguracjaPomiaru, nazwa, 0)
+    return KonfiguracjaPomiaru
+
+
+def _zaloguj(klient):
+    odpowiedz = klient.post('/auth/login', data={'login': 'admin', 'haslo': 'admin123'})
+    if odpowiedz.status_code != 302:
+        raise BladScenariusza('Nie udało się zalogować jako admin (hasło admin123)')
+
+
+def _formularz(obiekt, pola, **inne):
+    """Pola formularza edycji z bieżącymi wartościami rekordu"""
+    wartosci = {pole: getattr(obiekt, pole) for pole in pola}
+    return {pole: '' if wartosc is None else str(wartosc)
+            for pole, wartosc in wartosci.items()} | inne
+
+
+def _pozycje(produkty, ilosc):
+    return {'produkt_id[]': [str(p) for p in produkty],
+            'ilosc[]': [str(ilosc)] * len(produkty)}
+
+
+def _z_puli(pula, i):
+    """i-ty rekord puli (pula ma po jednym rekordzie na żądanie scenariusza)"""
+    return pula[i % len(pula)]
+
+
+def kontekst(rozmiar_puli):
+    """Rekordy, na których działają scenariusze (w kontekście aplikacji)
+    
+    Trasy zmieniające stan (realizacja, kompletacja, faktura) dostają pule
+    zamówień, by każde żądanie szło tą samą ścieżką, a nie kończyło się
+    komunikatem, że zamówienie jest już obsłużone.
+    """
+    def pierwszy(zapytanie):
+        return db.session.scalar(zapytanie.limit(1))
+    
+    def pula(zapytanie):
+        return db.session.scalars(zapytanie.limit(rozmiar_puli)).all()
+    
+    admin = Uzytkownik.query.filter_by(login='admin').one()
+    uzytkownik = Uzytkownik.query.filter_by(login='magazyn').one()
+    produkt = db.session.get(Produkt, pierwszy(db.select(Produkt.id).order_by(Produkt.id)))
+    klient = db.session.get(Klient, pierwszy(db.select(Klient.id).order_by(Klient.id)))
+    dostawca = db.session.get(Dostawca, pierwszy(
+        db.select(Dostawca.id).where(Dostawca.aktywny == True).order_by(Dostawca.id)))
+    zamowienie_zakupu = db.session.get(ZamowienieZakupu, pierwszy(
+        db.select(ZamowienieZakupu.id).order_by(ZamowienieZakupu.id.desc())))
+    if None in (produkt, klient, dostawca, zamowienie_zakupu):
+        raise BladScenariusza('Baza nie zawiera produktów, klientów, dostawców lub zamówień')
+    
+    # Okresy raportów kończą się ostatnim dniem danych, a nie dniem pomiaru
+    koniec = db.session.scalar(db.select(db.func.max(Zamowienie.data_zamowienia))).date()
+    
+    def zamowienia(status):
+        return db.select(Zamowienie.id).where(Zamowienie.status == status).order_by(Zamowienie.id)
+    
+    k = {
+        'admin': admin.id,
+        'uzytkownik': uzytkownik.id,
+        'produkt': produkt.id,
+        'klient': klient.id,
+        'dostawca': dostawca.id,
+        'zamowienie_zakupu': zamowienie_zakupu.id,
+        'status_zamowienia_zakupu': zamowienie_zakupu.status.name,
+        'zamowienie': pierwszy(zamowienia(StatusZamowienia.WYSLANE)),
+        'faktura': pierwszy(db.select(Faktura.id).order_by(Faktura.id)),
+        'pz': pierwszy(db.select(DokumentMagazynowy.id).where(
+            DokumentMagazynowy.typ == TypDokumentu.PRZYJECIE).order_by(DokumentMagazynowy.id)),
+        'wz': pierwszy(db.select(DokumentMagazynowy.id).where(
+            DokumentMagazynowy.typ == TypDokumentu.WYDANIE).order_by(DokumentMagazynowy.id)),
+        'na_stanie': db.session.scalars(db.select(StanMagazynowy.produkt_id).order_by(
+            StanMagazynowy.ilosc_dostepna.desc()).limit(POZYCJE_DOKUMENTU)).all(),
+        'do_realizacji': pula(zamowienia(StatusZamowienia.NOWE)),
+        'do_kompletacji': pula(zamowienia(StatusZamowienia.W_REALIZACJI)),
+        'do_fakturowania': pula(zamowienia(StatusZamowienia.WYSLANE).outerjoin(
+            Faktura, Faktura.zamowienie_id == Zamowienie.id).where(Faktura.id.is_(None))),
+        'pozycja': db.session.execute(db.select(
+            PozycjaZamowienia.zamowienie_id, PozycjaZamowienia.id
+        ).join(Zamowienie).where(Zamowienie.status == StatusZamowienia.NOWE).order_by(
+            Zamowienie.id.desc()).limit(1)).first(),
+        'data_od_30': (koniec - timedelta(days=29)).isoformat(),
+        'data_od_90': (koniec - timedelta(days=89)).isoformat(),
+        'data_do': koniec.isoformat(),
+        # Unikalne kody, NIP-y i loginy tworzonych rekordów (także przy bazie bez generowania)
+        'znacznik': f'{int(time.time()) % 1_000_000:06d}',
+        'profil': _formularz(admin, ('imie', 'nazwisko', 'email')),
+        'formularz_uzytkownika': _formularz(uzytkownik, ('imie', 'nazwisko', 'email'),
+                                            rola=uzytkownik.rola.name, aktywny='on'),
+        'formularz_produktu': _formularz(
+            produkt, ('nazwa', 'kategoria', 'jednostka', 'cena_jednostkowa', 'stan_minimalny',
+                      'opis'),
+            aktywny='on', lokalizacja=produkt.stan_magazynowy.lokalizacja or ''),
+        'formularz_klienta': _formularz(klient, ('nazwa', 'nip', 'adres', 'kod_pocztowy',
+                                                 'miasto', 'telefon', 'email'), aktywny='on'),
+        'formularz_dostawcy': _formularz(dostawca, ('nazwa', 'nip', 'adres', 'telefon', 'email',
+                                                    'kontakt_osoba'), aktywny='on'),
+    }
+    brakujace = [nazwa for nazwa, wartosc in k.items() if wartosc is None or wartosc == []]
+    if brakujace:
+        raise BladScenariusza(f'Brak danych dla scenariuszy: {", ".join(brakujace)}')
+    
+    # Kompletacja przechodzi do statusu GOTOWE tylko ze skompletowanymi pozycjami
+    db.session.execute(db.update(PozycjaZamowienia).where(
+        PozycjaZamowienia.zamowienie_id.in_(k['do_kompletacji'])
+    ).values(skompletowane=True))
+    db.session.commit()
+    
+    # Gotowe zadanie do odpytywania stanu i pobrania wyniku
+    k['zadanie'] = current_app.extensions['kolejka_raportow'].zglos(
+        'stany', {}, admin.id, 'stany.csv.gz').id
+    return k
+
+
+def scenariusze():
+    """Scenariusze wszystkich tras - najpierw odczyty, potem trasy zmieniające dane"""
+    return [
+        # Panel, użytkownicy i logowanie (UC1, UC2)
+        Scenariusz('auth.login', 'GET'),
+        Scenariusz('main.index', 'GET'),
+        Scenariusz('main.dashboard', 'GET'),
+        Scenariusz('main.cache_stats', 'GET'),
+        Scenariusz('main.profile', 'GET'),
+        Scenariusz('main.users_list', 'GET'),
+        Scenariusz('main.user_add', 'GET'),
+        Scenariusz('main.user_edit', 'GET', lambda k, i: {'url': {'user_id': k['uzytkownik']}}),
+        Scenariusz('api.podpowiedz', 'GET',
+                   lambda k, i: {'url': {'rodzaj': 'produkty', 'q': 'rękawice'}}),
+        # Produkty i klienci (UC3)
+        Scenariusz('products.list', 'GET'),
+        Scenariusz('products.add', 'GET'),
+        Scenariusz('products.detail', 'GET', lambda k, i: {'url': {'produkt_id': k['produkt']}}),
+        Scenariusz('products.edit', 'GET', lambda k, i: {'url': {'produkt_id': k['produkt']}}),
+        Scenariusz('customers.list', 'GET'),
+        Scenariusz('customers.add', 'GET'),
+        Scenariusz('customers.detail', 'GET', lambda k, i: {'url': {'klient_id': k['klient']}}),
+        Scenariusz('customers.edit', 'GET', lambda k, i: {'url': {'klient_id': k['klient']}}),
+        # Magazyn (UC4, UC5)
+        Scenariusz('warehouse.index', 'GET'),
+        Scenariusz('warehouse.pz_add', 'GET'),
+        Scenariusz('warehouse.wz_add', 'GET'),
+        Scenariusz('warehouse.documents_list', 'GET'),
+        Scenariusz('warehouse.pz_detail', 'GET', lambda k, i: {'url': {'dokument_id': k['pz']}}),
+        Scenariusz('warehouse.wz_detail', 'GET', lambda k, i: {'url': {'dokument_id': k['wz']}}),
+        Scenariusz('warehouse.suppliers_list', 'GET'),
+        Scenariusz('warehouse.supplier_add', 'GET'),
+        Scenariusz('warehouse.supplier_edit', 'GET',
+                   lambda k, i: {'url': {'dostawca_id': k['dostawca']}}),
+        # Zamówienia i faktury (UC6 - UC9)
+        Scenariusz('orders.customer_orders_list', 'GET'),
+        Scenariusz('orders.customer_order_add', 'GET'),
+        Scenariusz('orders.customer_order_detail', 'GET',
+                   lambda k, i: {'url': {'zamowienie_id': k['zamowienie']}}),
+        Scenariusz('orders.create_invoice', 'GET',
+                   lambda k, i: {'url': {'zamowienie_id': k['do_fakturowania'][-1]}}),
+        Scenariusz('orders.invoices_list', 'GET'),
+        Scenariusz('orders.invoice_detail', 'GET',
+                   lambda k, i: {'url': {'faktura_id': k['faktura']}}),
+        Scenariusz('orders.supplier_orders_list', 'GET'),
+        Scenariusz('orders.supplier_order_add', 'GET'),
+        Scenariusz('orders.supplier_order_detail', 'GET',
+                   lambda k, i: {'url': {'zamowienie_id': k['zamowienie_zakupu']}}),
+        Scenariusz('orders.supplier_order_replenish', 'GET'),
+        # Raporty (UC10, UC11)
+        Scenariusz('reports.index', 'GET'),
+        Scenariusz('reports.sales_report', 'GET',
+                   lambda k, i: {'url': {'data_od': k['data_od_30'], 'data_do': k['data_do']}}),
+        Scenariusz('reports.inventory_report', 'GET'),
+        Scenariusz('reports.product_rotation', 'GET',
+                   lambda k, i: {'url': {'data_od': k['data_od_90'], 'data_do': k['data_do']}}),
+        Scenariusz('reports.valuation_report', 'GET',
+                   lambda k, i: {'url': {'data_od': k['data_od_90'], 'data_do': k['data_do']}}),
+        Scenariusz('reports.documents_report', 'GET',
+                   lambda k, i: {'url': {'data_od': k['data_od_30'], 'data_do': k['data_do']}}),
+        Scenariusz('reports.invoices_report', 'GET',
+                   lambda k, i: {'url': {'data_od': k['data_od_30'], 'data_do': k['data_do']}}),
+        Scenariusz('reports.jobs', 'GET'),
+        Scenariusz('reports.job_status', 'GET', lambda k, i: {'url': {'zadanie_id': k['zadanie']}}),
+        Scenariusz('reports.download_job', 'GET',
+                   lambda k, i: {'url': {'zadanie_id': k['zadanie']}}),
+        
+        # Trasy zmieniające dane
+        Scenariusz('auth.login', 'POST',
+                   lambda k, i: {'data': {'login': 'admin', 'haslo': 'admin123'}}),
+        Scenariusz('main.profile_edit', 'POST', lambda k, i: {'data': k['profil']}),
+        Scenariusz('main.user_add', 'POST', lambda k, i: {'data': {
+            'login': f'pomiar{k["znacznik"]}{i}', 'email': f'pomiar{k["znacznik"]}{i}@bhp.pl',
+            'imie': 'Pomiar', 'nazwisko': 'Wydajności', 'rola': 'MAGAZYNIER', 'haslo': 'pomiar123'
+        }}),
+        Scenariusz('main.user_edit', 'POST', lambda k, i: {
+            'url': {'user_id': k['uzytkownik']}, 'data': k['formularz_uzytkownika']}),
+        Scenariusz('main.user_toggle', 'GET', lambda k, i: {'url': {'user_id': k['uzytkownik']}}),
+        Scenariusz('products.add', 'POST', lambda k, i: {'data': {
+            'kod': f'POM-{k["znacznik"]}-{i}', 'nazwa': f'Produkt pomiarowy {i}',
+            'kategoria': 'Akcesoria', 'cena_jednostkowa': '10.00', 'stan_minimalny': '10'
+        }}),
+        Scenariusz('products.edit', 'POST', lambda k, i: {
+            'url': {'produkt_id': k['produkt']}, 'data': k['formularz_produktu']}),
+        Scenariusz('products.toggle', 'GET', lambda k, i: {'url': {'produkt_id': k['produkt']}}),
+        Scenariusz('customers.add', 'POST', lambda k, i: {'data': {
+            'nazwa': f'Klient pomiarowy {i}', 'nip': f'{k["znacznik"]}{i:04d}', 'miasto': 'Łódź'
+        }}),
+        Scenariusz('customers.edit', 'POST', lambda k, i: {
+            'url': {'klient_id': k['klient']}, 'data': k['formularz_klienta']}),
+        Scenariusz('customers.toggle', 'GET', lambda k, i: {'url': {'klient_id': k['klient']}}),
+        Scenariusz('warehouse.supplier_add', 'POST', lambda k, i: {'data': {
+            'nazwa': f'Dostawca pomiarowy {i}', 'nip': f'9{k["znacznik"]}{i:04d}'
+        }}),
+        Scenariusz('warehouse.supplier_edit', 'POST', lambda k, i: {
+            'url': {'dostawca_id': k['dostawca']}, 'data': k['formularz_dostawcy']}),
+        Scenariusz('warehouse.pz_add', 'POST', lambda k, i: {
+            'data': {'dostawca_id': k['dostawca'], **_pozycje(k['na_stanie'], 5)}}),
+        Scenariusz('warehouse.pz_import', 'POST', lambda k, i: {'json': {
+            'dostawca_id': k['dostawca'],
+            'pozycje': [{'produkt_id': p, 'ilosc': 5} for p in k['na_stanie']]
+        }}),
+        Scenariusz('warehouse.wz_add', 'POST',
+                   lambda k, i: {'data': _pozycje(k['na_stanie'], 1)}),
+        Scenariusz('orders.customer_order_add', 'POST', lambda k, i: {
+            'data': {'klient_id': k['klient'], **_pozycje(k['na_stanie'], 2)}}),
+        Scenariusz('orders.customer_order_realize', 'POST',
+                   lambda k, i: {'url': {'zamowienie_id': _z_puli(k['do_realizacji'], i)}}),
+        Scenariusz('orders.toggle_position', 'GET', lambda k, i: {'url': {
+            'zamowienie_id': k['pozycja'][0], 'pozycja_id': k['pozycja'][1]}}),
+        Scenariusz('orders.customer_order_complete', 'POST',
+                   lambda k, i: {'url': {'zamowienie_id': _z_puli(k['do_kompletacji'], i)}}),
+        Scenariusz('orders.create_invoice', 'POST',
+                   lambda k, i: {'url': {'zamowienie_id': _z_puli(k['do_fakturowania'], i)}}),
+        Scenariusz('orders.supplier_order_add', 'POST', lambda k, i: {'data': {
+            'dostawca_id': k['dostawca'], 'data_dostawy': k['data_do'],
+            'cena[]': ['10.00'] * len(k['na_stanie']), **_pozycje(k['na_stanie'], 20)
+        }}),
+        Scenariusz('orders.supplier_order_status', 'POST', lambda k, i: {
+            'url': {'zamowienie_id': k['zamowienie_zakupu']},
+            'data': {'status': k['status_zamowienia_zakupu']}}),
+        Scenariusz('orders.supplier_order_replenish', 'POST'),
+        Scenariusz('reports.submit_job', 'POST', lambda k, i: {'json': {
+            'raport': 'sprzedaz', 'data_od': k['data_od_30'], 'data_do': k['data_do']}}),
+        Scenariusz('auth.logout', 'GET', po=_zaloguj),
+    ]
+
+
+def brakujace_scenariusze(app, lista, tylko=None):
+    """Trasy blueprintów (endpoint i metoda) bez scenariusza"""
+    pokryte = {(s.endpoint, s.metoda) for s in lista}
+    return sorted(
+        f'{regula.endpoint} {metoda}'
+        for regula in app.url_map.iter_rules()
+        if regula.endpoint != 'static' and (not tylko or regula.endpoint.startswith(tuple(tylko)))
+        for metoda in regula.methods - {'HEAD', 'OPTIONS'}
+        if (regula.endpoint, metoda) not in pokryte
+    )
+
+
+def zmierz(app, klient, scenariusz, k, licznik, powtorzenia, rozgrzewka):
+    """Percentyle czasu, mediana liczby zapytań i szczyt pamięci żądań scenariusza"""
+    def wyslij(i):
+        parametry = scenariusz.parametry(k, i) if scenariusz.parametry else {}
+        with app.test_request_context():
+            sciezka = url_for(scenariusz.endpoint, **parametry.get('url', {}))
+        
+        licznik.liczba = 0
+        start = time.perf_counter()
+        odpowiedz = klient.open(sciezka, method=scenariusz.metoda, data=parametry.get('data'),
+                                json=parametry.get('json'))
+        # Odpowiedzi strumieniowane (eksporty, pliki) liczą się do końca treści
+        odpowiedz.get_data()
+        czas = time.perf_counter() - start
+        zapytania = licznik.liczba
+        odpowiedz.close()
+        
+        if scenariusz.po:
+            scenariusz.po(klient)
+        if odpowiedz.status_code >= 400:
+            raise BladScenariusza(f'{scenariusz.metoda} {sciezka}: HTTP {odpowiedz.status_code}')
+        return czas, zapytania, odpowiedz.status_code
+    
+    for i in range(rozgrzewka):
+        wyslij(i)
+    
+    # Jak timeit: odśmiecanie przed pomiarem, a nie w losowym żądaniu (skoki p95)
+    gc.collect()
+    gc.disable()
+    try:
+        pomiary = [wyslij(rozgrzewka + i) for i in range(powtorzenia)]
+    finally:
+        gc.enable()
+    czasy = np.array([p[0] for p in pomiary]) * 1000
+    
+    # Pamięć osobnym żądaniem - śledzenie alokacji spowalnia i zafałszowałoby czasy
+    tracemalloc.start()
+    try:
+        wyslij(rozgrzewka + powtorzenia)
+        _, szczyt = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    p50, p95, p99 = np.percentile(czasy, (50, 95, 99)).tolist()
+    return {
+        'status': pomiary[-1][2],
+        'p50_ms': round(p50, 2),
+        'p95_ms': round(p95, 2),
+        'p99_ms': round(p99, 2),
+        'zapytania': round(float(np.median([p[1] for p in pomiary]))),
+        'pamiec_kb': round(szczyt / 1024),
+    }
+
+
+def uruchom(app, lista, powtorzenia, rozgrzewka):
+    """Mierzy scenariusze po kolei; błąd scenariusza trafia do wyników zamiast miar"""
+    with app.app_context():
+        k = kontekst(rozgrzewka + powtorzenia + 1)
+        licznik = LicznikZapytan(db.engine)
+    
+    klient = app.test_client()
+    _zaloguj(klient)
+    
+    print(f'\n{"Trasa":<44} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"SQL":>5} {"KiB":>8}')
+    wyniki = {}
+    for scenariusz in lista:
+        trasa = f'{scenariusz.endpoint} {scenariusz.metoda}'
+        try:
+            miary = zmierz(app, klient, scenariusz, k, licznik, powtorzenia, rozgrzewka)
+        except BladScenariusza as e:
+            wyniki[trasa] = {'blad': str(e)}
+            print(f'{trasa:<44} BŁĄD: {e}')
+            # Np. wylogowanie przerwane błędem - kolejne scenariusze potrzebują sesji
+            _zaloguj(klient)
+            continue
+        
+        wyniki[trasa] = miary
+        print(f'{trasa:<44} {miary["p50_ms"]:>9.2f} {miary["p95_ms"]:>9.2f} '
+              f'{miary["p99_ms"]:>9.2f} {miary["zapytania"]:>5} {miary["pamiec_kb"]:>8}')
+    return wyniki
+
+
+def porownaj(wyniki, bazowe, prog, prog_ms):
+    """Regresje względem wyników bazowych - lista (trasa, miara, było, jest)
+    
+    Czas (p50, p95) i pamięć to regresja po wzroście o więcej niż prog (względnie)
+    plus zapas bezwzględny na szum, liczba zapytań - po każdym dodatkowym zapytaniu.
+    """
+    regresje = []
+    for trasa, miary in wyniki['trasy'].items():
+        bazowa = bazowe['trasy'].get(trasa)
+        if bazowa is None or 'blad' in miary or 'blad' in bazowa:
+            continue
+        
+        granice = {miara: bazowa[miara] * (1 + prog) + prog_ms for miara in MIARY_CZASU}
+        granice['zapytania'] = bazowa['zapytania']
+        granice['pamiec_kb'] = bazowa['pamiec_kb'] * (1 + prog) + ZAPAS_PAMIECI_KB
+        regresje.extend((trasa, miara, bazowa[miara], miary[miara])
+                        for miara, granica in granice.items() if miary[miara] > granica)
+    return regresje
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Mierzy czasy, zapytania SQL i pamięć wszystkich tras aplikacji')
+    parser.add_argument('--baza', default='sqlite:///benchmark.db',
+                        help='Adres bazy pomiarowej - zostanie utworzona od nowa '
+                             '(domyślnie instance/benchmark.db)')
+    parser.add_argument('--skala', type=float, default=0.01,
+                        help='Skala danych syntetycznych (1 = 1 mln zamówień)')
+    parser.add_argument('--ziarno', type=int, default=1, help='Ziarno generatora danych')
+    parser.add_argument('--lata', type=float, default=3, help='Długość historii w latach')
+    parser.add_argument('--bez-generowania', action='store_true',
+                        help='Pomiar na istniejącej bazie (np. dużej, generowanej raz)')
+    parser.add_argument('--powtorzenia', type=int, default=20,
+                        help='Mierzone żądania każdej trasy')
+    parser.add_argument('--rozgrzewka', type=int, default=1,
+                        help='Żądania przed pomiarem (np. budowa indeksu podpowiedzi)')
+    parser.add_argument('--tylko', nargs='+', metavar='PREFIKS',
+                        help='Tylko trasy o podanych prefiksach, np. reports. orders.customer')
+    parser.add_argument('--bufory', action='store_true',
+                        help='Pomiar z włączonymi buforami wyników z konfiguracji')
+    parser.add_argument('--wynik', default='benchmark.json', help='Plik wyników (JSON)')
+    parser.add_argument('--bazowy', help='Wyniki bazowe (JSON) do porównania')
+    parser.add_argument('--prog', type=float, default=0.2,
+                        help='Dopuszczalny względny wzrost czasu i pamięci (0.2 = 20%%)')
+    parser.add_argument('--prog-ms', type=float, default=2.0,
+                        help='Zapas bezwzględny czasu na szum pomiaru (ms)')
+    argumenty = parser.parse_args()
+    
+    konfiguracja = konfiguracja_pomiaru(argumenty.baza, argumenty.bufory)
+    if not argumenty.bez_generowania:
+        init_database(argumenty.skala, argumenty.ziarno, argumenty.lata,
+                      config_class=konfiguracja)
+    app = create_app(konfiguracja)
+    
+    lista = [s for s in scenariusze()
+             if not argumenty.tylko or s.endpoint.startswith(tuple(argumenty.tylko))]
+    brakujace = brakujace_scenariusze(app, lista, argumenty.tylko)
+    if brakujace:
+        sys.exit(f'Trasy bez scenariusza pomiaru: {", ".join(brakujace)}')
+    
+    try:
+        trasy = uruchom(app, lista, argumenty.powtorzenia, argumenty.rozgrzewka)
+    except BladScenariusza as e:
+        sys.exit(str(e))
+    
+    wyniki = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'skala': None if argumenty.bez_generowania else argumenty.skala,
+            'ziarno': None if argumenty.bez_generowania else argumenty.ziarno,
+            'lata': None if argumenty.bez_generowania else argumenty.lata,
+            'bufory': argumenty.bufory,
+            'baza': make_url(argumenty.baza).get_backend_name(),
+            'powtorzenia': argumenty.powtorzenia,
+            'python': platform.python_version(),
+            'system': platform.platform(),
+        },
+        'trasy': trasy,
+    }
+    with open(argumenty.wynik, 'w', encoding='utf-8') as plik:
+        json.dump(wyniki, plik, ensure_ascii=False, indent=2)
+    print(f'\nWyniki zapisano w {argumenty.wynik}')
+    
+    kod = 0
+    bledy = [trasa for trasa, miary in trasy.items() if 'blad' in miary]
+    if bledy:
+        print(f'\nTrasy zakończone błędem: {", ".join(bledy)}')
+        kod = 1
+    
+    if argumenty.bazowy:
+        with open(argumenty.bazowy, encoding='utf-8') as plik:
+            bazowe = json.load(plik)
+        
+        rozne = [p for p in PARAMETRY_POROWNANIA if bazowe['meta'].get(p) != wyniki['meta'][p]]
+        if rozne:
+            sys.exit(f'Wyniki nieporównywalne z {argumenty.bazowy} - inne parametry pomiaru: '
+                     f'{", ".join(rozne)}')
+        
+        regresje = porownaj(wyniki, bazowe, argumenty.prog, argumenty.prog_ms)
+        for trasa, miara, bylo, jest in regresje:
+            print(f'REGRESJA {trasa:<44} {miara:<10} {bylo:>10} -> {jest}')
+        print(f'\nPorównanie z {argumenty.bazowy}: '
+              f'{len(regresje) or "brak"} regresji (próg {argumenty.prog:.0%})')
+        if regresje:
+            kod = 1
+    
+    sys.exit(kod)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,11 +5,66 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///warehouse.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite: dziennik WAL, aby długi eksport CSV (transakcja odczytu otwarta do końca
+    # strumienia) nie blokował zapisów, i czas oczekiwania na blokadę zapisu w sekundach
+    SQLITE_WAL = True
+    SQLITE_BUSY_TIMEOUT = 30
     PERMANENT_SESSION_LIFETIME = timedelta(hours=8)
     
     # Ustawienia paginacji
     ITEMS_PER_PAGE = 20
     
+    # Ustawienia pamięci podręcznej (w sekundach)
+    DASHBOARD_CACHE_TTL = 60
+    # Tożsamość zalogowanego użytkownika: edycja i dezaktywacja konta czyszczą wpis
+    # tylko w procesie, który je wykonał - w pozostałych (gunicorn --workers) stara rola
+    # lub zablokowane konto działają najdłużej tyle sekund
+    IDENTITY_CACHE_TTL = 30
+    LIST_COUNT_CACHE_TTL = 60
+    
+    # Raporty za okresy: zakończone pamiętane bez wygasania, z bieżącym dniem przez TTL
+    REPORT_CACHE_TTL = 60
+    REPORT_CACHE_SIZE = 128
+    # None = bez wygasania; przy kilku procesach (gunicorn --workers) podać czas,
+    # bo zapis unieważnia raporty tylko w pamięci procesu, który go wykonał
+    REPORT_CACHE_CLOSED_TTL = None
+    
+    # Raporty zlecane w tle: liczba procesów puli (0 = w bieżącym procesie, np. w testach)
+    # i limit czasu jednego zadania w sekundach; wyniki w instance/raporty
+    REPORT_JOB_WORKERS = 2
+    REPORT_JOB_TIMEOUT = 600
+    
+    # Prognoza popytu (flask prognozuj-popyt, uruchamiana co noc): długość historii w dniach,
+    # poziom obsługi (szansa, że zapas wystarczy do dostawy), czas dostawy produktów
+    # bez dostarczonych zamówień zakupu i najkrótsza historia, z której liczymy prognozę
+    FORECAST_HISTORY_DAYS = 365
+    FORECAST_SERVICE_LEVEL = 0.95
+    FORECAST_LEAD_TIME_DAYS = 7
+    FORECAST_MIN_HISTORY_DAYS = 28
+    
+    # Uzupełnianie stanów: na ile dni prognozowanego popytu zamawiamy towar ponad próg
+    REPLENISHMENT_COVER_DAYS = 30
+    
+    # Ustawienia logu zdarzeń (zapis w tle; False = zapis synchroniczny, np. w testach)
+    AUDIT_LOG_ASYNC = True
+    AUDIT_LOG_FLUSH_INTERVAL = 1.0
+    AUDIT_LOG_BATCH_SIZE = 200
+    # Nieudana partia ponawiana tyle razy, potem zapis wiersz po wierszu
+    AUDIT_LOG_RETRIES = 3
+    # Najwięcej wpisów czekających na ponowienie (nadmiar najstarszych odrzucany)
+    AUDIT_LOG_BACKLOG_LIMIT = 10000
+    
+    # Wyszukiwarka produktów - liczba najtrafniejszych wyników dostępnych na stronach
+    SEARCH_MAX_HITS = 500
+    
+    # Indeks podpowiedzi pól wyboru - pełne odświeżenie co tyle sekund; rozgrzewka
+    # buduje indeksy w tle po pierwszym żądaniu, zamiast przy pierwszej podpowiedzi
+    TYPEAHEAD_INDEX_TTL = 600
+    TYPEAHEAD_WARMUP = True
+    
+    # Wyjątek przy leniwym doczytaniu relacji na stronach szczegółów (tryb deweloperski)
+    RAISE_ON_LAZY_LOAD = os.environ.get('RAISE_ON_LAZY_LOAD') == '1'
+    
     # Ustawienia bezpieczeństwa
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
\ No newline at end of file
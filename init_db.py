@@ -1,14 +1,572 @@
 #!/usr/bin/env python3
 """
 Skrypt inicjalizujący bazę danych testowymi danymi
+    
+    python init_db.py                     - kilka produktów, klientów i dostawców
+    python init_db.py --skala 0.1         - dane syntetyczne do testów wydajności
+                                            (skala 1: 200 tys. produktów, 1 mln zamówień,
+                                            ok. 5 mln pozycji, 10 mln wpisów logu)
 """
-from app import create_app, db
+import argparse
+from datetime import date
+import numpy as np
+from app import create_app, db, search
 from app.models import (Uzytkownik, RolaUzytkownika, Produkt, StanMagazynowy, 
-                        Klient, Dostawca)
+                        Klient, Dostawca, RuchMagazynowy, Zamowienie, PozycjaZamowienia,
+                        Faktura, ZamowienieZakupu, PozycjaZamowieniaZakupu, DokumentMagazynowy,
+                        PozycjaDokumentu, SprzedazDzienna, MigawkaStanu, LicznikDokumentow, Log)
 from decimal import Decimal
+from config import Config
+
+# Dane syntetyczne (python init_db.py --skala ...) - liczności dla skali 1
+SKALA_BAZOWA = {
+    'produkty': 200_000,
+    'klienci': 50_000,
+    'dostawcy': 500,
+    'zamowienia': 1_000_000,
+    'logi': 10_000_000,
+}
+# Średnia liczba pozycji zamówienia klienta (1 + rozkład Poissona)
+SREDNIA_POZYCJI = 5
+# Wiersze jednego wsadowego INSERT-a
+ROZMIAR_PARTII = 50_000
+
+# Kategoria: (prefiks kodu, rdzenie nazw, udział w sprzedaży, amplituda sezonu, dzień szczytu)
+KATEGORIE = {
+    'Odzież robocza': ('ODZ', ['Kurtka robocza', 'Spodnie ogrodniczki', 'Kamizelka odblaskowa',
+                               'Bluza polarowa', 'Koszula flanelowa'], 0.25, 0.6, 15),
+    'Obuwie': ('OBU', ['Buty robocze S3', 'Kalosze gumowe', 'Trzewiki ocieplane', 'Półbuty S1'],
+               0.15, 0.4, 330),
+    'Rękawice': ('REK', ['Rękawice bawełniane', 'Rękawice nitrylowe', 'Rękawice skórzane',
+                         'Rękawice ocieplane'], 0.2, 0.3, 345),
+    'Środki czystości': ('CZY', ['Płyn do podłóg', 'Detergent uniwersalny', 'Pasta BHP',
+                                 'Worki na śmieci'], 0.2, 0.2, 100),
+    'Akcesoria': ('AKC', ['Mop bawełniany', 'Wiadro plastikowe', 'Szczotka', 'Ściereczki'],
+                  0.1, 0.15, 110),
+    'Ochrona osobista': ('OCH', ['Okulary ochronne', 'Kask przemysłowy', 'Nauszniki',
+                                 'Półmaska FFP2'], 0.1, 0.35, 200),
+}
+WARIANTY = ['S', 'M', 'L', 'XL', 'XXL', 'czarne', 'granatowe', 'szare', 'pomarańczowe',
+            'premium', 'standard', 'eko']
+# Mnożnik ruchu w dni tygodnia (poniedziałek..niedziela)
+DNI_TYGODNIA = np.array([1.1, 1.05, 1.0, 1.0, 0.9, 0.3, 0.1])
+
+AKCJE_LOGU = [
+    ('Logowanie', 'Zalogowano do systemu'),
+    ('Zamówienie klienta', 'Utworzono zamówienie'),
+    ('Zmiana statusu', 'Zmieniono status zamówienia'),
+    ('Dokument WZ', 'Wystawiono dokument WZ'),
+    ('Dokument PZ', 'Przyjęto dostawę'),
+    ('Faktura', 'Wystawiono fakturę'),
+    ('Edycja produktu', 'Zmieniono dane produktu'),
+]
+
+
+def _wstaw(tabela, kolumny):
+    """Wstawia kolumny (nazwa -> tablica NumPy lub lista) wsadowymi INSERT-ami rdzenia"""
+    polaczenie = db.session.connection()
+    nazwy = list(kolumny)
+    liczba = len(kolumny[nazwy[0]])
+    for poczatek in range(0, liczba, ROZMIAR_PARTII):
+        koniec = poczatek + ROZMIAR_PARTII
+        wartosci = [
+            k[poczatek:koniec].tolist() if isinstance(k, np.ndarray) else k[poczatek:koniec]
+            for k in (kolumny[n] for n in nazwy)
+        ]
+        polaczenie.execute(tabela.__table__.insert(),
+                           [dict(zip(nazwy, wiersz)) for wiersz in zip(*wartosci)])
+    return liczba
+
+
+def _numery(wzor, format_okresu, daty, seria, liczniki):
+    """Numery dokumentów posortowanych po dacie, kolejne w każdym okresie serii
+    
+    Ostatni numer okresu trafia do liczniki, żeby LicznikDokumentow
+    kontynuował numerację po wygenerowanych danych.
+    """
+    okresy = [d.strftime(format_okresu) for d in daty.astype('datetime64[us]').tolist()]
+    numery = []
+    poprzedni, numer = None, 0
+    for okres in okresy:
+        numer = numer + 1 if okres == poprzedni else 1
+        poprzedni = okres
+        numery.append(wzor.format(okres=okres, numer=numer))
+        liczniki[(seria, okres)] = numer
+    return numery
+
+
+def _sezon(dni_roku, amplituda, szczyt):
+    return 1 + amplituda * np.cos(2 * np.pi * (dni_roku - szczyt) / 365.25)
+
+
+def generuj_dane(skala, ziarno, lata, koniec):
+    """Ładuje dane syntetyczne: katalog, sezonowe zamówienia, dokumenty PZ/WZ, faktury i logi
+    
+    Wszystko liczone jest tablicami NumPy z generatora o zadanym ziarnie (te same
+    argumenty dają tę samą bazę) i wstawiane wsadowymi INSERT-ami rdzenia.
+    Księgę ruchów, zestawienie sprzedaży i indeks wyszukiwania odbudowują
+    potem te same funkcje co komendy CLI.
+    """
+    rng = np.random.default_rng(ziarno)
+    liczby = {k: max(1, round(v * skala)) for k, v in SKALA_BAZOWA.items()}
+    koniec = np.datetime64(koniec, 'D')
+    poczatek = koniec - int(lata * 365)
+    dni = (koniec - poczatek).astype(np.int64)
+    liczniki = {}
+    
+    # Dostawcy i klienci
+    print(f"Dostawcy i klienci ({liczby['dostawcy']}, {liczby['klienci']})...")
+    n = liczby['dostawcy']
+    _wstaw(Dostawca, {
+        'id': np.arange(1, n + 1),
+        'nazwa': [f'Dostawca {i} Sp. z o.o.' for i in range(1, n + 1)],
+        'nip': [str(7_000_000_000 + i) for i in range(1, n + 1)],
+        'email': [f'zamowienia@dostawca{i}.pl' for i in range(1, n + 1)],
+        'aktywny': rng.random(n) > 0.02,
+    })
+    # Średni czas dostawy dostawcy w dniach
+    czas_dostawcy = rng.integers(2, 11, n)
+    
+    n = liczby['klienci']
+    miasta = ['Warszawa', 'Kraków', 'Poznań', 'Wrocław', 'Gdańsk', 'Łódź', 'Katowice', 'Lublin']
+    _wstaw(Klient, {
+        'id': np.arange(1, n + 1),
+        'nazwa': [f'Firma {i}' for i in range(1, n + 1)],
+        'nip': [str(5_000_000_000 + i) for i in range(1, n + 1)],
+        'miasto': [miasta[i] for i in rng.integers(0, len(miasta), n).tolist()],
+        'email': [f'biuro@firma{i}.pl' for i in range(1, n + 1)],
+        'aktywny': np.ones(n, dtype=bool),
+        'data_utworzenia': np.full(n, poczatek, dtype='datetime64[us]'),
+    })
+    
+    # Produkty: kategoria, popularność (rozkład Zipfa w kategorii), cena
+    print(f"Produkty ({liczby['produkty']})...")
+    n = liczby['produkty']
+    nazwy_kategorii = list(KATEGORIE)
+    udzialy = np.array([KATEGORIE[k][2] for k in nazwy_kategorii])
+    kategoria = np.sort(rng.choice(len(nazwy_kategorii), n, p=udzialy / udzialy.sum()))
+    popularnosc = 1 / (rng.permutation(n) + 1.0) ** 1.1
+    cena = np.round(np.exp(rng.normal(3.3, 0.8, n)), 2) + 0.99
+    rdzen = rng.integers(0, 1000, n)
+    wariant = rng.integers(0, len(WARIANTY), n)
+    kody, nazwy = [], []
+    for i, (k, r, w) in enumerate(zip(kategoria.tolist(), rdzen.tolist(), wariant.tolist())):
+        prefiks, rdzenie = KATEGORIE[nazwy_kategorii[k]][:2]
+        kody.append(f'{prefiks}{i + 1:06d}')
+        nazwy.append(f'{rdzenie[r % len(rdzenie)]} {WARIANTY[w]} {r}')
+    dostawca_produktu = rng.integers(1, liczby['dostawcy'] + 1, n)
+    stan_minimalny = rng.integers(5, 50, n)
+    aktywny = rng.random(n) > 0.03
+    _wstaw(Produkt, {
+        'id': np.arange(1, n + 1),
+        'kod': kody,
+        'nazwa': nazwy,
+        'kategoria': [nazwy_kategorii[k] for k in kategoria.tolist()],
+        'jednostka': ['szt'] * n,
+        'cena_jednostkowa': cena,
+        'stan_minimalny': stan_minimalny,
+        'aktywny': aktywny,
+        'data_utworzenia': np.full(n, poczatek, dtype='datetime64[us]'),
+    })
+    
+    # Zamówienia klientów: dni z wagą trendu, dnia tygodnia i pory roku
+    print(f"Zamówienia klientów ({liczby['zamowienia']})...")
+    dzien = np.arange(dni)
+    daty_dni = poczatek + dzien
+    dzien_roku = (daty_dni - daty_dni.astype('datetime64[Y]')).astype(np.int64)
+    dzien_tygodnia = (daty_dni.astype(np.int64) + 3) % 7
+    waga = (1 + 0.5 * dzien / dni) * DNI_TYGODNIA[dzien_tygodnia] * _sezon(dzien_roku, 0.15, 60)
+    na_dzien = rng.multinomial(liczby['zamowienia'], waga / waga.sum())
+    n = int(na_dzien.sum())
+    dzien_zamowienia = np.repeat(dzien, na_dzien)
+    # Godziny 7-18, zamówienia posortowane po czasie
+    data_zamowienia = (daty_dni[dzien_zamowienia].astype('datetime64[s]')
+                       + rng.integers(7 * 3600, 18 * 3600, n).astype('timedelta64[s]'))
+    data_zamowienia = np.sort(data_zamowienia)
+    klient = (rng.zipf(1.3, n) - 1) % liczby['klienci'] + 1
+    
+    # Pozycje: kategoria zależna od pory roku, produkt według popularności w kategorii
+    liczba_pozycji = 1 + rng.poisson(SREDNIA_POZYCJI - 1, n)
+    zamowienie_pozycji = np.repeat(np.arange(n), liczba_pozycji)
+    dzien_pozycji = dzien_zamowienia[zamowienie_pozycji]
+    sezon_kategorii = np.stack([
+        udzialy[k] * _sezon(dzien_roku, *KATEGORIE[nazwa][3:])
+        for k, nazwa in enumerate(nazwy_kategorii)
+    ], axis=1)
+    sezon_kategorii /= sezon_kategorii.sum(axis=1, keepdims=True)
+    kategoria_pozycji = np.empty(len(dzien_pozycji), dtype=np.int64)
+    granice = np.searchsorted(dzien_pozycji, np.arange(dni + 1))
+    for d in range(dni):
+        if granice[d + 1] > granice[d]:
+            kategoria_pozycji[granice[d]:granice[d + 1]] = rng.choice(
+                len(nazwy_kategorii), granice[d + 1] - granice[d], p=sezon_kategorii[d])
+    produkt_pozycji = np.empty(len(dzien_pozycji), dtype=np.int64)
+    for k in range(len(nazwy_kategorii)):
+        produkty_kategorii = np.flatnonzero(kategoria == k)
+        maska = kategoria_pozycji == k
+        if not len(produkty_kategorii):
+            # Kategoria bez produktów przy bardzo małej skali
+            produkt_pozycji[maska] = rng.integers(0, liczby['produkty'], maska.sum())
+            continue
+        dystrybuanta = np.cumsum(popularnosc[produkty_kategorii])
+        los = rng.random(maska.sum()) * dystrybuanta[-1]
+        produkt_pozycji[maska] = produkty_kategorii[
+            np.minimum(np.searchsorted(dystrybuanta, los), len(produkty_kategorii) - 1)]
+    ilosc_pozycji = rng.geometric(0.35, len(produkt_pozycji))
+    cena_pozycji = cena[produkt_pozycji]
+    wartosc_pozycji = np.round(ilosc_pozycji * cena_pozycji, 2)
+    wartosc_netto = np.round(np.bincount(zamowienie_pozycji, weights=wartosc_pozycji,
+                                         minlength=n), 2)
+    
+    # Statusy według wieku zamówienia; zrealizowane mają datę realizacji i dokument WZ
+    wiek = dni - dzien_zamowienia
+    los = rng.random(n)
+    status = np.where(wiek > 14, np.where(los < 0.04, 'ANULOWANE', 'WYSLANE'),
+             np.where(wiek > 3, np.where(los < 0.5, 'GOTOWE', 'WYSLANE'),
+                      np.where(los < 0.5, 'NOWE', 'W_REALIZACJI')))
+    zrealizowane = np.isin(status, ['GOTOWE', 'WYSLANE'])
+    data_realizacji = data_zamowienia + (rng.integers(4, 72, n) * 3600).astype('timedelta64[s]')
+    data_realizacji = np.minimum(data_realizacji, koniec.astype('datetime64[s]') - 1)
+    
+    _wstaw(Zamowienie, {
+        'id': np.arange(1, n + 1),
+        'numer': _numery('ZAM/{okres}/{numer:05d}', '%Y', data_zamowienia, 'ZAM', liczniki),
+        'klient_id': klient,
+        'data_zamowienia': data_zamowienia.astype('datetime64[us]'),
+        'data_realizacji': np.where(zrealizowane, data_realizacji,
+                                    np.datetime64('NaT')).astype('datetime64[us]'),
+        'status': status.astype(object),
+        'wartosc_netto': wartosc_netto,
+        'wartosc_brutto': np.round(wartosc_netto * 1.23, 2),
+    })
+    print(f"Pozycje zamówień ({len(produkt_pozycji)})...")
+    _wstaw(PozycjaZamowienia, {
+        'zamowienie_id': zamowienie_pozycji + 1,
+        'produkt_id': produkt_pozycji + 1,
+        'ilosc': ilosc_pozycji,
+        'cena_jednostkowa': cena_pozycji,
+        'wartosc_netto': wartosc_pozycji,
+        'skompletowane': zrealizowane[zamowienie_pozycji],
+    })
+    
+    # Faktury do większości wysłanych zamówień
+    fakturowane = np.flatnonzero((status == 'WYSLANE') & (rng.random(n) < 0.8))
+    fakturowane = fakturowane[np.argsort(data_realizacji[fakturowane], kind='stable')]
+    print(f"Faktury ({len(fakturowane)})...")
+    data_faktury = data_realizacji[fakturowane].astype('datetime64[us]')
+    netto = wartosc_netto[fakturowane]
+    brutto = np.round(netto * 1.23, 2)
+    _wstaw(Faktura, {
+        'numer': _numery('FV/{okres}/{numer:04d}', '%Y/%m', data_faktury, 'FV', liczniki),
+        'klient_id': klient[fakturowane],
+        'zamowienie_id': fakturowane + 1,
+        'data_wystawienia': data_faktury,
+        'data_sprzedazy': data_faktury,
+        'termin_platnosci': data_faktury + np.timedelta64(14, 'D'),
+        'wartosc_netto': netto,
+        'wartosc_vat': np.round(brutto - netto, 2),
+        'wartosc_brutto': brutto,
+        'oplacona': (koniec - data_faktury.astype('datetime64[D]')).astype(np.int64) > 30,
+    })
+    
+    # Zakupy: co miesiąc dostawca dostaje zamówienie na to, co sprzedano z jego
+    # produktów w poprzednim miesiącu (z zapasem); dostarczone mają dokument PZ
+    wydane = zrealizowane[zamowienie_pozycji]
+    miesiac = data_realizacji[zamowienie_pozycji[wydane]].astype('datetime64[M]')
+    pierwszy_miesiac = poczatek.astype('datetime64[M]')
+    miesiac = (miesiac - pierwszy_miesiac).astype(np.int64)
+    liczba_miesiecy = int(miesiac.max()) + 1 if len(miesiac) else 1
+    klucz, ilosc_zakupu = np.unique(produkt_pozycji[wydane] * liczba_miesiecy + miesiac,
+                                    return_inverse=True)
+    ilosc_zakupu = np.bincount(ilosc_zakupu, weights=ilosc_pozycji[wydane])
+    produkt_zakupu, miesiac_zakupu = klucz // liczba_miesiecy, klucz % liczba_miesiecy
+    ilosc_zakupu = np.ceil(ilosc_zakupu * rng.uniform(1.0, 1.3, len(klucz))).astype(np.int64)
+    
+    zamowienie_zakupu, indeks_zakupu = np.unique(
+        (dostawca_produktu[produkt_zakupu] - 1) * liczba_miesiecy + miesiac_zakupu,
+        return_inverse=True)
+    dostawca_zakupu = zamowienie_zakupu // liczba_miesiecy + 1
+    data_zakupu = ((pierwszy_miesiac + zamowienie_zakupu % liczba_miesiecy + 1)
+                   .astype('datetime64[s]') + np.timedelta64(8 * 3600, 's'))
+    data_dostawy = data_zakupu + (
+        (czas_dostawcy[dostawca_zakupu - 1] + rng.integers(0, 3, len(zamowienie_zakupu))) * 86400
+    ).astype('timedelta64[s]')
+    # Zamówienia z przyszłą datą pomijamy, niedostarczone są w drodze
+    zlozone = data_zakupu < koniec
+    dostarczone = zlozone & (data_dostawy < koniec)
+    kolejnosc = np.flatnonzero(zlozone)[np.argsort(data_zakupu[zlozone], kind='stable')]
+    id_zakupu = np.zeros(len(zamowienie_zakupu), dtype=np.int64)
+    id_zakupu[kolejnosc] = np.arange(1, len(kolejnosc) + 1)
+    cena_zakupu = np.round(cena[produkt_zakupu] * 0.6, 2)
+    wartosc_zakupu = np.round(ilosc_zakupu * cena_zakupu, 2)
+    
+    print(f"Zamówienia zakupu ({len(kolejnosc)})...")
+    _wstaw(ZamowienieZakupu, {
+        'id': id_zakupu[kolejnosc],
+        'numer': _numery('ZAK/{okres}/{numer:05d}', '%Y', data_zakupu[kolejnosc], 'ZAK',
+                         liczniki),
+        'dostawca_id': dostawca_zakupu[kolejnosc],
+        'data_zamowienia': data_zakupu[kolejnosc].astype('datetime64[us]'),
+        'data_dostawy_planowana': (data_zakupu[kolejnosc] + (
+            czas_dostawcy[dostawca_zakupu[kolejnosc] - 1] * 86400).astype('timedelta64[s]')
+        ).astype('datetime64[us]'),
+        'data_dostawy_rzeczywista': np.where(dostarczone[kolejnosc], data_dostawy[kolejnosc],
+                                             np.datetime64('NaT')).astype('datetime64[us]'),
+        'status': np.where(dostarczone[kolejnosc], 'DOSTARCZONE', 'WYSLANE').astype(object),
+        'wartosc_netto': np.round(np.bincount(indeks_zakupu, weights=wartosc_zakupu,
+                                              minlength=len(zamowienie_zakupu)), 2)[kolejnosc],
+    })
+    pozycje_zakupu = np.flatnonzero(zlozone[indeks_zakupu])
+    _wstaw(PozycjaZamowieniaZakupu, {
+        'zamowienie_zakupu_id': id_zakupu[indeks_zakupu[pozycje_zakupu]],
+        'produkt_id': produkt_zakupu[pozycje_zakupu] + 1,
+        'ilosc': ilosc_zakupu[pozycje_zakupu],
+        'cena_jednostkowa': cena_zakupu[pozycje_zakupu],
+        'wartosc_netto': wartosc_zakupu[pozycje_zakupu],
+    })
+    
+    # Dokumenty: WZ dla zrealizowanych zamówień, PZ dla dostarczonych zakupów
+    wz = np.flatnonzero(zrealizowane)
+    wz = wz[np.argsort(data_realizacji[wz], kind='stable')]
+    pz = np.flatnonzero(dostarczone)
+    pz = pz[np.argsort(data_dostawy[pz], kind='stable')]
+    print(f"Dokumenty magazynowe (WZ {len(wz)}, PZ {len(pz)})...")
+    id_wz = np.zeros(n, dtype=np.int64)
+    id_wz[wz] = np.arange(1, len(wz) + 1)
+    id_pz = np.zeros(len(zamowienie_zakupu), dtype=np.int64)
+    id_pz[pz] = np.arange(len(wz) + 1, len(wz) + len(pz) + 1)
+    _wstaw(DokumentMagazynowy, {
+        'id': np.concatenate([id_wz[wz], id_pz[pz]]),
+        'numer': (_numery('WZ/{okres}/{numer:05d}', '%Y', data_realizacji[wz], 'WZ', liczniki)
+                  + _numery('PZ/{okres}/{numer:05d}', '%Y', data_dostawy[pz], 'PZ', liczniki)),
+        'typ': ['WYDANIE'] * len(wz) + ['PRZYJECIE'] * len(pz),
+        'data_wystawienia': np.concatenate([data_realizacji[wz],
+                                            data_dostawy[pz]]).astype('datetime64[us]'),
+        'dostawca_id': [None] * len(wz) + dostawca_zakupu[pz].tolist(),
+        'zamowienie_id': (wz + 1).tolist() + [None] * len(pz),
+    })
+    pozycje_pz = np.flatnonzero(dostarczone[indeks_zakupu])
+    _wstaw(PozycjaDokumentu, {
+        'dokument_id': np.concatenate([id_wz[zamowienie_pozycji[wydane]],
+                                       id_pz[indeks_zakupu[pozycje_pz]]]),
+        'produkt_id': np.concatenate([produkt_pozycji[wydane], produkt_zakupu[pozycje_pz]]) + 1,
+        'ilosc': np.concatenate([ilosc_pozycji[wydane], ilosc_zakupu[pozycje_pz]]),
+    })
+    
+    # Stan początkowy tak duży, by stan produktu nigdy nie spadł poniżej zera
+    produkt_ruchu = np.concatenate([produkt_pozycji[wydane], produkt_zakupu[pozycje_pz]])
+    czas_ruchu = np.concatenate([data_realizacji[zamowienie_pozycji[wydane]],
+                                 data_dostawy[indeks_zakupu[pozycje_pz]]])
+    zmiana = np.concatenate([-ilosc_pozycji[wydane], ilosc_zakupu[pozycje_pz]])
+    kolejnosc = np.lexsort((czas_ruchu, produkt_ruchu))
+    produkt_ruchu, zmiana = produkt_ruchu[kolejnosc], zmiana[kolejnosc]
+    narastajaco = np.cumsum(zmiana)
+    if len(zmiana):
+        starty = np.flatnonzero(np.r_[True, produkt_ruchu[1:] != produkt_ruchu[:-1]])
+        przed = np.r_[0, narastajaco[starty[1:] - 1]]
+        minimum = np.zeros(liczby['produkty'], dtype=np.int64)
+        minimum[produkt_ruchu[starty]] = np.minimum.reduceat(
+            narastajaco - np.repeat(przed, np.diff(np.r_[starty, len(zmiana)])), starty)
+    else:
+        minimum = np.zeros(liczby['produkty'], dtype=np.int64)
+    stan = (rng.integers(0, 40, liczby['produkty']) + np.maximum(-minimum, 0)
+            + np.bincount(produkt_ruchu, weights=zmiana, minlength=liczby['produkty'])
+            .astype(np.int64))
+    
+    n = liczby['produkty']
+    _wstaw(StanMagazynowy, {
+        'produkt_id': np.arange(1, n + 1),
+        'ilosc_dostepna': stan,
+        'ilosc_zarezerwowana': np.zeros(n, dtype=np.int64),
+        'lokalizacja': [f'Regal-{r}-{p}' for r, p in zip(rng.integers(1, 100, n).tolist(),
+                                                          rng.integers(1, 6, n).tolist())],
+        'ostatnia_aktualizacja': np.full(n, koniec, dtype='datetime64[us]'),
+        'prog_niskiego_stanu': [p if a else None
+                                for p, a in zip(stan_minimalny.tolist(), aktywny.tolist())],
+    })
+    _wstaw(LicznikDokumentow, {
+        'seria': [seria for seria, _ in liczniki],
+        'okres': [okres for _, okres in liczniki],
+        'wartosc': list(liczniki.values()),
+    })
+    
+    # Log zdarzeń: partiami, każda z kolejnego odcinka czasu
+    print(f"Log zdarzeń ({liczby['logi']})...")
+    uzytkownicy = [i for (i,) in db.session.query(Uzytkownik.id)]
+    sekundy = int(dni) * 86400
+    for start in range(0, liczby['logi'], ROZMIAR_PARTII):
+        ile = min(ROZMIAR_PARTII, liczby['logi'] - start)
+        od, do = sekundy * start // liczby['logi'], sekundy * (start + ile) // liczby['logi']
+        akcja = rng.integers(0, len(AKCJE_LOGU), ile).tolist()
+        _wstaw(Log, {
+            'uzytkownik_id': [uzytkownicy[i] for i in rng.integers(0, len(uzytkownicy), ile)],
+            'akcja': [AKCJE_LOGU[a][0] for a in akcja],
+            'opis': [AKCJE_LOGU[a][1] for a in akcja],
+            'data': (poczatek.astype('datetime64[s]')
+                     + np.sort(rng.integers(od, max(do, od + 1), ile)).astype('timedelta64[s]')
+                     ).astype('datetime64[us]'),
+            'adres_ip': [f'10.0.{a}.{b}' for a, b in zip(rng.integers(0, 256, ile).tolist(),
+                                                          rng.integers(1, 255, ile).tolist())],
+        })
+    
+    # Jawnie nadane id - sekwencje PostgreSQL muszą zacząć za nimi
+    if db.engine.dialect.name == 'postgresql':
+        for model in (Dostawca, Klient, Produkt, Zamowienie, ZamowienieZakupu, DokumentMagazynowy):
+            tabela = model.__tablename__
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM {tabela}))"))
+    
+    # Tabele pochodne - tak samo jak komendy CLI
+    print("Księga ruchów, zestawienie sprzedaży i indeks wyszukiwania...")
+    RuchMagazynowy.przebuduj()
+    SprzedazDzienna.przebuduj()
+    # Migawki stanów na koniec ostatnich dwunastu miesięcy
+    for miesiac in range(1, 13):
+        dzien_migawki = (koniec.astype('datetime64[M]') - miesiac + 1).astype('datetime64[D]') - 1
+        if dzien_migawki > poczatek:
+            MigawkaStanu.utworz(dzien_migawki.item())
+    if db.engine.dialect.name == 'sqlite':
+        polaczenie = db.session.connection()
+        search.utworz_indeks(polaczenie)
+        search.przebuduj_indeks(polaczenie)
+    
+    return liczby['produkty'], liczby['klienci'], liczby['dostawcy']
 
-def init_database():
-    app = create_app()
+
+def _dane_demonstracyjne():
+    """Kilku dostawców, klientów i produktów do ręcznego przeglądania aplikacji"""
+    # Dodawanie dostawców
+    print("Dodawanie dostawców...")
+    dostawcy = [
+        {
+            'nazwa': 'BHP Plus Sp. z o.o.',
+            'nip': '1234567890',
+            'adres': 'ul. Bezpieczna 10',
+            'telefon': '123456789',
+            'email': 'kontakt@bhpplus.pl',
+            'kontakt_osoba': 'Krzysztof Nowicki'
+        },
+        {
+            'nazwa': 'Odziez Robocza S.A.',
+            'nip': '9876543210',
+            'adres': 'ul. Przemysłowa 25',
+            'telefon': '987654321',
+            'email': 'zamowienia@odziezrobocza.pl',
+            'kontakt_osoba': 'Ewa Kowalczyk'
+        }
+    ]
+    
+    for dostawca_data in dostawcy:
+        dostawca = Dostawca(**dostawca_data)
+        db.session.add(dostawca)
+    
+    # Dodawanie klientów
+    print("Dodawanie klientów...")
+    klienci = [
+        {
+            'nazwa': 'Firma Sprzątająca ABC',
+            'nip': '1111111111',
+            'adres': 'ul. Czysta 5',
+            'kod_pocztowy': '00-001',
+            'miasto': 'Warszawa',
+            'telefon': '111222333',
+            'email': 'kontakt@abc-sprzatanie.pl'
+        },
+        {
+            'nazwa': 'Hotel Grand Sp. z o.o.',
+            'nip': '2222222222',
+            'adres': 'ul. Hotelowa 100',
+            'kod_pocztowy': '00-002',
+            'miasto': 'Kraków',
+            'telefon': '444555666',
+            'email': 'zamowienia@hotelgrand.pl'
+        },
+        {
+            'nazwa': 'Zakłady Produkcyjne XYZ',
+            'nip': '3333333333',
+            'adres': 'ul. Fabryczna 50',
+            'kod_pocztowy': '61-001',
+            'miasto': 'Poznań',
+            'telefon': '777888999',
+            'email': 'bhp@xyz.com.pl'
+        }
+    ]
+    
+    for klient_data in klienci:
+        klient = Klient(**klient_data)
+        db.session.add(klient)
+    
+    # Dodawanie produktów
+    print("Dodawanie produktów...")
+    produkty = [
+        # Odzież robocza
+        {'kod': 'ODZ001', 'nazwa': 'Kurtka robocza zimowa', 'kategoria': 'Odzież robocza', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('150.00'), 'stan_minimalny': 20},
+        {'kod': 'ODZ002', 'nazwa': 'Spodnie ogrodniczki', 'kategoria': 'Odzież robocza', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('80.00'), 'stan_minimalny': 30},
+        {'kod': 'ODZ003', 'nazwa': 'Kamizelka odblaskowa', 'kategoria': 'Odzież robocza', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('25.00'), 'stan_minimalny': 50},
+        {'kod': 'ODZ004', 'nazwa': 'Bluza polarowa', 'kategoria': 'Odzież robocza', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('60.00'), 'stan_minimalny': 25},
+        
+        # Obuwie
+        {'kod': 'OBU001', 'nazwa': 'Buty robocze S3', 'kategoria': 'Obuwie', 
+         'jednostka': 'para', 'cena_jednostkowa': Decimal('120.00'), 'stan_minimalny': 15},
+        {'kod': 'OBU002', 'nazwa': 'Kalosze gumowe', 'kategoria': 'Obuwie', 
+         'jednostka': 'para', 'cena_jednostkowa': Decimal('45.00'), 'stan_minimalny': 20},
+        
+        # Rękawice
+        {'kod': 'REK001', 'nazwa': 'Rękawice robocze bawełniane', 'kategoria': 'Rękawice', 
+         'jednostka': 'para', 'cena_jednostkowa': Decimal('5.00'), 'stan_minimalny': 100},
+        {'kod': 'REK002', 'nazwa': 'Rękawice gumowe', 'kategoria': 'Rękawice', 
+         'jednostka': 'para', 'cena_jednostkowa': Decimal('8.00'), 'stan_minimalny': 80},
+        {'kod': 'REK003', 'nazwa': 'Rękawice skórzane', 'kategoria': 'Rękawice', 
+         'jednostka': 'para', 'cena_jednostkowa': Decimal('15.00'), 'stan_minimalny': 40},
+        
+        # Środki czystości
+        {'kod': 'CZY001', 'nazwa': 'Płyn do mycia podłóg 5L', 'kategoria': 'Środki czystości', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('35.00'), 'stan_minimalny': 30},
+        {'kod': 'CZY002', 'nazwa': 'Detergent uniwersalny 1L', 'kategoria': 'Środki czystości', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('12.00'), 'stan_minimalny': 50},
+        {'kod': 'CZY003', 'nazwa': 'Pasta do czyszczenia', 'kategoria': 'Środki czystości', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('8.00'), 'stan_minimalny': 40},
+        {'kod': 'CZY004', 'nazwa': 'Worki na śmieci 120L', 'kategoria': 'Środki czystości', 
+         'jednostka': 'op', 'cena_jednostkowa': Decimal('25.00'), 'stan_minimalny': 20},
+        
+        # Akcesoria
+        {'kod': 'AKC001', 'nazwa': 'Mop bawełniany', 'kategoria': 'Akcesoria', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('18.00'), 'stan_minimalny': 25},
+        {'kod': 'AKC002', 'nazwa': 'Wiadro plastikowe 10L', 'kategoria': 'Akcesoria', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('15.00'), 'stan_minimalny': 30},
+        {'kod': 'AKC003', 'nazwa': 'Szczotka do zamiatania', 'kategoria': 'Akcesoria', 
+         'jednostka': 'szt', 'cena_jednostkowa': Decimal('12.00'), 'stan_minimalny': 20},
+    ]
+    
+    for produkt_data in produkty:
+        produkt = Produkt(**produkt_data)
+        db.session.add(produkt)
+        db.session.flush()
+        
+        # Tworzenie stanu magazynowego
+        import random
+        stan = StanMagazynowy(
+            produkt_id=produkt.id,
+            ilosc_dostepna=random.randint(5, 100),
+            ilosc_zarezerwowana=0,
+            lokalizacja=f"Regal-{random.randint(1, 10)}-{random.randint(1, 5)}",
+            prog_niskiego_stanu=produkt.prog_niskiego_stanu
+        )
+        db.session.add(stan)
+        
+        # Bilans otwarcia w księdze ruchów
+        db.session.add(RuchMagazynowy(produkt_id=produkt.id, zmiana=stan.ilosc_dostepna))
+    
+    return len(produkty), len(klienci), len(dostawcy)
+
+
+def init_database(skala=None, ziarno=1, lata=3, koniec=None, config_class=Config):
+    app = create_app(config_class)
     
     with app.app_context():
         # Usunięcie i utworzenie tabel
@@ -59,127 +617,11 @@ def init_database():
             user.ustaw_haslo(haslo)
             db.session.add(user)
         
-        # Dodawanie dostawców
-        print("Dodawanie dostawców...")
-        dostawcy = [
-            {
-                'nazwa': 'BHP Plus Sp. z o.o.',
-                'nip': '1234567890',
-                'adres': 'ul. Bezpieczna 10',
-                'telefon': '123456789',
-                'email': 'kontakt@bhpplus.pl',
-                'kontakt_osoba': 'Krzysztof Nowicki'
-            },
-            {
-                'nazwa': 'Odziez Robocza S.A.',
-                'nip': '9876543210',
-                'adres': 'ul. Przemysłowa 25',
-                'telefon': '987654321',
-                'email': 'zamowienia@odziezrobocza.pl',
-                'kontakt_osoba': 'Ewa Kowalczyk'
-            }
-        ]
-        
-        for dostawca_data in dostawcy:
-            dostawca = Dostawca(**dostawca_data)
-            db.session.add(dostawca)
-        
-        # Dodawanie klientów
-        print("Dodawanie klientów...")
-        klienci = [
-            {
-                'nazwa': 'Firma Sprzątająca ABC',
-                'nip': '1111111111',
-                'adres': 'ul. Czysta 5',
-                'kod_pocztowy': '00-001',
-                'miasto': 'Warszawa',
-                'telefon': '111222333',
-                'email': 'kontakt@abc-sprzatanie.pl'
-            },
-            {
-                'nazwa': 'Hotel Grand Sp. z o.o.',
-                'nip': '2222222222',
-                'adres': 'ul. Hotelowa 100',
-                'kod_pocztowy': '00-002',
-                'miasto': 'Kraków',
-                'telefon': '444555666',
-                'email': 'zamowienia@hotelgrand.pl'
-            },
-            {
-                'nazwa': 'Zakłady Produkcyjne XYZ',
-                'nip': '3333333333',
-                'adres': 'ul. Fabryczna 50',
-                'kod_pocztowy': '61-001',
-                'miasto': 'Poznań',
-                'telefon': '777888999',
-                'email': 'bhp@xyz.com.pl'
-            }
-        ]
-        
-        for klient_data in klienci:
-            klient = Klient(**klient_data)
-            db.session.add(klient)
-        
-        # Dodawanie produktów
-        print("Dodawanie produktów...")
-        produkty = [
-            # Odzież robocza
-            {'kod': 'ODZ001', 'nazwa': 'Kurtka robocza zimowa', 'kategoria': 'Odzież robocza', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('150.00'), 'stan_minimalny': 20},
-            {'kod': 'ODZ002', 'nazwa': 'Spodnie ogrodniczki', 'kategoria': 'Odzież robocza', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('80.00'), 'stan_minimalny': 30},
-            {'kod': 'ODZ003', 'nazwa': 'Kamizelka odblaskowa', 'kategoria': 'Odzież robocza', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('25.00'), 'stan_minimalny': 50},
-            {'kod': 'ODZ004', 'nazwa': 'Bluza polarowa', 'kategoria': 'Odzież robocza', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('60.00'), 'stan_minimalny': 25},
-            
-            # Obuwie
-            {'kod': 'OBU001', 'nazwa': 'Buty robocze S3', 'kategoria': 'Obuwie', 
-             'jednostka': 'para', 'cena_jednostkowa': Decimal('120.00'), 'stan_minimalny': 15},
-            {'kod': 'OBU002', 'nazwa': 'Kalosze gumowe', 'kategoria': 'Obuwie', 
-             'jednostka': 'para', 'cena_jednostkowa': Decimal('45.00'), 'stan_minimalny': 20},
-            
-            # Rękawice
-            {'kod': 'REK001', 'nazwa': 'Rękawice robocze bawełniane', 'kategoria': 'Rękawice', 
-             'jednostka': 'para', 'cena_jednostkowa': Decimal('5.00'), 'stan_minimalny': 100},
-            {'kod': 'REK002', 'nazwa': 'Rękawice gumowe', 'kategoria': 'Rękawice', 
-             'jednostka': 'para', 'cena_jednostkowa': Decimal('8.00'), 'stan_minimalny': 80},
-            {'kod': 'REK003', 'nazwa': 'Rękawice skórzane', 'kategoria': 'Rękawice', 
-             'jednostka': 'para', 'cena_jednostkowa': Decimal('15.00'), 'stan_minimalny': 40},
-            
-            # Środki czystości
-            {'kod': 'CZY001', 'nazwa': 'Płyn do mycia podłóg 5L', 'kategoria': 'Środki czystości', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('35.00'), 'stan_minimalny': 30},
-            {'kod': 'CZY002', 'nazwa': 'Detergent uniwersalny 1L', 'kategoria': 'Środki czystości', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('12.00'), 'stan_minimalny': 50},
-            {'kod': 'CZY003', 'nazwa': 'Pasta do czyszczenia', 'kategoria': 'Środki czystości', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('8.00'), 'stan_minimalny': 40},
-            {'kod': 'CZY004', 'nazwa': 'Worki na śmieci 120L', 'kategoria': 'Środki czystości', 
-             'jednostka': 'op', 'cena_jednostkowa': Decimal('25.00'), 'stan_minimalny': 20},
-            
-            # Akcesoria
-            {'kod': 'AKC001', 'nazwa': 'Mop bawełniany', 'kategoria': 'Akcesoria', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('18.00'), 'stan_minimalny': 25},
-            {'kod': 'AKC002', 'nazwa': 'Wiadro plastikowe 10L', 'kategoria': 'Akcesoria', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('15.00'), 'stan_minimalny': 30},
-            {'kod': 'AKC003', 'nazwa': 'Szczotka do zamiatania', 'kategoria': 'Akcesoria', 
-             'jednostka': 'szt', 'cena_jednostkowa': Decimal('12.00'), 'stan_minimalny': 20},
-        ]
-        
-        for produkt_data in produkty:
-            produkt = Produkt(**produkt_data)
-            db.session.add(produkt)
+        if skala is None:
+            liczby = _dane_demonstracyjne()
+        else:
             db.session.flush()
-            
-            # Tworzenie stanu magazynowego
-            import random
-            stan = StanMagazynowy(
-                produkt_id=produkt.id,
-                ilosc_dostepna=random.randint(5, 100),
-                ilosc_zarezerwowana=0,
-                lokalizacja=f"Regal-{random.randint(1, 10)}-{random.randint(1, 5)}"
-            )
-            db.session.add(stan)
+            liczby = generuj_dane(skala, ziarno, lata, koniec or date.today())
         
         db.session.commit()
         print("\n✓ Baza danych została zainicjowana!")
@@ -188,9 +630,19 @@ def init_database():
         print("  Magazynier:    login=magazyn, hasło=magazyn123")
         print("  Sprzedawca:    login=sprzedaz, hasło=sprzedaz123")
         print("  Kierownik:     login=kierownik, hasło=kierownik123")
-        print(f"\nDodano {len(produkty)} produktów")
-        print(f"Dodano {len(klienci)} klientów")
-        print(f"Dodano {len(dostawcy)} dostawców")
+        print(f"\nDodano {liczby[0]} produktów")
+        print(f"Dodano {liczby[1]} klientów")
+        print(f"Dodano {liczby[2]} dostawców")
 
 if __name__ == '__main__':
-    init_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(
+        description='Tworzy bazę od nowa i wypełnia ją danymi testowymi')
+    parser.add_argument('--skala', type=float,
+                        help='Dane syntetyczne w podanej skali (1 = 1 mln zamówień)')
+    parser.add_argument('--ziarno', type=int, default=1,
+                        help='Ziarno generatora - te same argumenty dają te same dane')
+    parser.add_argument('--lata', type=float, default=3, help='Długość historii w latach')
+    parser.add_argument('--koniec', type=date.fromisoformat,
+                        help='Ostatni dzień historii (YYYY-MM-DD), domyślnie dzisiejszy')
+    argumenty = parser.parse_args()
+    init_database(argumenty.skala, argumenty.ziarno, argumenty.lata, argumenty.koniec)
@@ -0,0 +1,103 @@
+"""pozycje zamówień z bezpośrednim kluczem obcym
+
+Zastępuje tabele pośrednie pozycje_zamowienia i pozycje_zamowienia_zakupu
+kolumnami zamowienie_id / zamowienie_zakupu_id w tabelach pozycji.
+Pozycje bez zamówienia (lub z nieistniejącym zamówieniem) przenosi do
+tabel <tabela pozycji>_osierocone do ręcznego przejrzenia.
+
+Revision ID: 3f1a8c2d9b10
+Revises:
+Create Date: 2026-10-18 10:12:00.000000
+
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger('alembic.migracje')
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a8c2d9b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (tabela pozycji, kolumna klucza, tabela zamówień, tabela pośrednia)
+POWIAZANIA = [
+    ('pozycja_zamowienia', 'zamowienie_id', 'zamowienie', 'pozycje_zamowienia'),
+    ('pozycja_zamowienia_zakupu', 'zamowienie_zakupu_id', 'zamowienie_zakupu',
+     'pozycje_zamowienia_zakupu'),
+]
+
+
+def upgrade():
+    inspektor = sa.inspect(op.get_bind())
+    tabele = inspektor.get_table_names()
+
+    for tabela, kolumna, tabela_zamowien, tabela_posrednia in POWIAZANIA:
+        kolumny = [k['name'] for k in inspektor.get_columns(tabela)]
+        if kolumna in kolumny:
+            # Baza utworzona już z nowym schematem (db.create_all)
+            if tabela_posrednia in tabele:
+                op.drop_table(tabela_posrednia)
+            continue
+
+        with op.batch_alter_table(tabela) as batch_op:
+            batch_op.add_column(sa.Column(kolumna, sa.Integer(), nullable=True))
+
+        if tabela_posrednia in tabele:
+            op.execute(
+                f'UPDATE {tabela} SET {kolumna} = ('
+                f'SELECT p.{kolumna} FROM {tabela_posrednia} p '
+                f'WHERE p.pozycja_id = {tabela}.id)'
+            )
+        # Pozycje bez zamówienia nie zmieszczą się w kluczu obcym - kwarantanna
+        # zamiast usunięcia, żeby nie znikały dane bez śladu
+        osierocone = (f'{kolumna} IS NULL OR {kolumna} NOT IN '
+                      f'(SELECT id FROM {tabela_zamowien})')
+        liczba = op.get_bind().execute(
+            sa.text(f'SELECT count(*) FROM {tabela} WHERE {osierocone}')
+        ).scalar()
+        if liczba:
+            op.execute(f'CREATE TABLE {tabela}_osierocone AS '
+                       f'SELECT * FROM {tabela} WHERE {osierocone}')
+            op.execute(f'DELETE FROM {tabela} WHERE {osierocone}')
+            logger.warning('Przeniesiono %d pozycji bez zamówienia z %s do %s_osierocone',
+                           liczba, tabela, tabela)
+
+        with op.batch_alter_table(tabela) as batch_op:
+            batch_op.alter_column(kolumna, existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(f'fk_{tabela}_{kolumna}', tabela_zamowien,
+                                        [kolumna], ['id'])
+            batch_op.create_index(f'ix_{tabela}_{kolumna}', [kolumna], unique=False)
+
+        if tabela_posrednia in tabele:
+            op.drop_table(tabela_posrednia)
+
+
+def downgrade():
+    for tabela, kolumna, tabela_zamowien, tabela_posrednia in POWIAZANIA:
+        op.create_table(
+            tabela_posrednia,
+            sa.Column(kolumna, sa.Integer(), sa.ForeignKey(f'{tabela_zamowien}.id'),
+                      primary_key=True),
+            sa.Column('pozycja_id', sa.Integer(), sa.ForeignKey(f'{tabela}.id'),
+                      primary_key=True)
+        )
+        op.execute(
+            f'INSERT INTO {tabela_posrednia} ({kolumna}, pozycja_id) '
+            f'SELECT {kolumna}, id FROM {tabela}'
+        )
+
+        with op.batch_alter_table(tabela) as batch_op:
+            batch_op.drop_index(f'ix_{tabela}_{kolumna}')
+            batch_op.drop_column(kolumna)
+
+        # Pozycje z kwarantanny wracają jako pozycje bez zamówienia
+        if f'{tabela}_osierocone' in sa.inspect(op.get_bind()).get_table_names():
+            kolumny = ', '.join(k['name'] for k in sa.inspect(op.get_bind()).get_columns(tabela))
+            op.execute(f'INSERT INTO {tabela} ({kolumny}) '
+                       f'SELECT {kolumny} FROM {tabela}_osierocone')
+            op.drop_table(f'{tabela}_osierocone')
@@ -0,0 +1,51 @@
+"""indeksy filtrów list i raportów
+
+Revision ID: 7c4e2b9a1d55
+Revises: 3f1a8c2d9b10
+Create Date: 2026-10-18 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e2b9a1d55'
+down_revision = '3f1a8c2d9b10'
+branch_labels = None
+depends_on = None
+
+
+# (nazwa indeksu, tabela, kolumny)
+INDEKSY = [
+    ('ix_zamowienie_data_zamowienia', 'zamowienie', ['data_zamowienia']),
+    ('ix_zamowienie_status_data', 'zamowienie', ['status', 'data_zamowienia']),
+    ('ix_zamowienie_zakupu_data_zamowienia', 'zamowienie_zakupu', ['data_zamowienia']),
+    ('ix_dokument_magazynowy_data_wystawienia', 'dokument_magazynowy', ['data_wystawienia']),
+    ('ix_dokument_magazynowy_typ_data', 'dokument_magazynowy', ['typ', 'data_wystawienia']),
+    ('ix_pozycja_dokumentu_dokument_id', 'pozycja_dokumentu', ['dokument_id']),
+    ('ix_faktura_data_wystawienia', 'faktura', ['data_wystawienia']),
+    ('ix_faktura_zamowienie_id', 'faktura', ['zamowienie_id']),
+    ('ix_produkt_kategoria_nazwa', 'produkt', ['kategoria', 'nazwa']),
+    ('ix_produkt_aktywny_nazwa', 'produkt', ['aktywny', 'nazwa']),
+    ('ix_stan_magazynowy_produkt_ilosc', 'stan_magazynowy', ['produkt_id', 'ilosc_dostepna']),
+    ('ix_log_data', 'log', ['data']),
+    ('ix_log_uzytkownik_data', 'log', ['uzytkownik_id', 'data']),
+]
+
+
+def _istniejace(tabela):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+
+
+def upgrade():
+    for nazwa, tabela, kolumny in INDEKSY:
+        # Bazy utworzone przez db.create_all mają już indeksy z modeli
+        if nazwa not in _istniejace(tabela):
+            op.create_index(nazwa, tabela, kolumny, unique=False)
+
+
+def downgrade():
+    for nazwa, tabela, kolumny in reversed(INDEKSY):
+        if nazwa in _istniejace(tabela):
+            op.drop_index(nazwa, table_name=tabela)
@@ -0,0 +1,55 @@
+"""prognoza popytu i punkty zamówienia
+
+Tabela prognoza_popytu - wynik nocnej prognozy (app/forecast.py), kolumna
+produkt.punkt_zamowienia - próg niskiego stanu zamiast ręcznego stanu
+minimalnego. Wypełnia je komenda "flask prognozuj-popyt".
+
+Revision ID: a9d4b7e3c261
+Revises: f8a3d6e2c517
+Create Date: 2026-10-18 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4b7e3c261'
+down_revision = 'f8a3d6e2c517'
+branch_labels = None
+depends_on = None
+
+
+def _kolumny_produktu():
+    return [k['name'] for k in sa.inspect(op.get_bind()).get_columns('produkt')]
+
+
+def upgrade():
+    # Bazy utworzone przez db.create_all mają już tabelę i kolumnę z modeli
+    if 'punkt_zamowienia' not in _kolumny_produktu():
+        op.add_column('produkt', sa.Column('punkt_zamowienia', sa.Integer(), nullable=True))
+
+    if 'prognoza_popytu' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'prognoza_popytu',
+            sa.Column('produkt_id', sa.Integer(), nullable=False),
+            sa.Column('popyt_dzienny', sa.Float(), nullable=False),
+            sa.Column('odchylenie_popytu', sa.Float(), nullable=False),
+            sa.Column('czas_dostawy', sa.Float(), nullable=False),
+            sa.Column('odchylenie_dostawy', sa.Float(), nullable=False),
+            sa.Column('zapas_bezpieczenstwa', sa.Integer(), nullable=False),
+            sa.Column('punkt_zamowienia', sa.Integer(), nullable=False),
+            sa.Column('dni_historii', sa.Integer(), nullable=False),
+            sa.Column('data_obliczenia', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['produkt_id'], ['produkt.id']),
+            sa.PrimaryKeyConstraint('produkt_id')
+        )
+
+
+def downgrade():
+    if 'prognoza_popytu' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('prognoza_popytu')
+
+    if 'punkt_zamowienia' in _kolumny_produktu():
+        with op.batch_alter_table('produkt') as batch_op:
+            batch_op.drop_column('punkt_zamowienia')
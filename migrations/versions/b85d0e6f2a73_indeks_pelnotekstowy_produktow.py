@@ -0,0 +1,35 @@
+"""indeks pełnotekstowy produktów
+
+Tabela FTS5 produkt_fts (tylko SQLite) wypełniona znormalizowanym kodem,
+nazwą, kategorią i opisem produktów.
+
+Revision ID: b85d0e6f2a73
+Revises: 7c4e2b9a1d55
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b85d0e6f2a73'
+down_revision = '7c4e2b9a1d55'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    polaczenie = op.get_bind()
+    if polaczenie.dialect.name != 'sqlite':
+        return
+
+    from app import search
+    search.utworz_indeks(polaczenie)
+    search.przebuduj_indeks(polaczenie)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TABLE IF EXISTS produkt_fts')
@@ -0,0 +1,61 @@
+"""próg niskiego stanu w stanach magazynowych
+
+Kolumna stan_magazynowy.prog_niskiego_stanu - kopia progu produktu
+(punkt zamówienia lub stan minimalny, NULL dla wycofanych produktów)
+i indeks wyrażeniowy niedoboru
+ilosc_dostepna - prog_niskiego_stanu zamiast indeksu (produkt_id,
+ilosc_dostepna), który nie obsługiwał warunku z progiem z tabeli produkt.
+
+Revision ID: c6e1f94a2b38
+Revises: a9d4b7e3c261
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e1f94a2b38'
+down_revision = 'a9d4b7e3c261'
+branch_labels = None
+depends_on = None
+
+
+def _kolumny():
+    return [k['name'] for k in sa.inspect(op.get_bind()).get_columns('stan_magazynowy')]
+
+
+def _indeksy():
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes('stan_magazynowy')}
+
+
+def upgrade():
+    # Bazy utworzone przez db.create_all mają już kolumnę i indeks z modeli
+    if 'prog_niskiego_stanu' not in _kolumny():
+        op.add_column('stan_magazynowy', sa.Column('prog_niskiego_stanu', sa.Integer(),
+                                                   nullable=True))
+    op.execute(
+        'UPDATE stan_magazynowy SET prog_niskiego_stanu = ('
+        'SELECT CASE WHEN produkt.aktywny '
+        'THEN coalesce(produkt.punkt_zamowienia, produkt.stan_minimalny) END '
+        'FROM produkt WHERE produkt.id = stan_magazynowy.produkt_id)'
+    )
+    
+    # Inspektor SQLite pomija indeksy wyrażeniowe - stąd IF NOT EXISTS
+    op.create_index('ix_stan_magazynowy_niedobor', 'stan_magazynowy',
+                    [sa.text('(ilosc_dostepna - prog_niskiego_stanu)')], unique=False,
+                    if_not_exists=True)
+    if 'ix_stan_magazynowy_produkt_ilosc' in _indeksy():
+        op.drop_index('ix_stan_magazynowy_produkt_ilosc', table_name='stan_magazynowy')
+
+
+def downgrade():
+    if 'ix_stan_magazynowy_produkt_ilosc' not in _indeksy():
+        op.create_index('ix_stan_magazynowy_produkt_ilosc', 'stan_magazynowy',
+                        ['produkt_id', 'ilosc_dostepna'], unique=False)
+    op.drop_index('ix_stan_magazynowy_niedobor', table_name='stan_magazynowy', if_exists=True)
+    
+    if 'prog_niskiego_stanu' in _kolumny():
+        with op.batch_alter_table('stan_magazynowy') as batch_op:
+            batch_op.drop_column('prog_niskiego_stanu')
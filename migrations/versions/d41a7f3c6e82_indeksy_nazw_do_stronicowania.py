@@ -0,0 +1,42 @@
+"""indeksy nazw do stronicowania list
+
+Listy produktów i klientów stronicowane są kursorem po (nazwa, id).
+
+Revision ID: d41a7f3c6e82
+Revises: b85d0e6f2a73
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a7f3c6e82'
+down_revision = 'b85d0e6f2a73'
+branch_labels = None
+depends_on = None
+
+
+# (nazwa indeksu, tabela, kolumny)
+INDEKSY = [
+    ('ix_produkt_nazwa', 'produkt', ['nazwa']),
+    ('ix_klient_nazwa', 'klient', ['nazwa']),
+]
+
+
+def _istniejace(tabela):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+
+
+def upgrade():
+    for nazwa, tabela, kolumny in INDEKSY:
+        # Bazy utworzone przez db.create_all mają już indeksy z modeli
+        if nazwa not in _istniejace(tabela):
+            op.create_index(nazwa, tabela, kolumny, unique=False)
+
+
+def downgrade():
+    for nazwa, tabela, kolumny in reversed(INDEKSY):
+        if nazwa in _istniejace(tabela):
+            op.drop_index(nazwa, table_name=tabela)
@@ -0,0 +1,56 @@
+"""zadania raportów w tle
+
+Tabela zadanie_raportu - raporty zlecone do policzenia w puli procesów
+(app/jobs.py), ze stanem, czasami i nazwą pliku wyniku.
+
+Revision ID: e5b2c9d71f04
+Revises: d41a7f3c6e82
+Create Date: 2026-10-18 19:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b2c9d71f04'
+down_revision = 'd41a7f3c6e82'
+branch_labels = None
+depends_on = None
+
+
+STATUSY = ('OCZEKUJE', 'W_TOKU', 'GOTOWE', 'BLAD', 'PRZERWANE')
+
+
+def upgrade():
+    # Bazy utworzone przez db.create_all mają już tabelę z modelu
+    if 'zadanie_raportu' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        'zadanie_raportu',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('raport', sa.String(length=50), nullable=False),
+        sa.Column('parametry', sa.JSON(), nullable=False),
+        sa.Column('status', sa.Enum(*STATUSY, name='statuszadania'), nullable=False),
+        sa.Column('uzytkownik_id', sa.Integer(), nullable=False),
+        sa.Column('data_utworzenia', sa.DateTime(), nullable=True),
+        sa.Column('data_rozpoczecia', sa.DateTime(), nullable=True),
+        sa.Column('data_zakonczenia', sa.DateTime(), nullable=True),
+        sa.Column('nazwa_pliku', sa.String(length=200), nullable=True),
+        sa.Column('liczba_wierszy', sa.Integer(), nullable=True),
+        sa.Column('blad', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['uzytkownik_id'], ['uzytkownik.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_zadanie_raportu_uzytkownik_data', 'zadanie_raportu',
+                    ['uzytkownik_id', 'data_utworzenia'], unique=False)
+
+
+def downgrade():
+    if 'zadanie_raportu' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.drop_index('ix_zadanie_raportu_uzytkownik_data', table_name='zadanie_raportu')
+    op.drop_table('zadanie_raportu')
+    sa.Enum(name='statuszadania').drop(op.get_bind(), checkfirst=True)
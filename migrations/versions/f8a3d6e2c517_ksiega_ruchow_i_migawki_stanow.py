@@ -0,0 +1,67 @@
+"""księga ruchów i migawki stanów
+
+Tabela ruch_magazynowy - ruch ze znakiem dla każdej pozycji PZ/WZ
+oraz bilans otwarcia, migawka_stanu - stany produktów na koniec dnia.
+Księgę istniejącej bazy wypełnia komenda "flask przebuduj-ksiege".
+
+Revision ID: f8a3d6e2c517
+Revises: e5b2c9d71f04
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8a3d6e2c517'
+down_revision = 'e5b2c9d71f04'
+branch_labels = None
+depends_on = None
+
+
+def _tabele():
+    return sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade():
+    # Bazy utworzone przez db.create_all mają już tabele z modeli
+    tabele = _tabele()
+
+    if 'ruch_magazynowy' not in tabele:
+        op.create_table(
+            'ruch_magazynowy',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('produkt_id', sa.Integer(), nullable=False),
+            sa.Column('data', sa.DateTime(), nullable=False),
+            sa.Column('zmiana', sa.Integer(), nullable=False),
+            sa.Column('dokument_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['produkt_id'], ['produkt.id']),
+            sa.ForeignKeyConstraint(['dokument_id'], ['dokument_magazynowy.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_ruch_magazynowy_produkt_data', 'ruch_magazynowy',
+                        ['produkt_id', 'data'], unique=False)
+        op.create_index('ix_ruch_magazynowy_data', 'ruch_magazynowy', ['data'], unique=False)
+
+    if 'migawka_stanu' not in tabele:
+        op.create_table(
+            'migawka_stanu',
+            sa.Column('dzien', sa.Date(), nullable=False),
+            sa.Column('produkt_id', sa.Integer(), nullable=False),
+            sa.Column('ilosc', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['produkt_id'], ['produkt.id']),
+            sa.PrimaryKeyConstraint('dzien', 'produkt_id')
+        )
+
+
+def downgrade():
+    tabele = _tabele()
+
+    if 'migawka_stanu' in tabele:
+        op.drop_table('migawka_stanu')
+
+    if 'ruch_magazynowy' in tabele:
+        op.drop_index('ix_ruch_magazynowy_data', table_name='ruch_magazynowy')
+        op.drop_index('ix_ruch_magazynowy_produkt_data', table_name='ruch_magazynowy')
+        op.drop_table('ruch_magazynowy')
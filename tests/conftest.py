@@ -0,0 +1,87 @@
+import pytest
+from flask import template_rendered
+from sqlalchemy import event
+from config import Config
+from app import create_app
+from app.models import db
+from tests.dane import dodaj_uzytkownika
+
+
+class KonfiguracjaTestow(Config):
+    TESTING = True
+    # Log i raporty w tle zapisywane od razu, w wątku testu
+    AUDIT_LOG_ASYNC = False
+    REPORT_JOB_WORKERS = 0
+    # Bez buforów - każde żądanie liczy wynik od nowa
+    DASHBOARD_CACHE_TTL = 0
+    IDENTITY_CACHE_TTL = 0
+    LIST_COUNT_CACHE_TTL = 0
+    REPORT_CACHE_TTL = 0
+    REPORT_CACHE_CLOSED_TTL = 0
+    # Indeksy podpowiedzi budowane przy pierwszym wyszukiwaniu, nie w tle
+    TYPEAHEAD_WARMUP = False
+
+
+class LicznikZapytan:
+    """Liczy polecenia SQL wysłane przez silnik bazy"""
+    
+    def __init__(self):
+        self.liczba = 0
+        self.polecenia = []
+    
+    def __call__(self, polaczenie, kursor, polecenie, *args):
+        self.liczba += 1
+        self.polecenia.append(polecenie)
+    
+    def zeruj(self):
+        self.liczba = 0
+        self.polecenia = []
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Aplikacja na pustej bazie SQLite w pliku (wątki testów mają osobne połączenia)"""
+    class Konfiguracja(KonfiguracjaTestow):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+    
+    app = create_app(Konfiguracja)
+    app.extensions['kolejka_raportow'].katalog = str(tmp_path / 'raporty')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def admin(app):
+    return dodaj_uzytkownika('admin', 'admin123')
+
+
+@pytest.fixture
+def klient_http(app, admin):
+    """Klient testowy zalogowany jako administrator"""
+    klient = app.test_client()
+    odpowiedz = klient.post('/auth/login', data={'login': 'admin', 'haslo': 'admin123'})
+    assert odpowiedz.status_code == 302
+    return klient
+
+
+@pytest.fixture
+def licznik(app):
+    licznik = LicznikZapytan()
+    event.listen(db.engine, 'before_cursor_execute', licznik)
+    yield licznik
+    event.remove(db.engine, 'before_cursor_execute', licznik)
+
+
+@pytest.fixture
+def szablony(app):
+    """Lista (szablon, kontekst) renderowanych w trakcie testu"""
+    wyrenderowane = []
+    
+    def zapisz(nadawca, template, context, **kwargs):
+        wyrenderowane.append((template, context))
+    
+    template_rendered.connect(zapisz, app)
+    yield wyrenderowane
+    template_rendered.disconnect(zapisz, app)
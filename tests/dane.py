@@ -0,0 +1,64 @@
+"""Dane testowe tworzone tak jak w trasach aplikacji"""
+from datetime import datetime
+from decimal import Decimal
+from app.models import (db, Uzytkownik, RolaUzytkownika, Produkt, StanMagazynowy, Klient,
+                        Dostawca, Zamowienie, PozycjaZamowienia, SprzedazDzienna,
+                        LicznikDokumentow)
+
+
+def dodaj_uzytkownika(login, haslo, rola=RolaUzytkownika.ADMINISTRATOR):
+    uzytkownik = Uzytkownik(login=login, imie='Jan', nazwisko='Testowy',
+                            email=f'{login}@bhp.pl', rola=rola)
+    uzytkownik.ustaw_haslo(haslo)
+    db.session.add(uzytkownik)
+    db.session.commit()
+    return uzytkownik
+
+
+def dodaj_produkty(liczba, kategorie=('Rękawice', 'Obuwie', None), stan=100, poczatek=0):
+    """Produkty ze stanem magazynowym; kategorie przydzielane po kolei"""
+    produkty = []
+    for i in range(poczatek, poczatek + liczba):
+        produkt = Produkt(kod=f'P{i:05d}', nazwa=f'Produkt {i}',
+                          kategoria=kategorie[i % len(kategorie)],
+                          cena_jednostkowa=Decimal('10.25') + i, stan_minimalny=10)
+        db.session.add(produkt)
+        db.session.flush()
+        db.session.add(StanMagazynowy(produkt_id=produkt.id, ilosc_dostepna=stan,
+                                      prog_niskiego_stanu=produkt.prog_niskiego_stanu))
+        produkty.append(produkt)
+    db.session.commit()
+    return produkty
+
+
+def dodaj_klienta(nazwa='Klient testowy', nip='1234567890'):
+    klient = Klient(nazwa=nazwa, nip=nip)
+    db.session.add(klient)
+    db.session.commit()
+    return klient
+
+
+def dodaj_dostawce(nazwa='Dostawca testowy', nip='9876543210', aktywny=True):
+    dostawca = Dostawca(nazwa=nazwa, nip=nip, aktywny=aktywny)
+    db.session.add(dostawca)
+    db.session.commit()
+    return dostawca
+
+
+def dodaj_zamowienie(klient, pozycje, data=None):
+    """Zamówienie klienta z pozycjami [(produkt, ilosc)] i wpisem do zestawienia sprzedaży"""
+    zamowienie = Zamowienie(numer=LicznikDokumentow.generuj_numer('ZAM'), klient_id=klient.id,
+                            data_zamowienia=data or datetime.utcnow())
+    lista = []
+    for produkt, ilosc in pozycje:
+        pozycja = PozycjaZamowienia(produkt_id=produkt.id, ilosc=ilosc,
+                                    cena_jednostkowa=produkt.cena_jednostkowa)
+        pozycja.oblicz_wartosc()
+        lista.append(pozycja)
+    zamowienie.pozycje = lista
+    zamowienie.oblicz_wartosc()
+    db.session.add(zamowienie)
+    db.session.flush()
+    SprzedazDzienna.dodaj_sprzedaz(zamowienie.data_zamowienia.date(), lista)
+    db.session.commit()
+    return zamowienie
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+from app import cache
+from app.cache import BuforWyniku, BuforLRU
+
+
+def test_bufor_wyniku_pomija_wynik_uniewazniony_w_trakcie_obliczenia():
+    bufor = BuforWyniku('test', ttl=60)
+    obliczenia = []
+    
+    def oblicz():
+        obliczenia.append(len(obliczenia))
+        if len(obliczenia) == 1:
+            # Zapis w innym wątku między odczytem danych a zapamiętaniem wyniku
+            bufor.uniewaznij()
+        return len(obliczenia)
+    
+    assert bufor.pobierz('panel', oblicz) == 1
+    assert bufor.pobierz('panel', oblicz) == 2
+    assert bufor.pobierz('panel', oblicz) == 2
+    assert len(obliczenia) == 2
+
+
+def test_bufor_lru_pomija_wynik_uniewazniony_w_trakcie_obliczenia():
+    bufor = BuforLRU('test', ttl=60)
+    obliczenia = []
+    
+    def oblicz(uniewaznij):
+        def wynik():
+            obliczenia.append(len(obliczenia))
+            if len(obliczenia) == 1:
+                uniewaznij()
+            return len(obliczenia)
+        return wynik
+    
+    # Usunięcie innego klucza też zmienia pokolenie - wynik nie jest zapamiętany
+    assert bufor.pobierz('a', oblicz(lambda: bufor.usun_gdzie(lambda k: k == 'b'))) == 1
+    assert bufor.pobierz('a', oblicz(None)) == 2
+    assert bufor.pobierz('a', oblicz(None)) == 2
+    
+    obliczenia.clear()
+    assert bufor.pobierz('c', oblicz(bufor.uniewaznij)) == 1
+    assert bufor.pobierz('c', oblicz(None)) == 2
+    assert bufor.pobierz('c', oblicz(None)) == 2
+
+
+def test_okres_raportu_zamkniety_wedlug_daty_utc(monkeypatch):
+    wywolania = []
+    monkeypatch.setattr(cache.raporty, 'pobierz',
+                        lambda klucz, oblicz, trwale: wywolania.append(trwale))
+    
+    # Lokalnie jest już 2 stycznia, w UTC wciąż 1 stycznia - dzień 1 stycznia trwa
+    class Zegar(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2026, 1, 1, 23, 30)
+    
+    monkeypatch.setattr(cache, 'datetime', Zegar)
+    cache.wynik_raportu('sprzedaz', date(2026, 1, 1), date(2026, 1, 1), None)
+    cache.wynik_raportu('sprzedaz', date(2025, 12, 31), date(2025, 12, 31), None)
+    
+    assert wywolania == [False, True]
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from datetime import datetime
+from app.models import db, Log
+
+
+def _wpis(akcja):
+    return {'uzytkownik_id': None, 'akcja': akcja, 'opis': None,
+            'data': datetime.utcnow(), 'adres_ip': None}
+
+
+def _akcje():
+    return sorted(db.session.scalars(db.select(Log.akcja)))
+
+
+def test_bledny_wpis_nie_blokuje_kolejnych_partii(app):
+    dziennik = app.extensions['dziennik_zdarzen']
+    dziennik.liczba_prob = 2
+    
+    # akcja jest wymagana - cała partia odrzucona przez bazę
+    dziennik._zapisz([_wpis('a'), _wpis(None), _wpis('b')])
+    assert len(dziennik._zaleglosci) == 3
+    assert _akcje() == []
+    
+    # Druga nieudana próba - zapis pojedynczo, błędny wpis odrzucony
+    dziennik._zapisz([_wpis('c')])
+    assert dziennik._zaleglosci == []
+    assert _akcje() == ['a', 'b', 'c']
+    
+    dziennik._zapisz([_wpis('d')])
+    assert _akcje() == ['a', 'b', 'c', 'd']
+
+
+def test_zaleglosci_ograniczone(app):
+    dziennik = app.extensions['dziennik_zdarzen']
+    dziennik.liczba_prob = 10
+    dziennik.limit_zaleglosci = 3
+    
+    dziennik._zapisz([_wpis(None)] + [_wpis(str(i)) for i in range(5)])
+    
+    assert [w['akcja'] for w in dziennik._zaleglosci] == ['2', '3', '4']
+    dziennik.oproznij()
+    assert dziennik._zaleglosci == []
+    assert _akcje() == ['2', '3', '4']
+
+
+def test_zaleglosci_ponawiane_bez_nowych_wpisow(app):
+    dziennik = app.extensions['dziennik_zdarzen']
+    dziennik.interwal = 0.02
+    dziennik._zapisz([_wpis('a'), _wpis(None)])
+    assert len(dziennik._zaleglosci) == 2
+    
+    # Wątek zapisu bez nowych wpisów w kolejce - ponawia same zaległości
+    dziennik._watek = threading.Thread(target=dziennik._petla, daemon=True)
+    dziennik._watek.start()
+    termin = time.monotonic() + 2
+    while dziennik._zaleglosci and time.monotonic() < termin:
+        time.sleep(0.01)
+    
+    assert dziennik._zaleglosci == []
+    dziennik.zatrzymaj()
+    assert _akcje() == ['a']
+
+
+def test_proces_potomny_bez_watku_rodzica(app):
+    dziennik = app.extensions['dziennik_zdarzen']
+    dziennik.interwal = 0.05
+    dziennik.dodaj(_wpis('rodzic'))
+    assert dziennik._watek is not None
+    
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if dziennik._watek is None and dziennik._kolejka.empty() else 1)
+    assert os.waitpid(pid, 0)[1] == 0
+    
+    dziennik.zatrzymaj()
+    assert _akcje() == ['rodzic']
@@ -0,0 +1,46 @@
+import csv
+import io
+import sqlite3
+from app import export
+from app.models import db
+from tests.dane import dodaj_produkty
+
+
+def test_eksport_nie_wykonuje_formul(klient_http):
+    produkty = dodaj_produkty(6)
+    for produkt, nazwa in zip(produkty, ['=HYPERLINK("http://x")', '+48 123', '-1+1',
+                                         '@SUMA(A1)', '\tTab', 'Zwykły']):
+        produkt.nazwa = nazwa
+    db.session.commit()
+    
+    odpowiedz = klient_http.get('/reports/inventory?format=csv')
+    
+    wiersze = list(csv.reader(io.StringIO(odpowiedz.get_data(as_text=True).lstrip('\ufeff')),
+                              delimiter=';'))
+    assert [w[1] for w in wiersze[1:]] == ["'=HYPERLINK(\"http://x\")", "'+48 123", "'-1+1",
+                                           "'@SUMA(A1)", "'\tTab", 'Zwykły']
+    # Liczby (także ujemne) nie są tekstem i zostają bez zmian
+    assert wiersze[1][3] == '100'
+
+
+def test_zapis_w_trakcie_strumieniowanego_eksportu(app, klient_http, monkeypatch):
+    monkeypatch.setattr(export, 'ROZMIAR_PARTII', 10)
+    dodaj_produkty(30)
+    
+    odpowiedz = klient_http.get('/reports/inventory?format=csv', buffered=False)
+    try:
+        porcje = odpowiedz.iter_encoded()
+        next(porcje)
+        next(porcje)
+        
+        # Kursor eksportu jest otwarty - zapis z innego połączenia nie czeka na jego koniec
+        polaczenie = sqlite3.connect(db.engine.url.database, timeout=0.2)
+        try:
+            polaczenie.execute('UPDATE stan_magazynowy SET ilosc_dostepna = 7')
+            polaczenie.commit()
+        finally:
+            polaczenie.close()
+        
+        assert sum(1 for _ in porcje) > 0
+    finally:
+        odpowiedz.close()
@@ -0,0 +1,55 @@
+import io
+import pytest
+from app.models import db, DokumentMagazynowy
+from tests.dane import dodaj_produkty, dodaj_dostawce
+
+
+def _import(klient_http, **kwargs):
+    return klient_http.post('/warehouse/pz/import', **kwargs)
+
+
+@pytest.mark.parametrize('dane', [
+    ['x'],
+    'tekst',
+    {'pozycje': 'P00000'},
+    {'pozycje': [['P00000', 5]]},
+    {'pozycje': [{'kod': 'P00000', 'ilosc': 5}], 'uwagi': {'a': 1}},
+])
+def test_import_odrzuca_niepoprawny_json(klient_http, dane):
+    dodaj_produkty(1)
+    
+    odpowiedz = _import(klient_http, json=dane)
+    
+    assert odpowiedz.status_code == 400
+    assert 'blad' in odpowiedz.get_json()
+
+
+@pytest.mark.parametrize('dostawca_id', ['abc', 999, {'id': 1}, 'nieaktywny'])
+def test_import_odrzuca_nieznanego_dostawce(klient_http, dostawca_id):
+    produkt = dodaj_produkty(1, stan=0)[0]
+    if dostawca_id == 'nieaktywny':
+        dostawca_id = dodaj_dostawce(aktywny=False).id
+    
+    odpowiedz = _import(klient_http, json={'dostawca_id': dostawca_id,
+                                          'pozycje': [{'kod': 'P00000', 'ilosc': 5}]})
+    
+    assert odpowiedz.status_code == 400
+    assert db.session.scalar(db.select(db.func.count(DokumentMagazynowy.id))) == 0
+    db.session.refresh(produkt.stan_magazynowy)
+    assert produkt.stan_magazynowy.ilosc_dostepna == 0
+
+
+def test_import_csv_z_dostawca(klient_http):
+    produkt = dodaj_produkty(1, stan=0)[0]
+    dostawca = dodaj_dostawce()
+    
+    odpowiedz = _import(klient_http, data={
+        'dostawca_id': str(dostawca.id),
+        'plik': (io.BytesIO('kod;ilosc\nP00000;7\n'.encode()), 'dostawa.csv'),
+    })
+    
+    assert odpowiedz.status_code == 201
+    dokument = db.session.get(DokumentMagazynowy, odpowiedz.get_json()['id'])
+    assert dokument.dostawca_id == dostawca.id
+    db.session.refresh(produkt.stan_magazynowy)
+    assert produkt.stan_magazynowy.ilosc_dostepna == 7
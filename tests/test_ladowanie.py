@@ -0,0 +1,65 @@
+import pytest
+from app import loading
+from app.loading import LeniweLadowanie, PROFILE
+from app.models import (db, DokumentMagazynowy, TypDokumentu, LicznikDokumentow, Klient,
+                        Dostawca)
+from app.stock import zaksieguj_dokument
+from tests.dane import dodaj_produkty, dodaj_klienta, dodaj_dostawce, dodaj_zamowienie
+
+
+@pytest.fixture
+def pilnowanie_profili(app):
+    """Tryb RAISE_ON_LAZY_LOAD - leniwe doczytanie relacji na stronie szczegółów to wyjątek"""
+    app.config['RAISE_ON_LAZY_LOAD'] = True
+    loading.init_app(app)
+    yield
+    app.config['RAISE_ON_LAZY_LOAD'] = False
+
+
+def _zamowienie(produkty):
+    klient = Klient.query.first() or dodaj_klienta()
+    return dodaj_zamowienie(klient, [(p, 1) for p in produkty])
+
+
+def _dokument_pz(produkty):
+    dokument = DokumentMagazynowy(numer=LicznikDokumentow.generuj_numer('PZ'),
+                                  typ=TypDokumentu.PRZYJECIE,
+                                  dostawca_id=(Dostawca.query.first() or dodaj_dostawce()).id)
+    db.session.add(dokument)
+    db.session.flush()
+    zaksieguj_dokument(dokument, [(p.id, 1) for p in produkty])
+    db.session.commit()
+    return dokument
+
+
+@pytest.mark.parametrize('utworz, adres', [
+    (_zamowienie, '/orders/customer/{}'),
+    (_dokument_pz, '/warehouse/pz/{}'),
+])
+def test_strona_szczegolow_stala_liczba_zapytan(klient_http, licznik, pilnowanie_profili,
+                                                utworz, adres):
+    produkty = dodaj_produkty(300)
+    identyfikatory = [utworz(produkty[:3]).id, utworz(produkty).id]
+    
+    liczby = []
+    for ident in identyfikatory:
+        db.session.expunge_all()
+        licznik.zeruj()
+        assert klient_http.get(adres.format(ident)).status_code == 200
+        liczby.append(licznik.liczba)
+    
+    assert liczby[0] == liczby[1]
+
+
+def test_brak_relacji_w_profilu_zglasza_wyjatek(klient_http, pilnowanie_profili, monkeypatch):
+    ident = _zamowienie(dodaj_produkty(2)).id
+    model, opcje = PROFILE['zamowienie_klienta']
+    # Profil bez klienta zamówienia - szablon doczyta go leniwie
+    monkeypatch.setitem(PROFILE, 'zamowienie_klienta', (model, opcje[1:]))
+    db.session.expunge_all()
+    
+    with pytest.raises(LeniweLadowanie) as blad:
+        klient_http.get(f'/orders/customer/{ident}')
+    
+    assert blad.value.profil == 'zamowienie_klienta'
+    assert 'klient' in str(blad.value.sciezka)
@@ -0,0 +1,47 @@
+import threading
+from datetime import datetime
+from app.models import db, LicznikDokumentow, DokumentMagazynowy, TypDokumentu
+from tests.dane import dodaj_klienta, dodaj_zamowienie
+
+
+def test_licznik_startuje_od_najwyzszego_numeru_liczbowo(app):
+    klient = dodaj_klienta()
+    rok = datetime.now().strftime('%Y')
+    for numer in ('99998', '99999', '100000'):
+        dodaj_zamowienie(klient, []).numer = f'ZAM/{rok}/{numer}'
+    # Licznik utracony (np. baza sprzed wprowadzenia liczników)
+    db.session.execute(db.delete(LicznikDokumentow))
+    db.session.commit()
+    
+    assert LicznikDokumentow.generuj_numer('ZAM') == f'ZAM/{rok}/100001'
+
+
+def test_rownolegla_numeracja_bez_luk_i_powtorzen(app):
+    watki, powtorzenia = 8, 250
+    start = threading.Barrier(watki)
+    bledy = []
+    
+    def numeruj():
+        with app.app_context():
+            try:
+                start.wait()
+                for _ in range(powtorzenia):
+                    db.session.add(DokumentMagazynowy(
+                        numer=LicznikDokumentow.generuj_numer('WZ'), typ=TypDokumentu.WYDANIE
+                    ))
+                    db.session.commit()
+            except Exception as e:
+                bledy.append(e)
+            finally:
+                db.session.remove()
+    
+    lista = [threading.Thread(target=numeruj) for _ in range(watki)]
+    for watek in lista:
+        watek.start()
+    for watek in lista:
+        watek.join()
+    
+    assert bledy == []
+    rok = datetime.now().strftime('%Y')
+    numery = db.session.scalars(db.select(DokumentMagazynowy.numer)).all()
+    assert sorted(numery) == [f'WZ/{rok}/{i:05d}' for i in range(1, watki * powtorzenia + 1)]
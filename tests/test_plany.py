@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from app import plany
+from app.models import db, MigawkaStanu, RuchMagazynowy
+from tests.dane import dodaj_produkty, dodaj_klienta, dodaj_zamowienie, dodaj_dostawce
+
+
+def _dane_tras(klient_http):
+    """Po kilka wierszy w tabelach, z których czytają sprawdzane trasy"""
+    produkty = dodaj_produkty(30, stan=12)
+    klient = dodaj_klienta()
+    dostawca = dodaj_dostawce()
+    teraz = datetime.utcnow()
+    zamowienia = [dodaj_zamowienie(klient, [(produkty[i], 2), (produkty[i + 1], 1)],
+                                   teraz - timedelta(days=i)) for i in range(10)]
+    # Bilans otwarcia i migawka sprzed okresu wyceny - stan początkowy bez czytania
+    # całej księgi
+    db.session.add_all([RuchMagazynowy(produkt_id=p.id, zmiana=12, data=teraz - timedelta(days=200))
+                        for p in produkty])
+    MigawkaStanu.utworz((teraz - timedelta(days=120)).date())
+    db.session.commit()
+    
+    assert klient_http.post(f'/orders/customer/{zamowienia[0].id}/invoice').status_code == 302
+    assert klient_http.post('/warehouse/pz/import', json={
+        'dostawca_id': dostawca.id, 'pozycje': [{'kod': 'P00001', 'ilosc': 3}]
+    }).status_code == 201
+    assert klient_http.post('/orders/supplier/add', data={
+        'dostawca_id': dostawca.id, 'produkt_id[]': [produkty[0].id], 'ilosc[]': ['5'],
+        'cena[]': ['9.50']
+    }).status_code == 302
+
+
+def test_trasy_bez_pelnych_skanow(klient_http):
+    _dane_tras(klient_http)
+    
+    wyniki = plany.sprawdz(klient_http)
+    
+    sprawdzone = {trasa for trasa, *_ in wyniki}
+    assert len(sprawdzone) == len(plany.TRASY)
+    bledy = [(trasa, punkt_koncowy, skany, ' '.join(sql.split())[:200])
+             for trasa, punkt_koncowy, sql, _, skany in wyniki if skany]
+    assert bledy == []
+
+
+def test_skan_po_indeksie_jest_pelnym_skanem(app):
+    assert plany.pelne_skany('reports.documents_report', [
+        'SCAN dokument_magazynowy USING INDEX ix_dokument_magazynowy_data_wystawienia',
+        'SCAN produkt_1 USING COVERING INDEX ix_produkt_kategoria_nazwa',
+        'SEARCH zamowienie USING INTEGER PRIMARY KEY (rowid=?)',
+        'SCAN anon_1',
+        'SCAN produkt_fts VIRTUAL TABLE INDEX 0:M4',
+    ]) == [
+        'SCAN dokument_magazynowy USING INDEX ix_dokument_magazynowy_data_wystawienia',
+        'SCAN produkt_1 USING COVERING INDEX ix_produkt_kategoria_nazwa',
+    ]
+    assert plany.pelne_skany('products.list', ['SCAN produkt USING INDEX ix_produkt_nazwa']) == []
@@ -0,0 +1,70 @@
+import pytest
+from app import create_app
+from app.models import db, DokumentMagazynowy, Zamowienie, ZamowienieZakupu
+from app.search import indeksy_podpowiedzi
+from tests.conftest import KonfiguracjaTestow
+from tests.dane import dodaj_produkty
+
+
+def test_przebudowa_nie_gubi_zmian_z_czasu_odczytu(app, monkeypatch):
+    dodaj_produkty(3)
+    indeks = indeksy_podpowiedzi()['produkty']
+    wpis = indeks._wpis
+    nowy = []
+    
+    # Zmiana zatwierdzona, gdy przebudowa czyta już rekordy (odczyt jej nie widzi)
+    def wpis_ze_zmiana(rekord):
+        if not nowy:
+            nowy.append(9999)
+            indeks.aktualizuj(9999, ('P09999 - Nowość', ('p09999', 'nowosc')))
+        return wpis(rekord)
+    
+    monkeypatch.setattr(indeks, '_wpis', wpis_ze_zmiana)
+    indeks.przebuduj()
+    
+    assert [rekord_id for rekord_id, _ in indeks.szukaj('nowo')] == [9999]
+    assert len(indeks.szukaj('p0000')) == 3
+    assert indeks._zmiany is None
+    indeks.aktualizuj(9999, None)
+
+
+def test_indeksy_osobne_dla_kazdej_aplikacji(app, tmp_path):
+    class Konfiguracja(KonfiguracjaTestow):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "druga.db"}'
+    
+    druga = create_app(Konfiguracja)
+    assert indeksy_podpowiedzi()['produkty'] is not druga.extensions['podpowiedzi']['produkty']
+    
+    # Zapis w bazie jednej aplikacji trafia tylko do jej indeksu
+    dodaj_produkty(2)
+    assert len(indeksy_podpowiedzi()['produkty'].szukaj('p0000')) == 2
+    with druga.app_context():
+        assert indeksy_podpowiedzi()['produkty'].szukaj('p0000') == []
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize('adres, formularz, komunikat', [
+    ('/warehouse/pz/add', {'dostawca_id': '', 'produkt_id[]': '1', 'ilosc[]': '5'},
+     'Wybierz dostawcę z listy podpowiedzi.'),
+    ('/warehouse/pz/add', {'dostawca_id': '1', 'produkt_id[]': '', 'ilosc[]': '5'},
+     'Wybierz produkty z listy podpowiedzi'),
+    ('/warehouse/wz/add', {'zamowienie_id': '', 'produkt_id[]': '', 'ilosc[]': '5'},
+     'Wybierz produkty z listy podpowiedzi'),
+    ('/orders/customer/add', {'klient_id': '', 'produkt_id[]': '1', 'ilosc[]': '5'},
+     'Wybierz klienta z listy podpowiedzi.'),
+    ('/orders/customer/add', {'klient_id': '1', 'produkt_id[]': '999', 'ilosc[]': '5'},
+     'Wybierz produkty z listy podpowiedzi'),
+    ('/orders/supplier/add',
+     {'dostawca_id': '1', 'produkt_id[]': '', 'ilosc[]': '5', 'cena[]': '10'},
+     'Wybierz produkty z listy podpowiedzi'),
+])
+def test_formularz_bez_wybranej_podpowiedzi(klient_http, adres, formularz, komunikat):
+    dodaj_produkty(1)
+    
+    odpowiedz = klient_http.post(adres, data=formularz)
+    
+    assert odpowiedz.status_code == 200
+    assert komunikat in odpowiedz.get_data(as_text=True)
+    for model in (DokumentMagazynowy, Zamowienie, ZamowienieZakupu):
+        assert db.session.scalar(db.select(db.func.count(model.id))) == 0
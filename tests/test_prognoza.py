@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytest
+from app.forecast import prognozuj, wczytaj_historie, przelicz
+from app.models import (db, Produkt, SprzedazDzienna, PrognozaPopytu, ZamowienieZakupu,
+                        PozycjaZamowieniaZakupu, StatusZamowieniaZakupu)
+from tests.dane import dodaj_produkty, dodaj_dostawce
+
+OD, DO = date(2026, 1, 1), date(2026, 1, 10)
+
+
+def _sprzedaz(produkt, *dni_i_ilosci):
+    db.session.add_all([
+        SprzedazDzienna(dzien=dzien, produkt_id=produkt.id, ilosc=ilosc, wartosc_netto=0)
+        for dzien, ilosc in dni_i_ilosci
+    ])
+
+
+def test_zapas_bezpieczenstwa_i_punkt_zamowienia():
+    historia = {
+        'ids': np.array([1, 2, 3, 4]),
+        'dni_historii': np.array([10, 10, 6, 7]),
+        'suma': np.array([20.0, 10.0, 60.0, 14.0]),
+        'suma_kwadratow': np.array([60.0, 10.0, 600.0, 28.0]),
+    }
+    czas_dostawy = np.array([4.0, np.nan, 2.0, 3.0])
+    odchylenie_dostawy = np.array([1.0, np.nan, 0.0, 1.0])
+    
+    prognoza = prognozuj(historia, czas_dostawy, odchylenie_dostawy, 0.95, 7, 7)
+    
+    # Produkt 3 ma historię krótszą niż min_dni, produkt 4 dokładnie min_dni
+    assert prognoza.ids.tolist() == [1, 2, 4]
+    assert prognoza.popyt_dzienny.tolist() == [2, 1, 2]
+    assert prognoza.odchylenie_popytu == pytest.approx([2 ** 0.5, 0, 0])
+    # Produkt 2 bez dostaw - domyślny czas dostawy, bez rozrzutu
+    assert prognoza.czas_dostawy.tolist() == [4, 7, 3]
+    assert prognoza.odchylenie_dostawy.tolist() == [1, 0, 1]
+    # z(0,95) = 1,645: ceil(z * sqrt(4*2 + 2^2*1^2)) = 6, ceil(z * sqrt(3*0 + 2^2*1^2)) = 4
+    assert prognoza.zapas_bezpieczenstwa.tolist() == [6, 0, 4]
+    # ceil(popyt * czas + zapas)
+    assert prognoza.punkt_zamowienia.tolist() == [14, 7, 10]
+
+
+def test_historia_od_dodania_produktu(app):
+    stary, nowy, importowany, przyszly, wycofany = dodaj_produkty(5)
+    stary.data_utworzenia = datetime(2025, 12, 1)
+    nowy.data_utworzenia = datetime(2026, 1, 6, 10)
+    importowany.data_utworzenia = datetime(2026, 1, 6, 10)
+    przyszly.data_utworzenia = datetime(2026, 1, 20)
+    wycofany.aktywny = False
+    _sprzedaz(stary, (date(2025, 12, 31), 100), (date(2026, 1, 2), 3), (date(2026, 1, 5), 5))
+    _sprzedaz(nowy, (date(2026, 1, 7), 4))
+    # Sprzedaż zaimportowana sprzed daty utworzenia produktu
+    _sprzedaz(importowany, (date(2026, 1, 3), 2))
+    _sprzedaz(wycofany, (date(2026, 1, 4), 9))
+    db.session.commit()
+    
+    historia = wczytaj_historie(OD, DO)
+    
+    assert historia['ids'].tolist() == [stary.id, nowy.id, importowany.id, przyszly.id]
+    assert historia['dni_historii'].tolist() == [10, 5, 8, 0]
+    assert historia['suma'].tolist() == [8, 4, 2, 0]
+    assert historia['suma_kwadratow'].tolist() == [34, 16, 4, 0]
+
+
+def test_przelicz_zapisuje_punkty_i_progi(app):
+    z_dostawa, bez_dostaw, nowy = dodaj_produkty(3)
+    for produkt in (z_dostawa, bez_dostaw):
+        produkt.data_utworzenia = datetime(2025, 1, 1)
+        _sprzedaz(produkt, *((OD + timedelta(days=i), 2) for i in range(10)))
+    # Punkt z poprzedniej prognozy; historia za krótka na nową
+    nowy.data_utworzenia = datetime(2026, 1, 8)
+    nowy.punkt_zamowienia = 50
+    nowy.stan_magazynowy.prog_niskiego_stanu = 50
+    
+    zamowienie = ZamowienieZakupu(numer='ZAK/1', dostawca_id=dodaj_dostawce().id,
+                                  data_zamowienia=datetime(2026, 1, 2),
+                                  data_dostawy_rzeczywista=datetime(2026, 1, 5),
+                                  status=StatusZamowieniaZakupu.DOSTARCZONE)
+    zamowienie.pozycje = [PozycjaZamowieniaZakupu(produkt_id=z_dostawa.id, ilosc=10,
+                                                  cena_jednostkowa=1)]
+    db.session.add(zamowienie)
+    db.session.commit()
+    
+    przelicz(DO, 10, 0.95, 7, 5)
+    db.session.commit()
+    db.session.expire_all()
+    
+    prognozy = {p.produkt_id: p for p in PrognozaPopytu.query}
+    assert set(prognozy) == {z_dostawa.id, bez_dostaw.id}
+    assert (prognozy[z_dostawa.id].czas_dostawy, prognozy[bez_dostaw.id].czas_dostawy) == (3, 7)
+    # Stały popyt 2 szt. dziennie - bez zapasu bezpieczeństwa
+    assert [db.session.get(Produkt, p.id).punkt_zamowienia for p in (z_dostawa, bez_dostaw)] \
+        == [6, 14]
+    # Produkt bez prognozy wraca do stanu minimalnego, progi stanów przepisane
+    assert db.session.get(Produkt, nowy.id).punkt_zamowienia is None
+    assert [db.session.get(Produkt, p.id).stan_magazynowy.prog_niskiego_stanu
+            for p in (z_dostawa, bez_dostaw, nowy)] == [6, 14, 10]
@@ -0,0 +1,147 @@
+import pytest
+from datetime import date, datetime, timedelta
+from app import cache
+from app.models import db, Produkt, ZadanieRaportu, PozycjaZamowienia, SprzedazDzienna, \
+    RuchMagazynowy
+from app.valuation import wycena_okresu
+from tests.dane import dodaj_produkty, dodaj_klienta, dodaj_zamowienie
+
+
+def _raport_sprzedazy(klient_http, dzien):
+    return klient_http.get('/reports/sales', query_string={
+        'data_od': dzien.isoformat(), 'data_do': dzien.isoformat()
+    })
+
+
+def _dodaj_zamowienia(liczba, produkty, klient, data):
+    for i in range(liczba):
+        dodaj_zamowienie(klient, [(produkty[(i + j) % len(produkty)], j + 1) for j in range(3)],
+                         data)
+
+
+def test_raport_sprzedazy_stala_liczba_zapytan(klient_http, licznik):
+    produkty = dodaj_produkty(6)
+    klient = dodaj_klienta()
+    data = datetime.utcnow() - timedelta(days=1)
+    
+    _dodaj_zamowienia(5, produkty, klient, data)
+    licznik.zeruj()
+    assert _raport_sprzedazy(klient_http, data.date()).status_code == 200
+    malo_danych = licznik.liczba
+    
+    _dodaj_zamowienia(200, produkty + dodaj_produkty(30, poczatek=6), klient, data)
+    licznik.zeruj()
+    assert _raport_sprzedazy(klient_http, data.date()).status_code == 200
+    
+    assert licznik.liczba == malo_danych
+
+
+def test_raport_sprzedazy_kategorie_zgodne_z_pozycjami(klient_http, szablony):
+    produkty = dodaj_produkty(6)
+    klient = dodaj_klienta()
+    data = datetime.utcnow() - timedelta(days=1)
+    zamowienia = [dodaj_zamowienie(klient, [(p, i + 1) for p in produkty[i:i + 3]], data)
+                  for i in range(4)]
+    
+    # Sprzedaż usuniętego produktu zostaje w raporcie w kategorii 'Brak'
+    db.session.execute(db.delete(Produkt).where(Produkt.id == produkty[0].id))
+    db.session.commit()
+    
+    oczekiwane = {}
+    for zamowienie in zamowienia:
+        for pozycja in zamowienie.pozycje:
+            produkt = db.session.get(Produkt, pozycja.produkt_id)
+            kategoria = produkt.kategoria if produkt and produkt.kategoria else 'Brak'
+            oczekiwane[kategoria] = oczekiwane.get(kategoria, 0) + float(pozycja.wartosc_netto)
+    
+    assert _raport_sprzedazy(klient_http, data.date()).status_code == 200
+    kontekst = szablony[-1][1]
+    
+    assert dict(kontekst['sprzedaz_kategorie']) == pytest.approx(oczekiwane)
+    assert 'Brak' in oczekiwane
+    assert kontekst['liczba_zamowien'] == len(zamowienia)
+    assert kontekst['suma_netto'] == sum(z.wartosc_netto for z in zamowienia)
+
+
+@pytest.mark.parametrize('dane', [
+    ['x'],
+    'tekst',
+    {'raport': ['stany']},
+    {'raport': 'stany', 'kategoria': {'a': 1}},
+])
+def test_zlecenie_raportu_odrzuca_niepoprawny_json(klient_http, dane):
+    odpowiedz = klient_http.post('/reports/jobs', json=dane)
+    
+    assert odpowiedz.status_code == 400
+    assert 'blad' in odpowiedz.get_json()
+    assert db.session.scalar(db.select(db.func.count(ZadanieRaportu.id))) == 0
+
+
+def test_zlecenie_raportu_odrzuca_uszkodzony_json(klient_http):
+    odpowiedz = klient_http.post('/reports/jobs', data='{"raport": ',
+                                 content_type='application/json')
+    
+    assert odpowiedz.status_code == 400
+
+
+def test_wycena_odwrocony_zakres(klient_http, szablony):
+    dodaj_produkty(3)
+    
+    odwrocony = klient_http.get('/reports/valuation', query_string={
+        'data_od': '2026-03-31', 'data_do': '2026-01-01'})
+    kontekst_odwrocony = szablony[-1][1]
+    poprawny = klient_http.get('/reports/valuation', query_string={
+        'data_od': '2026-01-01', 'data_do': '2026-03-31'})
+    kontekst = szablony[-1][1]
+    
+    assert odwrocony.status_code == poprawny.status_code == 200
+    assert (kontekst_odwrocony['data_od'], kontekst_odwrocony['data_do']) == \
+        ('2026-01-01', '2026-03-31')
+    assert kontekst_odwrocony['razem'] == kontekst['razem']
+
+
+def test_wycena_pomija_ruchy_usunietego_produktu(app):
+    produkty = dodaj_produkty(3)
+    ids = [p.id for p in produkty]
+    db.session.add_all([
+        RuchMagazynowy(produkt_id=produkt_id, data=datetime(2026, 1, 10), zmiana=10 * (i + 1))
+        for i, produkt_id in enumerate(ids)
+    ])
+    db.session.commit()
+    
+    # Ruch usuniętego produktu zostaje w księdze (bez kaskady w SQLite)
+    db.session.execute(db.delete(Produkt).where(Produkt.id == ids[1]))
+    db.session.commit()
+    
+    produkty_wyceny, _, razem = wycena_okresu(date(2026, 1, 31), date(2026, 1, 1))
+    
+    assert produkty_wyceny.etykiety.tolist() == [ids[0], ids[2]]
+    assert produkty_wyceny.stan_koncowy.tolist() == [10, 30]
+    # 10 i 30 sztuk przez 22 z 31 dni okresu
+    assert produkty_wyceny.sredni_stan.tolist() == pytest.approx([10 * 22 / 31, 30 * 22 / 31])
+    assert razem.wartosc[0] == pytest.approx(10 * 10.25 + 30 * 12.25)
+
+
+@pytest.mark.parametrize('zakres', [False, True])
+def test_przebudowa_zestawienia_uniewaznia_raport(klient_http, szablony, monkeypatch, zakres):
+    monkeypatch.setattr(cache.raporty, 'ttl_trwalych', None)
+    cache.raporty.uniewaznij()
+    produkty = dodaj_produkty(3)
+    data = datetime.utcnow() - timedelta(days=2)
+    dodaj_zamowienie(dodaj_klienta(), [(produkty[0], 2)], data)
+    
+    assert _raport_sprzedazy(klient_http, data.date()).status_code == 200
+    przed = dict(szablony[-1][1]['sprzedaz_kategorie'])
+    assert przed
+    
+    # Korekta pozycji z pominięciem ORM - widoczna w raporcie dopiero po przebudowie
+    db.session.execute(db.update(PozycjaZamowienia).values(
+        wartosc_netto=PozycjaZamowienia.wartosc_netto * 2))
+    db.session.commit()
+    SprzedazDzienna.przebuduj(*((data.date(), data.date()) if zakres else ()))
+    db.session.commit()
+    
+    assert _raport_sprzedazy(klient_http, data.date()).status_code == 200
+    po = dict(szablony[-1][1]['sprzedaz_kategorie'])
+    assert po == pytest.approx({k: 2 * v for k, v in przed.items()})
+    cache.raporty.uniewaznij()
@@ -0,0 +1,62 @@
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from app.models import db, SprzedazDzienna
+from tests.dane import dodaj_produkty, dodaj_klienta, dodaj_zamowienie
+
+Pozycja = namedtuple('Pozycja', 'produkt_id ilosc wartosc_netto')
+
+
+def _zestawienie():
+    return {(w.dzien, w.produkt_id): (w.ilosc, w.wartosc_netto)
+            for w in db.session.scalars(db.select(SprzedazDzienna))}
+
+
+def test_sprzedaz_sumowana_po_dniu_i_produkcie(app):
+    a, b = dodaj_produkty(2)
+    klient = dodaj_klienta()
+    dzis = datetime.utcnow()
+    wczoraj = dzis - timedelta(days=1)
+    
+    dodaj_zamowienie(klient, [(a, 2), (b, 1)], dzis)
+    dodaj_zamowienie(klient, [(a, 3), (a, 1)], dzis)
+    dodaj_zamowienie(klient, [(a, 5)], wczoraj)
+    
+    assert _zestawienie() == {
+        (dzis.date(), a.id): (6, 6 * a.cena_jednostkowa),
+        (dzis.date(), b.id): (1, b.cena_jednostkowa),
+        (wczoraj.date(), a.id): (5, 5 * a.cena_jednostkowa),
+    }
+
+
+def test_rownolegle_dopisywanie_tego_samego_dnia_i_produktu(app):
+    """Bez upsertu wątki czytały brak wiersza i wstawiały duplikat klucza lub gubiły sumę"""
+    produkt = dodaj_produkty(1)[0]
+    pozycja = Pozycja(produkt.id, 1, produkt.cena_jednostkowa)
+    dzien = datetime.utcnow().date()
+    watki, powtorzenia = 8, 10
+    start = threading.Barrier(watki)
+    bledy = []
+    
+    def dopisuj():
+        with app.app_context():
+            try:
+                start.wait()
+                for _ in range(powtorzenia):
+                    SprzedazDzienna.dodaj_sprzedaz(dzien, [pozycja])
+                    db.session.commit()
+            except Exception as e:
+                bledy.append(e)
+            finally:
+                db.session.remove()
+    
+    lista = [threading.Thread(target=dopisuj) for _ in range(watki)]
+    for watek in lista:
+        watek.start()
+    for watek in lista:
+        watek.join()
+    
+    assert bledy == []
+    assert _zestawienie() == {
+        (dzien, produkt.id): (watki * powtorzenia, watki * powtorzenia * produkt.cena_jednostkowa)
+    }
@@ -0,0 +1,73 @@
+import numpy as np
+from sqlalchemy.dialects import sqlite
+from app.forecast import Prognoza, zapisz
+from decimal import Decimal
+from app.models import db, StanMagazynowy, Produkt
+from tests.dane import dodaj_produkty, dodaj_dostawce
+
+
+def _plan(zapytanie):
+    polecenie = zapytanie.statement.compile(dialect=sqlite.dialect(),
+                                            compile_kwargs={'literal_binds': True})
+    return [wiersz[-1] for wiersz in db.session.execute(
+        db.text(f'EXPLAIN QUERY PLAN {polecenie}')
+    )]
+
+
+def _niskie():
+    return sorted(stan.produkt.kod for stan in StanMagazynowy.niskie_stany())
+
+
+def test_niskie_stany_z_indeksu_niedoboru(app):
+    dodaj_produkty(50)
+    
+    plan = _plan(StanMagazynowy.niskie_stany())
+    
+    assert any('USING INDEX ix_stan_magazynowy_niedobor' in krok for krok in plan), plan
+    assert not any(krok.startswith('SCAN') for krok in plan), plan
+
+
+def test_niskie_stany_po_zmianie_stanu_i_progu(klient_http):
+    produkty = dodaj_produkty(3, stan=20)
+    assert _niskie() == []
+    
+    # Ruch magazynowy - próg bez zmian
+    produkty[0].stan_magazynowy.aktualizuj_stan(10, 'odejmij')
+    db.session.commit()
+    assert _niskie() == ['P00000']
+    
+    # Edycja stanu minimalnego
+    odpowiedz = klient_http.post(f'/products/{produkty[1].id}/edit', data={
+        'nazwa': produkty[1].nazwa, 'kategoria': '', 'jednostka': 'szt',
+        'cena_jednostkowa': '10.00', 'stan_minimalny': '25', 'aktywny': 'on'
+    })
+    assert odpowiedz.status_code == 302
+    assert _niskie() == ['P00000', 'P00001']
+    
+    # Punkty zamówienia z prognozy zastępują stany minimalne
+    ids = np.array([p.id for p in produkty[1:]])
+    zapisz(Prognoza(ids, np.full(2, 90), np.ones(2), np.zeros(2), np.full(2, 7.0),
+                    np.zeros(2), np.zeros(2, dtype=np.int64), np.array([5, 30])))
+    db.session.commit()
+    assert _niskie() == ['P00000', 'P00002']
+    
+    # Wycofany produkt nie jest już niskim stanem
+    assert klient_http.get(f'/products/{produkty[0].id}/toggle').status_code == 302
+    assert _niskie() == ['P00002']
+
+
+def test_pierwsze_przyjecie_nowego_produktu_ponizej_minimum(klient_http):
+    dostawca = dodaj_dostawce()
+    # Produkt bez wiersza stanu - PZ tworzy go razem z progiem niskiego stanu
+    produkt = Produkt(kod='N00001', nazwa='Nowy produkt', cena_jednostkowa=Decimal('5'),
+                      stan_minimalny=10)
+    db.session.add(produkt)
+    db.session.commit()
+    
+    odpowiedz = klient_http.post('/warehouse/pz/add', data={
+        'dostawca_id': dostawca.id, 'produkt_id[]': produkt.id, 'ilosc[]': 3})
+    
+    assert odpowiedz.status_code == 302
+    assert produkt.stan_magazynowy.prog_niskiego_stanu == 10
+    assert _niskie() == ['N00001']
+    assert 'N00001' in klient_http.get('/warehouse/').get_data(as_text=True)
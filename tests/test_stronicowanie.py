@@ -0,0 +1,119 @@
+import base64
+import json
+import pytest
+from app.cache import liczebnosci_list
+from app.models import db, Produkt
+from app.pagination import stronicuj, _zakoduj
+from tests.dane import dodaj_produkty
+
+NA_STRONIE = 10
+
+
+def _strona(app, parametry=None):
+    with app.test_request_context('/products/', query_string=parametry or {}):
+        return stronicuj(Produkt.query, (Produkt.nazwa, Produkt.id), per_page=NA_STRONIE)
+
+
+def _kolejnosc():
+    return [p.id for p in Produkt.query.order_by(Produkt.nazwa, Produkt.id)]
+
+
+def _kursor(dane):
+    return base64.urlsafe_b64encode(json.dumps(dane).encode()).decode().rstrip('=')
+
+
+def test_przejscie_do_przodu_i_wstecz(app):
+    dodaj_produkty(45)
+    
+    # Do przodu aż do ostatniej strony
+    strony = [_strona(app)]
+    while strony[-1].nastepna is not None:
+        strony.append(_strona(app, strony[-1].nastepna))
+    
+    assert [s.page for s in strony] == [1, 2, 3, 4, 5]
+    assert [p.id for s in strony for p in s.items] == _kolejnosc()
+    assert strony[0].poprzednia is None
+    assert all(s.total == 45 and s.pages == 5 for s in strony)
+    
+    # Wstecz od ostatniej strony aż do pierwszej (adres bez kursora)
+    wstecz = [strony[-1]]
+    while wstecz[-1].poprzednia:
+        wstecz.append(_strona(app, wstecz[-1].poprzednia))
+    wstecz.append(_strona(app, wstecz[-1].poprzednia))
+    
+    assert [s.page for s in wstecz] == [5, 4, 3, 2, 1]
+    assert [[p.id for p in s.items] for s in wstecz] == \
+        [[p.id for p in s.items] for s in reversed(strony)]
+
+
+def test_gleboka_strona_bez_offsetu(app, licznik):
+    dodaj_produkty(45)
+    kolejnosc = _kolejnosc()
+    graniczny = db.session.get(Produkt, kolejnosc[39])
+    
+    licznik.zeruj()
+    _strona(app)
+    pierwsza = licznik.liczba
+    
+    licznik.zeruj()
+    strona = _strona(app, {'po': _zakoduj(41, [graniczny.nazwa, graniczny.id])})
+    
+    assert strona.page == 41
+    assert [p.id for p in strona.items] == kolejnosc[40:]
+    assert strona.nastepna is None
+    # Strona zaczyna się za granicznym wierszem (warunek krotki), tyle zapytań co pierwsza
+    assert licznik.liczba == pierwsza
+    assert any('(produkt.nazwa, produkt.id) >' in polecenie for polecenie in licznik.polecenia)
+
+
+@pytest.mark.parametrize('kursor', [
+    'nie-base64!',
+    _kursor({'0': 2}),
+    _kursor([2, ['Produkt 1'], 1]),
+    _kursor([2, {'a': 1}, 1]),
+    _kursor([2, 'Produkt 1']),
+    _kursor([2, 'Produkt 1', 1, 5]),
+    _kursor(['2', 'Produkt 1', 1]),
+    _kursor([0, 'Produkt 1', 1]),
+    _kursor([]),
+    _kursor('tekst'),
+])
+def test_niepoprawny_kursor_to_pierwsza_strona(app, kursor):
+    dodaj_produkty(15)
+    
+    for parametr in ('po', 'przed'):
+        strona = _strona(app, {parametr: kursor})
+        
+        assert strona.page == 1
+        assert [p.id for p in strona.items] == _kolejnosc()[:NA_STRONIE]
+
+
+def test_liczba_wierszy_z_bufora(app, licznik, monkeypatch):
+    monkeypatch.setattr(liczebnosci_list, 'ttl', 60)
+    liczebnosci_list.uniewaznij()
+    dodaj_produkty(15)
+    
+    def zapytania_liczby():
+        return sum('count(' in polecenie.lower() for polecenie in licznik.polecenia)
+    
+    licznik.zeruj()
+    pierwsza = _strona(app)
+    druga = _strona(app, pierwsza.nastepna)
+    assert pierwsza.total == druga.total == 15
+    # Strony tej samej listy dzielą liczbę wierszy - kursor nie jest częścią klucza
+    assert zapytania_liczby() == 1
+    
+    # Inne filtry to inny klucz bufora
+    licznik.zeruj()
+    with app.test_request_context('/products/', query_string={'kategoria': 'Obuwie'}):
+        strona = stronicuj(Produkt.query.filter_by(kategoria='Obuwie'),
+                           (Produkt.nazwa, Produkt.id), per_page=NA_STRONIE)
+    assert strona.total == 5
+    assert zapytania_liczby() == 1
+    
+    # Unieważnienie (np. po nowym dokumencie) wymusza ponowne liczenie
+    liczebnosci_list.uniewaznij()
+    licznik.zeruj()
+    assert _strona(app).total == 15
+    assert zapytania_liczby() == 1
+    liczebnosci_list.uniewaznij()
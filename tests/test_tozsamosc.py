@@ -0,0 +1,63 @@
+import pytest
+from app.cache import tozsamosci
+from app.models import RolaUzytkownika
+from tests.dane import dodaj_uzytkownika
+
+
+@pytest.fixture
+def bufor_tozsamosci(app, monkeypatch):
+    monkeypatch.setattr(tozsamosci, 'ttl', 60)
+    tozsamosci.uniewaznij()
+    yield tozsamosci
+    tozsamosci.uniewaznij()
+
+
+@pytest.fixture
+def sprzedawca(app):
+    return dodaj_uzytkownika('jan', 'jan12345', RolaUzytkownika.SPRZEDAWCA)
+
+
+def _zaloguj(app, login, haslo):
+    klient = app.test_client()
+    assert klient.post('/auth/login', data={'login': login, 'haslo': haslo}).status_code == 302
+    return klient
+
+
+def _zapytania_tozsamosci(licznik):
+    return sum('FROM uzytkownik' in polecenie for polecenie in licznik.polecenia)
+
+
+def test_zadanie_bez_zapytan_o_tozsamosc(klient_http, licznik, bufor_tozsamosci):
+    klient_http.get('/products/')
+    
+    licznik.zeruj()
+    for _ in range(3):
+        assert klient_http.get('/products/').status_code == 200
+    
+    assert _zapytania_tozsamosci(licznik) == 0
+
+
+def test_dezaktywacja_konczy_sesje(app, klient_http, sprzedawca, bufor_tozsamosci):
+    klient_jana = _zaloguj(app, 'jan', 'jan12345')
+    assert klient_jana.get('/orders/customer/add').status_code == 200
+    
+    klient_http.get(f'/users/{sprzedawca.id}/toggle')
+    
+    odpowiedz = klient_jana.get('/orders/customer/add')
+    assert odpowiedz.status_code == 302
+    assert '/auth/login' in odpowiedz.headers['Location']
+
+
+def test_zmiana_roli_widoczna_od_nastepnego_zadania(app, klient_http, sprzedawca,
+                                                   bufor_tozsamosci):
+    klient_jana = _zaloguj(app, 'jan', 'jan12345')
+    assert klient_jana.get('/orders/customer/add').status_code == 200
+    
+    klient_http.post(f'/users/{sprzedawca.id}/edit', data={
+        'imie': 'Jan', 'nazwisko': 'Testowy', 'email': 'jan@bhp.pl',
+        'rola': 'MAGAZYNIER', 'aktywny': 'on'})
+    
+    odpowiedz = klient_jana.get('/orders/customer/add')
+    assert odpowiedz.status_code == 302
+    assert odpowiedz.headers['Location'].endswith('/dashboard')
+    assert klient_jana.get('/warehouse/pz/add').status_code == 200
@@ -0,0 +1,85 @@
+import re
+import threading
+from decimal import Decimal
+from app.models import (db, ZamowienieZakupu, PozycjaZamowieniaZakupu, StatusZamowieniaZakupu,
+                        StanMagazynowy, LicznikDokumentow)
+from tests.dane import dodaj_produkty, dodaj_dostawce
+
+ADRES = '/orders/supplier/replenish'
+
+
+def _niskie_stany_z_historia_zakupow(liczba):
+    """Produkty bez towaru, kupione wcześniej u jednego dostawcy (zamówienie dostarczone)"""
+    produkty = dodaj_produkty(liczba, stan=0)
+    dostawca = dodaj_dostawce()
+    zamowienie = ZamowienieZakupu(numer=LicznikDokumentow.generuj_numer('ZAK'),
+                                  dostawca_id=dostawca.id,
+                                  status=StatusZamowieniaZakupu.DOSTARCZONE)
+    zamowienie.pozycje = [PozycjaZamowieniaZakupu(produkt_id=p.id, ilosc=50,
+                                                  cena_jednostkowa=Decimal('5.00'),
+                                                  wartosc_netto=Decimal('250.00'))
+                          for p in produkty]
+    db.session.add(zamowienie)
+    db.session.commit()
+    return produkty
+
+
+def _plan(klient_http):
+    strona = klient_http.get(ADRES).get_data(as_text=True)
+    return re.search(r'name="plan" value="(\w+)"', strona).group(1)
+
+
+def _nowe_zamowienia():
+    return db.session.scalar(db.select(db.func.count(ZamowienieZakupu.id)).where(
+        ZamowienieZakupu.status == StatusZamowieniaZakupu.NOWE))
+
+
+def test_zatwierdzenie_planu_z_podgladu(klient_http):
+    _niskie_stany_z_historia_zakupow(3)
+    
+    odpowiedz = klient_http.post(ADRES, data={'plan': _plan(klient_http)})
+    
+    assert odpowiedz.status_code == 302
+    assert _nowe_zamowienia() == 1
+
+
+def test_plan_zmieniony_od_podgladu_odrzucony(klient_http):
+    produkty = _niskie_stany_z_historia_zakupow(3)
+    plan = _plan(klient_http)
+    
+    # Przyjęcie towaru po otwarciu podglądu - jeden produkt nie wymaga już zamówienia
+    db.session.execute(db.update(StanMagazynowy).where(
+        StanMagazynowy.produkt_id == produkty[0].id).values(ilosc_dostepna=500))
+    db.session.commit()
+    
+    odpowiedz = klient_http.post(ADRES, data={'plan': plan}, follow_redirects=True)
+    
+    assert 'zmieniły się od podglądu' in odpowiedz.get_data(as_text=True)
+    assert _nowe_zamowienia() == 0
+
+
+def test_rownolegle_zatwierdzenia_tworza_zamowienia_raz(app, klient_http):
+    _niskie_stany_z_historia_zakupow(3)
+    plan = _plan(klient_http)
+    watki = 4
+    start = threading.Barrier(watki)
+    statusy, bledy = [], []
+    
+    def zatwierdz():
+        klient = app.test_client()
+        try:
+            klient.post('/auth/login', data={'login': 'admin', 'haslo': 'admin123'})
+            start.wait()
+            statusy.append(klient.post(ADRES, data={'plan': plan}).status_code)
+        except Exception as e:
+            bledy.append(e)
+    
+    lista = [threading.Thread(target=zatwierdz) for _ in range(watki)]
+    for watek in lista:
+        watek.start()
+    for watek in lista:
+        watek.join()
+    
+    assert bledy == []
+    assert statusy == [302] * watki
+    assert _nowe_zamowienia() == 1
@@ -0,0 +1,52 @@
+import threading
+from app.models import db, DokumentMagazynowy, LicznikDokumentow, TypDokumentu, RuchMagazynowy
+from app.stock import zaksieguj_dokument, BrakTowaru
+from tests.dane import dodaj_produkty
+
+
+def test_rownolegle_wydania_nie_schodza_ponizej_zera(app):
+    stan_poczatkowy, ilosc = 100, 7
+    produkt = dodaj_produkty(1, stan=stan_poczatkowy)[0]
+    watki, powtorzenia = 8, 5
+    start = threading.Barrier(watki)
+    wydane, odrzucone, bledy = [], [], []
+    
+    def wydawaj():
+        with app.app_context():
+            try:
+                start.wait()
+                for _ in range(powtorzenia):
+                    dokument = DokumentMagazynowy(numer=LicznikDokumentow.generuj_numer('WZ'),
+                                                  typ=TypDokumentu.WYDANIE)
+                    db.session.add(dokument)
+                    db.session.flush()
+                    try:
+                        zaksieguj_dokument(dokument, [(produkt.id, ilosc)])
+                    except BrakTowaru:
+                        db.session.rollback()
+                        odrzucone.append(1)
+                        continue
+                    db.session.commit()
+                    wydane.append(dokument.numer)
+            except Exception as e:
+                bledy.append(e)
+            finally:
+                db.session.remove()
+    
+    lista = [threading.Thread(target=wydawaj) for _ in range(watki)]
+    for watek in lista:
+        watek.start()
+    for watek in lista:
+        watek.join()
+    
+    assert bledy == []
+    db.session.refresh(produkt.stan_magazynowy)
+    stan = produkt.stan_magazynowy.ilosc_dostepna
+    assert stan >= 0
+    # 40 prób po 7 sztuk przy stanie 100 - wydanie 14 dokumentów, reszta odrzucona
+    assert len(wydane) == stan_poczatkowy // ilosc
+    assert len(wydane) + len(odrzucone) == watki * powtorzenia
+    assert len(wydane) * ilosc == stan_poczatkowy - stan
+    assert db.session.scalar(db.select(db.func.count(DokumentMagazynowy.id))) == len(wydane)
+    assert db.session.scalar(db.select(db.func.sum(RuchMagazynowy.zmiana)).where(
+        RuchMagazynowy.produkt_id == produkt.id)) == -len(wydane) * ilosc
@@ -0,0 +1,32 @@
+from decimal import Decimal
+from app import search
+from app.models import db, Produkt
+
+
+def _dodaj(kod, nazwa, opis=None):
+    produkt = Produkt(kod=kod, nazwa=nazwa, opis=opis, cena_jednostkowa=Decimal('1.00'))
+    db.session.add(produkt)
+    return produkt
+
+
+def test_indeks_pelnotekstowy_sprawdzony_przy_starcie(app):
+    assert app.extensions['wyszukiwarka_fts'] is True
+
+
+def test_najtrafniejsze_przed_limitem_i_liczba_wszystkich(klient_http, szablony):
+    klient_http.application.config['SEARCH_MAX_HITS'] = 5
+    # Najstarszy produkt ma frazę w kodzie i nazwie, nowsze tylko w opisie
+    najlepszy = _dodaj('REK-001', 'Rękawice robocze')
+    for i in range(12):
+        _dodaj(f'X{i:03d}', f'Produkt {i}', opis='pasuje do rękawic roboczych')
+    db.session.commit()
+    
+    wyniki = search.filtruj(Produkt.query, 'rekawic').all()
+    assert [p.id for p in wyniki][:1] == [najlepszy.id]
+    assert len(wyniki) == 5
+    assert search.zapytanie_liczby(Produkt.query, 'rekawic').count() == 13
+    
+    assert klient_http.get('/products/', query_string={'szukaj': 'rekawic'}).status_code == 200
+    produkty = szablony[-1][1]['produkty']
+    assert produkty.items[0].id == najlepszy.id
+    assert produkty.total == 13
@@ -0,0 +1,58 @@
+import pytest
+from app.models import db, Zamowienie, ZamowienieZakupu, PozycjaZamowieniaZakupu
+from tests.dane import dodaj_produkty, dodaj_klienta, dodaj_dostawce
+
+
+def _zamowienie_klienta(klient_http, produkt_ids):
+    return klient_http.post('/orders/customer/add', data={
+        'klient_id': 1,
+        'produkt_id[]': produkt_ids,
+        'ilosc[]': [2] * len(produkt_ids),
+    })
+
+
+def _zamowienie_zakupu(klient_http, produkt_ids):
+    return klient_http.post('/orders/supplier/add', data={
+        'dostawca_id': 1,
+        'produkt_id[]': produkt_ids,
+        'ilosc[]': [5] * len(produkt_ids),
+        'cena[]': ['4.50'] * len(produkt_ids),
+    })
+
+
+@pytest.mark.parametrize('wyslij, model', [
+    (_zamowienie_klienta, Zamowienie),
+    (_zamowienie_zakupu, ZamowienieZakupu),
+])
+def test_zamowienie_stala_liczba_zapytan(klient_http, licznik, wyslij, model):
+    dodaj_klienta()
+    dodaj_dostawce()
+    # Identyfikatory przed pomiarem - odczyt wygasłych obiektów to osobne zapytania
+    produkt_ids = [p.id for p in dodaj_produkty(200)]
+    
+    # Pierwsze zamówienie rozgrzewa bufory (tożsamość, podpowiedzi) - nie jest liczone
+    assert wyslij(klient_http, produkt_ids[:1]).status_code == 302
+    
+    liczby = []
+    for pozycje in (produkt_ids[:3], produkt_ids):
+        licznik.zeruj()
+        assert wyslij(klient_http, pozycje).status_code == 302
+        liczby.append(licznik.liczba)
+    
+    assert liczby[0] == liczby[1]
+    zamowienie = db.session.scalars(db.select(model).order_by(model.id.desc())).first()
+    assert len(zamowienie.pozycje) == 200
+
+
+def test_zamowienie_zakupu_nieznany_produkt(klient_http):
+    dodaj_dostawce()
+    produkt = dodaj_produkty(1)[0]
+    
+    odpowiedz = klient_http.post('/orders/supplier/add', data={
+        'dostawca_id': 1, 'produkt_id[]': [produkt.id, 999],
+        'ilosc[]': [5, 5], 'cena[]': ['4.50', '4.50']})
+    
+    assert odpowiedz.status_code == 200
+    assert 'Wybierz produkty z listy podpowiedzi' in odpowiedz.get_data(as_text=True)
+    assert db.session.scalar(db.select(db.func.count(ZamowienieZakupu.id))) == 0
+    assert db.session.scalar(db.select(db.func.count(PozycjaZamowieniaZakupu.id))) == 0